@@ -0,0 +1,176 @@
+""" Time synthetic plans and compare against a saved baseline
+
+Run from the repository root::
+
+    python -m benchmarks.run
+    python -m benchmarks.run --cases small medium --save
+
+Timings are the best of several repeats.  A stage regresses when it
+is slower than the baseline by more than the tolerance, a fraction
+of the baseline time.  Baselines depend on the machine, save a new
+one before comparing on different hardware.
+"""
+from pathlib import Path
+from time import perf_counter
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import tempfile
+
+from benchmarks.synthetic import generate_plan
+from planner.simulation import Simulation
+from planner.sinks import CsvSink
+
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+TIMINGS = ["setup_seconds", "run_seconds", "columns_seconds", "csv_seconds"]
+DEFAULT_TOLERANCE = 0.5
+CASES = {
+    "small": {"assets": 5, "transactions": 20, "years": 10},
+    "medium": {"assets": 10, "transactions": 50, "group_depth": 3, "mortgages": 1, "years": 20},
+    "large": {"assets": 20, "transactions": 100, "group_depth": 4, "mortgages": 2, "years": 40},
+}
+
+def benchmark(configuration: dict) -> dict:
+    """ Time each stage of one simulation
+
+    :param configuration: combined configuration
+    :type configuration: dict
+    :return: seconds per stage, simulated days and logged actions
+    :rtype: dict
+
+    Setup covers validating the configuration, linking objects and
+    compiling calendars, amortization and tax tables, all done when
+    the Simulation is created.
+    """
+    # Progress and summary messages are not part of the timings
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = perf_counter()
+        simulation = Simulation(**configuration)
+        setup_end = perf_counter()
+        days, asset_states, action_logger, _, _, error_raised = simulation.run(update_func=lambda generator: generator)
+        run_end = perf_counter()
+    if error_raised is not None:
+        raise(ValueError(f"Benchmark plan failed: {error_raised}"))
+    actions = action_logger.row_columns()
+    columns_end = perf_counter()
+    with tempfile.TemporaryDirectory() as directory:
+        with CsvSink(Path(directory) / "output.csv") as state_sink, CsvSink(Path(directory) / "changes.csv") as action_sink:
+            state_sink.write(asset_states)
+            action_sink.write_columns(actions)
+        csv_end = perf_counter()
+    return {
+        "setup_seconds": setup_end - start,
+        "run_seconds": run_end - setup_end,
+        "columns_seconds": columns_end - run_end,
+        "csv_seconds": csv_end - columns_end,
+        "days": days,
+        "actions": len(action_logger),
+    }
+
+def run_case(name: str, repeat: int = 5) -> dict:
+    """ Best timings of a named case over several repeats
+
+    :param name: key of CASES
+    :type name: str
+    :param repeat: number of times to run the case
+    :type repeat: int
+    :return: best seconds per stage, days, actions and throughput
+    :rtype: dict
+    """
+    configuration = generate_plan(**CASES[name])
+    results = [benchmark(configuration) for _ in range(repeat)]
+    best = results[0]
+    for timing in TIMINGS:
+        best[timing] = min([r[timing] for r in results])
+    best["days_per_second"] = best["days"] / best["run_seconds"]
+    best["actions_per_second"] = best["actions"] / best["run_seconds"]
+    return best
+
+def regressions(results: dict, baseline: dict, tolerance: float) -> list:
+    """ Timings slower than the baseline by more than the tolerance
+
+    :param results: results by case name
+    :type results: dict
+    :param baseline: baseline results by case name
+    :type baseline: dict
+    :param tolerance: allowed slow down as a fraction of the baseline time
+    :type tolerance: float
+    :return: description of each regression
+    :rtype: list
+
+    Only the ratio to the baseline is compared, timings missing from
+    the baseline are skipped.
+    """
+    found = []
+    for name, result in results.items():
+        for timing in TIMINGS:
+            try:
+                ratio = result[timing] / baseline[name][timing]
+            except KeyError:
+                continue
+            if ratio > 1.0 + tolerance:
+                found.append(f"{name} {timing}: {result[timing]:.4f}s is {ratio:.2f}x the {baseline[name][timing]:.4f}s baseline")
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark synthetic plans")
+    parser.add_argument(
+        "--cases",
+        help="Cases to run (default all)",
+        nargs="+",
+        choices=list(CASES.keys()),
+        default=list(CASES.keys()),
+    )
+    parser.add_argument(
+        "--repeat",
+        help="Runs per case, the best is kept (default 5)",
+        type=int,
+        default=5,
+    )
+    parser.add_argument(
+        "--baseline",
+        help="Baseline JSON file",
+        type=Path,
+        default=BASELINE_PATH,
+    )
+    parser.add_argument(
+        "--save",
+        help="Save results as the new baseline instead of comparing",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--tolerance",
+        help=f"Slow down allowed as a fraction of the baseline time (default {DEFAULT_TOLERANCE})",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+    )
+    args = parser.parse_args()
+    results = {}
+    for name in args.cases:
+        result = run_case(name, args.repeat)
+        results[name] = result
+        print(
+            f"{name}: setup {result['setup_seconds']:.3f}s run {result['run_seconds']:.3f}s "
+            f"columns {result['columns_seconds']:.3f}s csv {result['csv_seconds']:.3f}s "
+            f"{result['days_per_second']:.0f} days/s {result['actions_per_second']:.0f} actions/s"
+        )
+    if args.save:
+        baseline = {"python": platform.python_version(), "machine": platform.machine(), "cases": results}
+        args.baseline.write_text(json.dumps(baseline, indent=4) + "\n")
+        print(f"Saved baseline to {args.baseline}")
+        return
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}, run with --save to create one")
+        return
+    found = regressions(results, json.loads(args.baseline.read_text())["cases"], args.tolerance)
+    for regression in found:
+        print(f"Regression beyond {args.tolerance:.0%} tolerance, {regression}")
+    if len(found) > 0:
+        sys.exit(1)
+    print(f"No stage more than {args.tolerance:.0%} slower than the baseline")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+from datetime import date
+import random
+
+FREQUENCIES = ["daily", "weekly", "biweekly", "monthly", "yearly"]
+# Federal taxes use the default brackets
+STATE_TAX_BRACKETS = [
+    {"bottom_of_range": 0.0, "rate": 0.03},
+    {"bottom_of_range": 20000.0, "rate": 0.05},
+]
+
+def _group(rng: random.Random, name: str, depth: int, width: int) -> dict:
+    """ Nested transaction group
+
+    :param rng: random generator
+    :type rng: random.Random
+    :param name: group name
+    :type name: str
+    :param depth: levels of sub transactions below this group
+    :type depth: int
+    :param width: sub transactions per level
+    :type width: int
+    :return: transaction configuration with sub transactions
+    :rtype: dict
+    """
+    if depth == 0:
+        return {"name": name, "amount": round(rng.uniform(5.0, 200.0), 2)}
+    return {
+        "name": name,
+        "priority": rng.randint(1, 100),
+        "sub_transactions": [_group(rng, f"{name}.{i}", depth - 1, width) for i in range(width)],
+    }
+
+def generate_plan(
+    assets: int = 5,
+    transactions: int = 20,
+    group_depth: int = 0,
+    mortgages: int = 0,
+    taxes: bool = True,
+    years: int = 10,
+    seed: int = 0,
+    start: date = date(2024, 1, 1),
+) -> dict:
+    """ Synthetic combined configuration of a controllable size
+
+    :param assets: number of assets, one of which is the checking account
+    :type assets: int
+    :param transactions: number of transactions outside groups
+    :type transactions: int
+    :param group_depth: levels of sub transactions in the one bills group, 0 for no group
+    :type group_depth: int
+    :param mortgages: number of mortgages, each with its own debt asset
+    :type mortgages: int
+    :param taxes: whether federal and state income taxes are calculated
+    :type taxes: bool
+    :param years: simulation horizon
+    :type years: int
+    :param seed: random seed, the same arguments always give the same plan
+    :type seed: int
+    :param start: simulation start date
+    :type start: date
+    :return: configuration to pass to Simulation
+    :rtype: dict
+
+    Checking starts with far more than every withdrawal over the
+    horizon so plans never stop early on insufficient funds and each
+    benchmark runs the whole horizon.
+    """
+    rng = random.Random(seed)
+    end = start.replace(year=start.year + years)
+    configuration = {
+        "start": start,
+        "end": end,
+        "dates": {"retirement": start.replace(year=start.year + years // 2)},
+        "interest_rates": [
+            {"name": "stocks", "rate": 7.0},
+            {"name": "bank", "rate": 1.5},
+            {"name": "inflation", "rate": 3.0},
+        ],
+        "assets": [{"name": "Checking", "balance": 1000000000.0}],
+        "transactions": [],
+        "mortgages": [],
+    }
+    for i in range(1, assets):
+        configuration["assets"].append({
+            "name": f"Asset {i}",
+            "balance": round(rng.uniform(1000.0, 200000.0), 2),
+        })
+        configuration["transactions"].append({
+            "name": f"Asset {i} growth",
+            "destination": f"Asset {i}",
+            "frequency": "daily",
+            "asset_maturity": True,
+            "interest_rate": rng.choice(["stocks", "bank"]),
+        })
+    asset_names = [a["name"] for a in configuration["assets"]]
+    for i in range(transactions):
+        transaction = {
+            "name": f"Transaction {i}",
+            "amount": round(rng.uniform(10.0, 3000.0), 2),
+            "frequency": rng.choice(FREQUENCIES),
+            "priority": rng.randint(1, 100),
+        }
+        if transaction["frequency"] == "daily":
+            transaction["amount"] = round(transaction["amount"] / 100.0, 2)
+        kind = rng.random()
+        if kind < 0.3:
+            transaction["destination"] = "Checking"
+            transaction["income_taxable"] = taxes
+            transaction["interest_rate"] = "inflation"
+            transaction["end"] = "retirement"
+        elif kind < 0.8 or len(asset_names) == 1:
+            transaction["source"] = "Checking"
+            transaction["fed_tax_deductable"] = taxes and rng.random() < 0.2
+        else:
+            transaction["source"] = "Checking"
+            transaction["destination"] = rng.choice(asset_names[1:])
+        configuration["transactions"].append(transaction)
+    if group_depth > 0:
+        bills = _group(rng, "Bills", group_depth, 2)
+        bills["source"] = "Checking"
+        configuration["transactions"].append(bills)
+    for i in range(mortgages):
+        loan_amount = round(rng.uniform(100000.0, 500000.0), 2)
+        configuration["assets"].append({
+            "name": f"Mortgage {i} debt",
+            "balance": -loan_amount,
+            "allow_negative_balance": True,
+        })
+        configuration["mortgages"].append({
+            "name": f"Mortgage {i}",
+            "source": "Checking",
+            "destination": f"Mortgage {i} debt",
+            "loan_amount": loan_amount,
+            "loan_rate": round(rng.uniform(2.5, 7.5), 3),
+            "term_months": rng.choice([180, 360]),
+            "start_date": start,
+        })
+    if taxes:
+        configuration["federal_income_taxes"] = {
+            "source": "Checking",
+            "interest_rate": "inflation",
+            "deductions": [{"name": "Standard", "amount": 29200.0, "interest_rate": "inflation"}],
+        }
+        configuration["state_income_taxes"] = {
+            "source": "Checking",
+            "tax_brackets": STATE_TAX_BRACKETS,
+        }
+    return configuration
@@ -2,11 +2,9 @@ import argparse
 import datetime
 from pathlib import Path
 
-import pandas as pd
-
-from planner.common import round
-from planner.config_reading import read_configuration
-from planner import Simulation
+# Only light modules are imported here, the simulation engine
+# and its dependencies are imported by the command which runs
+from planner.sinks import OutputFormatEnum, DEFAULT_CHUNK_SIZE, make_sink, write_csv
 
 def cli():
     parser = argparse.ArgumentParser()
@@ -39,31 +37,319 @@ def cli():
         type=Path,
         default=None,
     )
+    parser.add_argument(
+        "-m",
+        "--monte_carlo_paths",
+        help="Run this many Monte Carlo return paths instead of a single simulation",
+        type=int,
+        default=None,
+    )
+    parser.add_argument(
+        "--seed",
+        help="Random seed for Monte Carlo runs",
+        type=int,
+        default=None,
+    )
+    parser.add_argument(
+        "-f",
+        "--output_format",
+        help="File format of asset states and changes (default csv)",
+        choices=[f.value for f in OutputFormatEnum],
+        default=OutputFormatEnum.csv.value,
+    )
+    parser.add_argument(
+        "--chunk_size",
+        help="Number of result rows buffered before writing to file",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+    )
+    parser.add_argument(
+        "--cache_dir",
+        help="Directory of cached configuration files and results, reused when unchanged",
+        type=Path,
+        default=None,
+    )
+    parser.add_argument(
+        "--profile",
+        help="Print phase timings and transaction counters, and write them to profile.json",
+        action="store_true",
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser(
+        "calendars",
+        help="Print the dates each transaction executes on instead of running",
+    )
+    subparsers.add_parser(
+        "amortization",
+        help="Write the amortization schedule of each mortgage to mortgage_amortization.csv instead of running",
+    )
+    subparsers.add_parser(
+        "compare_step_modes",
+        help="Run with daily and monthly steps and write their differences to step_mode_comparison.csv",
+    )
+    sweep_parser = subparsers.add_parser(
+        "sweep",
+        help="Run every combination of a grid of overrides in parallel",
+    )
+    sweep_parser.add_argument(
+        "grid_path",
+        help="YAML file of override values for dates, named entries or top level keys",
+        type=Path,
+    )
+    sweep_parser.add_argument(
+        "-w",
+        "--workers",
+        help="Number of worker processes (default every core)",
+        type=int,
+        default=None,
+    )
+    sweep_parser.add_argument(
+        "-o",
+        "--output_path",
+        help="CSV file for the summary table (default sweep.csv)",
+        type=Path,
+        default=Path("sweep.csv"),
+    )
+    goal_seek_parser = subparsers.add_parser(
+        "goal_seek",
+        help="Find the largest transaction amount or earliest date the plan affords",
+    )
+    goal_seek_parser.add_argument(
+        "target",
+        help="transactions.<name>.amount or dates.<name>",
+    )
+    goal_seek_parser.add_argument(
+        "-g",
+        "--grid_path",
+        help="YAML file of override values, the goal is sought for every combination",
+        type=Path,
+        default=None,
+    )
+    goal_seek_parser.add_argument(
+        "-w",
+        "--workers",
+        help="Number of worker processes (default every core)",
+        type=int,
+        default=None,
+    )
+    goal_seek_parser.add_argument(
+        "-o",
+        "--output_path",
+        help="CSV file for the results (default goal_seek.csv)",
+        type=Path,
+        default=Path("goal_seek.csv"),
+    )
+    batch_parser = subparsers.add_parser(
+        "batch",
+        help="Run the plans of every household in a manifest in parallel",
+    )
+    batch_parser.add_argument(
+        "manifest_path",
+        help="YAML manifest of household ids and their config files or list file",
+        type=Path,
+    )
+    batch_parser.add_argument(
+        "-w",
+        "--workers",
+        help="Number of households run at once (default every core)",
+        type=int,
+        default=None,
+    )
+    batch_parser.add_argument(
+        "-o",
+        "--output_directory",
+        help="Directory of the dataset partitioned by household (default batch_output)",
+        type=Path,
+        default=Path("batch_output"),
+    )
+    batch_parser.add_argument(
+        "-f",
+        "--output_format",
+        help="File format of the household partitions (default csv, parquet requires pyarrow)",
+        dest="batch_output_format",
+        choices=[f.value for f in OutputFormatEnum],
+        default=OutputFormatEnum.csv.value,
+    )
     args = parser.parse_args()
+    if args.command is not None:
+        mode = args.command
+    elif args.monte_carlo_paths is not None:
+        mode = "monte_carlo"
+    else:
+        mode = "run"
+    check_options(parser, args, mode)
+    if args.command == "batch":
+        assert(args.manifest_path.exists()), f"Could not find {args.manifest_path}"
+        batch_main(args.manifest_path, args.workers, args.output_directory, args.batch_output_format, args.chunk_size, args.start_date, args.end_date)
+        return
     assert(args.yaml_path_list is not None or len(args.config_file_path) > 0), "You must provide either one or more config files via -c or file with a list via -l"
     for c_path in args.config_file_path:
         assert(c_path.exists()), f"Could not find {c_path}"
     if args.yaml_path_list is not None:
         assert(args.yaml_path_list.exists()), f"Provided list file path does not exists: {args.yaml_path_list}"
-    main(args.config_file_path, args.yaml_path_list, args.start_date, args.end_date)
+    if args.command == "calendars":
+        calendar_main(args.config_file_path, args.yaml_path_list, args.start_date, args.end_date)
+    elif args.command == "amortization":
+        amortization_main(args.config_file_path, args.yaml_path_list, args.start_date, args.end_date)
+    elif args.command == "compare_step_modes":
+        step_comparison_main(args.config_file_path, args.yaml_path_list, args.start_date, args.end_date)
+    elif args.command == "sweep":
+        assert(args.grid_path.exists()), f"Could not find {args.grid_path}"
+        sweep_main(args.grid_path, args.workers, args.output_path, args.config_file_path, args.yaml_path_list, args.start_date, args.end_date)
+    elif args.command == "goal_seek":
+        assert(args.grid_path is None or args.grid_path.exists()), f"Could not find {args.grid_path}"
+        goal_seek_main(args.target, args.grid_path, args.workers, args.output_path, args.config_file_path, args.yaml_path_list, args.start_date, args.end_date)
+    elif args.monte_carlo_paths is not None:
+        monte_carlo_main(args.monte_carlo_paths, args.seed, args.config_file_path, args.yaml_path_list, args.start_date, args.end_date)
+    else:
+        main(args.output_format, args.chunk_size, args.cache_dir, args.profile, args.config_file_path, args.yaml_path_list, args.start_date, args.end_date)
 
-def main(*args, **kwargs):
-    configuration = read_configuration(*args, **kwargs)
-    simulation = Simulation(**configuration)
-    _, asset_states, action_logs, tax_data, state_tax_data, _ = simulation.run()
+# Options used by only some modes, by destination
+MODE_OPTIONS = {
+    "config_file_path": "-c/--config_file_path",
+    "yaml_path_list": "-l/--yaml_path_list",
+    "monte_carlo_paths": "-m/--monte_carlo_paths",
+    "seed": "--seed",
+    "output_format": "-f/--output_format",
+    "chunk_size": "--chunk_size",
+    "cache_dir": "--cache_dir",
+    "profile": "--profile",
+}
+
+# Options each mode uses, any other in MODE_OPTIONS is an error
+ALLOWED_OPTIONS = {
+    "run": ["config_file_path", "yaml_path_list", "output_format", "chunk_size", "cache_dir", "profile"],
+    "monte_carlo": ["config_file_path", "yaml_path_list", "monte_carlo_paths", "seed"],
+    "sweep": ["config_file_path", "yaml_path_list"],
+    "goal_seek": ["config_file_path", "yaml_path_list"],
+    "calendars": ["config_file_path", "yaml_path_list"],
+    "amortization": ["config_file_path", "yaml_path_list"],
+    "compare_step_modes": ["config_file_path", "yaml_path_list"],
+    "batch": ["chunk_size"],
+}
+
+def check_options(parser: argparse.ArgumentParser, args: argparse.Namespace, mode: str):
+    """ Stop with a usage error when an option the mode ignores is given
+
+    :param parser: parser of the arguments
+    :type parser: argparse.ArgumentParser
+    :param args: parsed arguments
+    :type args: argparse.Namespace
+    :param mode: key of ALLOWED_OPTIONS
+    :type mode: str
+    """
+    for dest, flag in MODE_OPTIONS.items():
+        if dest not in ALLOWED_OPTIONS[mode] and getattr(args, dest) != parser.get_default(dest):
+            parser.error(f"{flag} cannot be used with {mode}")
+
+def main(output_format: OutputFormatEnum, chunk_size: int, cache_dir: Path, profile: bool, *args, **kwargs):
+    from planner.config_reading import read_configuration, load_simulation
+    from planner.result_cache import ResultCache, cached_run
+    from planner.profiling import RunProfiler
+    configuration = read_configuration(*args, cache_directory=cache_dir, **kwargs)
+    profiler = None
+    with make_sink(output_format, "output", chunk_size) as state_sink, make_sink(output_format, "changes", chunk_size) as action_sink:
+        if cache_dir is None or profile:
+            # Results are written while running, so partial results are kept on failure
+            # Profiled runs always simulate rather than reading cached results
+            if profile:
+                profiler = RunProfiler()
+            simulation = load_simulation(configuration)
+            _, _, _, tax_data, state_tax_data, _ = simulation.run(state_sink=state_sink, action_sink=action_sink, profiler=profiler)
+        else:
+            # Cached results are kept whole in memory
+            _, asset_states, action_logs, tax_data, state_tax_data, _ = cached_run(configuration, ResultCache(cache_dir))
+            state_sink.write(asset_states)
+            action_sink.write_columns(action_logs.row_columns())
+    if profiler is not None:
+        print(profiler.format_report())
+        profiler.write_json("profile.json")
     print("Writing results to file")
-    pd.DataFrame(asset_states).to_csv("output.csv", index=False)
-    pd.DataFrame(action_logs).to_csv("changes.csv", index=False)
     if tax_data is not None:
-        pd.DataFrame(tax_data).to_csv("yearly_fed_taxes.csv", index=False)
+        write_csv(tax_data, "yearly_fed_taxes.csv")
     if state_tax_data is not None:
-        pd.DataFrame(state_tax_data).to_csv("yearly_state_taxes.csv", index=False)
+        write_csv(state_tax_data, "yearly_state_taxes.csv")
+
+
+def calendar_main(*args, **kwargs):
+    from planner.config_reading import read_configuration
+    from planner.simulation import Simulation
+    from planner.scheduler import format_calendars
+    simulation = Simulation(**read_configuration(*args, **kwargs))
+    print(format_calendars(simulation.transactions + simulation.mortgages))
+
+def amortization_main(*args, **kwargs):
+    from planner.config_reading import read_configuration
+    from planner.simulation import Simulation
+    simulation = Simulation(**read_configuration(*args, **kwargs))
+    rows = []
+    for mortgage in simulation.mortgages:
+        rows.extend(mortgage.amortization_table())
+    print("Writing amortization schedules to file")
+    write_csv(rows, "mortgage_amortization.csv")
 
+def step_comparison_main(*args, **kwargs):
+    from planner.config_reading import read_configuration
+    from planner.step_comparison import compare_step_modes
+    summaries, rows = compare_step_modes(read_configuration(*args, **kwargs))
+    for summary in summaries:
+        print(f"{summary['step_mode']}: {summary['steps']} steps in {summary['seconds']:.3f}s, final net worth {summary['final_net_worth']:.2f}, first failure {summary['first_failure_date']}")
+    print("Writing step mode differences to file")
+    write_csv(rows, "step_mode_comparison.csv")
+
+def monte_carlo_main(paths: int, seed: int, *args, **kwargs):
+    from planner.config_reading import read_configuration
+    from planner.simulation import Simulation
+    from planner.monte_carlo import MonteCarlo
+    configuration = read_configuration(*args, **kwargs)
+    monte_carlo = MonteCarlo(Simulation(**configuration), paths, seed=seed)
+    _, asset_bands, yearly_failures, failure_probability = monte_carlo.run()
+    print(f"Probability of insufficient funds: {failure_probability:.1%}")
+    print("Writing results to file")
+    write_csv(asset_bands, "monte_carlo_output.csv")
+    write_csv(yearly_failures, "monte_carlo_failures.csv")
+
+def sweep_main(grid_path: Path, workers: int, output_path: Path, *args, **kwargs):
+    from planner.config_reading import read_configuration, load_yaml
+    from planner.sweep import run_sweep
+    configuration = read_configuration(*args, **kwargs)
+    grid = load_yaml(grid_path.read_text())
+    rows = run_sweep(configuration, grid, workers=workers)
+    print(f"Writing {len(rows)} results to {output_path}")
+    write_csv(rows, output_path)
+
+def goal_seek_main(target: str, grid_path: Path, workers: int, output_path: Path, *args, **kwargs):
+    from planner.config_reading import read_configuration, load_yaml
+    from planner.goal_seek import run_goal_seek
+    configuration = read_configuration(*args, **kwargs)
+    grid = None
+    if grid_path is not None:
+        grid = load_yaml(grid_path.read_text())
+    rows = run_goal_seek(configuration, target, grid, workers=workers)
+    for row in rows:
+        if row["error"] is not None:
+            print(f"Goal seek failed: {row['error']}")
+        elif row[target] is None:
+            print(f"No value of {target} succeeds")
+    if len(rows) == 1 and rows[0]["error"] is None:
+        print(f"{target}: {rows[0][target]}")
+    print(f"Writing {len(rows)} results to {output_path}")
+    write_csv(rows, output_path)
 
+def batch_main(manifest_path: Path, workers: int, output_directory: Path, output_format: OutputFormatEnum, chunk_size: int, start: datetime.date, end: datetime.date):
+    from planner.batch import read_manifest, run_batch
+    households = read_manifest(manifest_path)
+    rows = run_batch(households, output_directory, output_format, workers, chunk_size, start, end)
+    for row in rows:
+        if row["error"] is not None:
+            print(f"Household {row['household']} failed: {row['error']}")
+    errors = len([r for r in rows if r["error"] is not None])
+    print(f"Ran {len(rows)} households, {errors} failed, writing summary to {output_directory / 'batch_summary.csv'}")
+    write_csv(rows, output_directory / "batch_summary.csv")
 
 def valid_date(s):
     try:
-        return datetime.datetime.strptime(s, "%Y-%m-%d").date
+        return datetime.datetime.strptime(s, "%Y-%m-%d").date()
     except ValueError:
         msg = "not a valid date: {0!r}".format(s)
         raise argparse.ArgumentTypeError(msg)
@@ -1 +1,7 @@
-from planner.simulation import Simulation
\ No newline at end of file
+def __getattr__(name: str):
+    # Loaded on first use so light modules such as planner.sinks
+    # can be imported without the simulation engine
+    if name == "Simulation":
+        from planner.simulation import Simulation
+        return Simulation
+    raise(AttributeError(f"module {__name__!r} has no attribute {name!r}"))
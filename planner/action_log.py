@@ -1,23 +1,346 @@
+from array import array
 from datetime import date
 from decimal import Decimal
 
-from pydantic import BaseModel
-
 from planner.transaction import Transaction
+from planner.common import to_cents, from_cents
+
+ASSET_TRANSACTION = "Asset Transaction"
+
+TRANSACTION_COLUMNS = [
+    "transaction_name",
+    "asset_maturity",
+    "income_taxable",
+    "fed_income_tax_payment",
+    "state_income_tax_payment",
+    "fed_tax_deductable",
+    "state_tax_deductable",
+    "category",
+    "sepp",
+]
+ACTION_COLUMNS = [
+    "date",
+    "action_type",
+    "amount",
+    "changed_item",
+]
+
+TAX_FIELDS = [
+    "income_taxable",
+    "fed_tax_deductable",
+    "state_tax_deductable",
+    "fed_income_tax_payment",
+    "state_income_tax_payment",
+]
+INCOME_TAXABLE = 0
+
+class TaxAccumulator:
+    """ Running yearly totals of the actions income taxes depend on
+
+    Totals are kept in cents for each of TAX_FIELDS, taxable income
+    only counts increases in balance.  A field without any actions in
+    a year has no total rather than a total of 0.
+    """
+
+    def __init__(self):
+        self.totals = {}
+        # Transactions are kept alive with their fields, so ids are unique
+        self.transaction_fields = {}
+
+    def add(self, year: int, cents: int, transaction: Transaction):
+        """ Add an action to the year's totals
+
+        :param year: tax year of the action
+        :type year: int
+        :param cents: signed change in balance
+        :type cents: int
+        :param transaction: transaction causing the change
+        :type transaction: Transaction
+        """
+        try:
+            _, fields = self.transaction_fields[id(transaction)]
+        except KeyError:
+            fields = [i for i, field in enumerate(TAX_FIELDS) if getattr(transaction, field)]
+            self.transaction_fields[id(transaction)] = (transaction, fields)
+        if len(fields) == 0:
+            return
+        totals = self.totals.setdefault(year, [None] * len(TAX_FIELDS))
+        for i in fields:
+            if i != INCOME_TAXABLE or cents > 0:
+                total = totals[i]
+                totals[i] = cents if total is None else total + cents
+
+    def total(self, year: int, field: str) -> Decimal:
+        """ Total of a field for a year
+
+        :param year: tax year
+        :type year: int
+        :param field: one of TAX_FIELDS
+        :type field: str
+        :return: total amount, a plain 0 without any actions
+        :rtype: Decimal
+        """
+        if year not in self.totals or self.totals[year][TAX_FIELDS.index(field)] is None:
+            # Same as summing no actions
+            return Decimal(0)
+        return from_cents(self.totals[year][TAX_FIELDS.index(field)])
+
+    def get_state(self) -> dict:
+        """ Totals for saving in a checkpoint
+
+        :return: year to list of cents per field
+        :rtype: dict
+        """
+        return {year: list(totals) for year, totals in self.totals.items()}
+
+    def set_state(self, state: dict):
+        """ Restore totals saved by get_state
+
+        :param state: year to list of cents per field
+        :type state: dict
+        """
+        self.totals = {year: list(totals) for year, totals in state.items()}
+
+class ActionLogger:
+    """ Columnar log of asset balance changes
+
+    Each field is kept in its own typed array with one entry per
+    action.  Transactions, changed items and action types are stored
+    once and referenced by index.  Amounts are rounded to cents.
+    Tax totals are accumulated even when actions are not logged.
+    """
+
+    def __init__(self, log_actions: bool = True):
+        """ Set up empty log
+
+        :param log_actions: keep each action, False = only tax totals
+        :type log_actions: bool
+        """
+        self.year = None
+        self.log_actions = log_actions
+        self.tax_totals = TaxAccumulator()
+        self.dates = array("l")
+        self.amounts = array("q")
+        self.transaction_ids = array("l")
+        self.changed_item_ids = array("l")
+        self.action_type_ids = array("l")
+        self.transactions = []
+        self.transaction_index = {}
+        self.changed_items = []
+        self.changed_item_index = {}
+        self.action_types = []
+        self.action_type_index = {}
+        self.transaction_dicts = []
+        self.popped_count = 0
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    @property
+    def logged_count(self) -> int:
+        """ Number of actions logged, including those already popped
+
+        :return: count of actions
+        :rtype: int
+        """
+        return self.popped_count + len(self.amounts)
+
+    def set_year(self, year: int):
+        """ set year on logger
+
+        :param year: year of action(s)
+        :type year: int
+        """
+        self.year = year
+
+    def _intern(self, value, values: list, index: dict, key = None) -> int:
+        """ Get the index of a stored value, storing it if new
+
+        :param value: value to look up
+        :param values: stored values
+        :type values: list
+        :param index: stored value index keyed by key
+        :type index: dict
+        :param key: lookup key, default the value itself
+        :return: index of the value
+        :rtype: int
+        """
+        if key is None:
+            key = value
+        try:
+            return index[key]
+        except KeyError:
+            index[key] = len(values)
+            values.append(value)
+            return index[key]
+
+    def add_action(self, current_date: date, amount: float, changed_item: str, transaction: Transaction, action_type: str = ASSET_TRANSACTION):
+        """ Add an action to the log
+
+        :param current_date: date of action
+        :type current_date: date
+        :param amount: signed change in balance
+        :type amount: float
+        :param changed_item: name of the changed asset
+        :type changed_item: str
+        :param transaction: transaction causing the change
+        :type transaction: Transaction
+        :param action_type: type of action
+        :type action_type: str
+
+        We don't want $0.00 actions
+        """
+        cents = to_cents(amount)
+        if cents == 0:
+            return
+        self.tax_totals.add(self.year, cents, transaction)
+        if not self.log_actions:
+            return
+        self.dates.append(current_date.toordinal())
+        self.amounts.append(cents)
+        # Stored transactions are kept alive by the list, so ids are unique
+        self.transaction_ids.append(self._intern(transaction, self.transactions, self.transaction_index, id(transaction)))
+        self.changed_item_ids.append(self._intern(changed_item, self.changed_items, self.changed_item_index))
+        self.action_type_ids.append(self._intern(action_type, self.action_types, self.action_type_index))
+
+    def transaction_data(self) -> list:
+        """ Static data of the logged transactions
+
+        :return: dictionary per stored transaction
+        :rtype: list
+
+        Logs restored by from_columns store the dictionaries directly.
+        Dictionaries are built once, when a transaction is first read.
+        """
+        self.transaction_dicts.extend([
+            t if isinstance(t, dict) else t.to_dict()
+            for t in self.transactions[len(self.transaction_dicts):]
+        ])
+        return self.transaction_dicts
+
+    def to_columns(self) -> dict:
+        """ Logged actions as plain columns for storage
+
+        :return: typed arrays and lists of stored values
+        :rtype: dict
+        """
+        return {
+            "dates": self.dates,
+            "amounts": self.amounts,
+            "transaction_ids": self.transaction_ids,
+            "changed_item_ids": self.changed_item_ids,
+            "action_type_ids": self.action_type_ids,
+            "transactions": self.transaction_data(),
+            "changed_items": self.changed_items,
+            "action_types": self.action_types,
+        }
+
+    @classmethod
+    def from_columns(cls, columns: dict) -> "ActionLogger":
+        """ Log of actions stored by to_columns
+
+        :param columns: typed arrays and lists of stored values
+        :type columns: dict
+        :return: log for reading, tax totals are not restored
+        :rtype: ActionLogger
+        """
+        logger = cls()
+        for name, values in columns.items():
+            setattr(logger, name, values)
+        logger.transaction_dicts = list(logger.transactions)
+        logger.changed_item_index = {item: i for i, item in enumerate(logger.changed_items)}
+        logger.action_type_index = {action_type: i for i, action_type in enumerate(logger.action_types)}
+        logger.transaction_index = {id(t): i for i, t in enumerate(logger.transactions)}
+        return logger
+
+    def to_dataframe(self):
+        """ Build a table of all actions
+
+        :return: one row per action
+        :rtype: pd.DataFrame
+        """
+        # pandas is only needed for results
+        import numpy as np
+        import pandas as pd
+
+        transaction_data = pd.DataFrame(
+            self.transaction_data(),
+            columns=TRANSACTION_COLUMNS,
+        )
+        data = transaction_data.iloc[np.asarray(self.transaction_ids, dtype=np.int64)].reset_index(drop=True)
+        epoch = date(1970, 1, 1).toordinal()
+        data["date"] = (np.asarray(self.dates, dtype=np.int64) - epoch).astype("datetime64[D]")
+        data["action_type"] = np.asarray(self.action_types, dtype=object)[np.asarray(self.action_type_ids, dtype=np.int64)]
+        data["amount"] = np.asarray(self.amounts, dtype=np.int64) / 100.0
+        data["changed_item"] = np.asarray(self.changed_items, dtype=object)[np.asarray(self.changed_item_ids, dtype=np.int64)]
+        return data
+
+    def flatten_logs(self) -> list:
+        """ All actions as dictionaries in order
+
+        :return: dictionary per action
+        :rtype: list
+        """
+        transaction_data = self.transaction_data()
+        flat_list = []
+        for position in range(len(self.amounts)):
+            dict_data = transaction_data[self.transaction_ids[position]].copy()
+            dict_data.update({
+                "date": date.fromordinal(self.dates[position]),
+                "action_type": self.action_types[self.action_type_ids[position]],
+                "amount": from_cents(self.amounts[position]),
+                "changed_item": self.changed_items[self.changed_item_ids[position]],
+            })
+            flat_list.append(dict_data)
+        return flat_list
+
+    def row_columns(self) -> dict:
+        """ All actions as one list per output column
+
+        :return: values of each column in order, columns in the
+            order of flatten_logs
+        :rtype: dict
+        """
+        transaction_data = self.transaction_data()
+        columns = {}
+        for column in TRANSACTION_COLUMNS:
+            values = [t[column] for t in transaction_data]
+            columns[column] = [values[i] for i in self.transaction_ids]
+        columns["date"] = [date.fromordinal(d) for d in self.dates]
+        columns["action_type"] = [self.action_types[i] for i in self.action_type_ids]
+        columns["amount"] = [from_cents(a) for a in self.amounts]
+        columns["changed_item"] = [self.changed_items[i] for i in self.changed_item_ids]
+        return columns
+
+    def pop_columns(self) -> dict:
+        """ Remove all actions from the log as columns
+
+        :return: values of each column, see row_columns
+        :rtype: dict
+
+        Interned transactions are kept so later actions can refer
+        to them, tax totals are not affected.
+        """
+        columns = self.row_columns()
+        self.popped_count += len(self.amounts)
+        for column in [self.dates, self.amounts, self.transaction_ids, self.changed_item_ids, self.action_type_ids]:
+            del column[:]
+        return columns
+
+    def extend(self, other: "ActionLogger", stop: int = None):
+        """ Append the actions of another log
 
-class ActionLog(BaseModel):
-    date: date
-    action_type: str
-    amount: Decimal
-    changed_item: str
-    transaction: Transaction
-
-    def to_dict(self) -> dict:
-        dict_data = self.transaction.to_dict()
-        dict_data.update({
-            "date": self.date,
-            "action_type": self.action_type,
-            "amount": self.amount,
-            "changed_item": self.changed_item,
-        })
-        return dict_data
\ No newline at end of file
+        :param other: log to copy actions from
+        :type other: ActionLogger
+        :param stop: number of the other log's actions to copy, default all
+        :type stop: int
+        """
+        if stop is None:
+            stop = len(other)
+        for position in range(stop):
+            transaction = other.transactions[other.transaction_ids[position]]
+            self.dates.append(other.dates[position])
+            self.amounts.append(other.amounts[position])
+            self.transaction_ids.append(self._intern(transaction, self.transactions, self.transaction_index, id(transaction)))
+            self.changed_item_ids.append(self._intern(other.changed_items[other.changed_item_ids[position]], self.changed_items, self.changed_item_index))
+            self.action_type_ids.append(self._intern(other.action_types[other.action_type_ids[position]], self.action_types, self.action_type_index))
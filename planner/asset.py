@@ -1,42 +1,180 @@
 from decimal import Decimal
 from datetime import date
+from typing import Any
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field, model_serializer
 
 from planner.common import (
     ZERO, 
     round, 
+    to_cents,
+    from_cents,
     InsufficientBalanceException,
 )
 from planner.transaction import Transaction
-from planner.action_log import ActionLog
+from planner.ledger import AssetLedger
 
 class PrematureWithdrawalException(Exception):
     pass
 
 class Asset(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
     name: str
     balance: Decimal = ZERO
-    f_balance: float = 0.0
     allow_negative_balance: bool = False
     min_withdrawal_date: date = None
     min_earnings_date: date = None
     category: str = None
-    contribution_balance: float = None
+    # Configured as contribution_balance, which is the running value
+    initial_contribution_balance: float = Field(None, alias="contribution_balance")
+    cents_ledger: bool = False # Private
+    ledger: Any = Field(None, exclude=True) # Private
+    ledger_index: int = None # Private
 
     def __init__(self, *args, **kwargs):
         """ Asset initialization
 
-        Because the running balance is tracked as a float
-        it is necessary to create it at initialization requiring
-        this custom initaliazation
+        Running balances are kept in a ledger, a simulation moves
+        every asset into one.  An asset used on its own gets a ledger
+        of its own on first use.
         """
         super().__init__(*args, **kwargs)
-        self.f_balance = float(kwargs.get("balance", ZERO))
         if self.category is None:
             self.category = self.name
-        if self.contribution_balance is None:
-            self.contribution_balance = self.f_balance
+        if self.initial_contribution_balance is None:
+            self.initial_contribution_balance = float(self.balance)
+
+    @model_serializer(mode="wrap")
+    def serialize(self, handler) -> dict:
+        """ Dump with the configured contribution balance under its configured name
+
+        :return: field values
+        :rtype: dict
+        """
+        return {
+            "contribution_balance" if name == "initial_contribution_balance" else name: value
+            for name, value in handler(self).items()
+        }
+
+    def ledger_balances(self) -> tuple:
+        """ Running balances to move into a ledger
+
+        :return: balance, contribution balance and their cents, the
+            configured balances before the asset has a ledger
+        :rtype: tuple
+        """
+        if self.ledger is None:
+            return float(self.balance), self.initial_contribution_balance, None, None
+        return self.f_balance, self.contribution_balance, self.cents_balance, self.contribution_cents
+
+    def own_ledger(self) -> AssetLedger:
+        """ Move the running balances into a ledger of their own
+
+        :return: new ledger
+        :rtype: AssetLedger
+        """
+        return AssetLedger([self])
+
+    def copy(self, *args, **kwargs) -> "Asset":
+        """ Copy which changes independently of the original
+
+        :return: copy with its running balances in its own ledger
+        :rtype: Asset
+        """
+        copied = super().copy(*args, **kwargs)
+        copied.own_ledger()
+        return copied
+
+    def __copy__(self) -> "Asset":
+        copied = super().__copy__()
+        copied.own_ledger()
+        return copied
+
+    @property
+    def f_balance(self) -> float:
+        """ Running balance
+
+        :return: running balance
+        :rtype: float
+        """
+        if self.ledger is None:
+            self.own_ledger()
+        return self.ledger.balances[self.ledger_index]
+
+    @f_balance.setter
+    def f_balance(self, value: float):
+        if self.ledger is None:
+            self.own_ledger()
+        self.ledger.balances[self.ledger_index] = value
+
+    @property
+    def contribution_balance(self) -> float:
+        """ Running balance of contributions, excluding earnings
+
+        :return: running contribution balance
+        :rtype: float
+        """
+        if self.ledger is None:
+            self.own_ledger()
+        return self.ledger.contributions[self.ledger_index]
+
+    @contribution_balance.setter
+    def contribution_balance(self, value: float):
+        if self.ledger is None:
+            self.own_ledger()
+        self.ledger.contributions[self.ledger_index] = value
+
+    @property
+    def cents_balance(self) -> int:
+        """ Running balance in cents
+
+        :return: running balance in cents, None without a cents ledger
+        :rtype: int
+        """
+        if not self.cents_ledger:
+            return None
+        if self.ledger is None:
+            self.own_ledger()
+        return self.ledger.cents_balances[self.ledger_index]
+
+    @cents_balance.setter
+    def cents_balance(self, value: int):
+        if self.ledger is None:
+            self.own_ledger()
+        self.ledger.cents_balances[self.ledger_index] = value or 0
+
+    @property
+    def contribution_cents(self) -> int:
+        """ Running contribution balance in cents
+
+        :return: running contribution balance in cents, None without a cents ledger
+        :rtype: int
+        """
+        if not self.cents_ledger:
+            return None
+        if self.ledger is None:
+            self.own_ledger()
+        return self.ledger.contribution_cents[self.ledger_index]
+
+    @contribution_cents.setter
+    def contribution_cents(self, value: int):
+        if self.ledger is None:
+            self.own_ledger()
+        self.ledger.contribution_cents[self.ledger_index] = value or 0
+
+    def use_cents_ledger(self):
+        """ Track balances as whole cents
+
+        Every transaction amount is rounded to cents before it is
+        applied, so balances are exactly the sum of logged actions.
+        The float balances are kept equal to the cent balances.
+        """
+        self.cents_ledger = True
+        self.cents_balance = to_cents(self.f_balance)
+        self.contribution_cents = to_cents(self.contribution_balance)
+        self.f_balance = self.cents_balance / 100
+        self.contribution_balance = self.contribution_cents / 100
 
     def get_balance(self) -> Decimal:
         """ Provide the running balance as Decimal
@@ -47,6 +185,8 @@ class Asset(BaseModel):
         The running balance is really tracked as a float
         but this allows a friendly value to be provided
         """
+        if self.cents_ledger:
+            return from_cents(self.cents_balance)
         return round(Decimal(self.f_balance))
     
     def get_state(self, date: date) -> dict:
@@ -57,12 +197,16 @@ class Asset(BaseModel):
         :return: dictionary representation of state
         :rtype: dict
         """
+        if self.cents_ledger:
+            contribution_balance = from_cents(self.contribution_cents)
+        else:
+            contribution_balance = round(Decimal(self.contribution_balance))
         return {
             "date": date,
             "name": self.name,
             "balance": str(self.get_balance()),
             "category": self.category,
-            "contribution_balance": round(Decimal(self.contribution_balance)),
+            "contribution_balance": contribution_balance,
         }
     
     def execute_transaction(self, transaction_amount: float, transaction: Transaction, deposit: bool, current_date: date) -> tuple:
@@ -76,30 +220,62 @@ class Asset(BaseModel):
         :type deposit: bool
         :param current_date: date of transaction
         :type current_date: date
-        :return: new balance of asset post transaction and log
+        :return: new balance of asset post transaction and signed change in balance
         :rtype: tuple
         """
         if deposit:
             amount = transaction_amount
         else:
-            if self.min_withdrawal_date is not None and transaction.sepp_birth is None and not transaction.min_withdrawal_date_exception:
-                if current_date < self.min_withdrawal_date:
-                    raise(PrematureWithdrawalException(f"Withdrawals not allowed for {self.name} prior to {self.min_withdrawal_date}, attempted on {current_date}"))
+            if self.min_withdrawal_date is not None:
+                self.check_withdrawal(transaction, current_date)
             amount = -1.0 * transaction_amount
-        self.f_balance += amount
-        if not transaction.asset_maturity:
-            self.contribution_balance += amount
+        # Balances are updated in the ledger arrays directly
+        if self.ledger is None:
+            self.own_ledger()
+        ledger = self.ledger
+        index = self.ledger_index
+        if self.cents_ledger:
+            cents = to_cents(amount)
+            amount = cents / 100
+            ledger.cents_balances[index] += cents
+            ledger.balances[index] = ledger.cents_balances[index] / 100
+            if not transaction.asset_maturity:
+                ledger.contribution_cents[index] += cents
+                ledger.contributions[index] = ledger.contribution_cents[index] / 100
+        else:
+            ledger.balances[index] += amount
+            if not transaction.asset_maturity:
+                ledger.contributions[index] += amount
+        f_balance = ledger.balances[index]
         if not self.allow_negative_balance:
-            if self.f_balance < 0.0:
+            if f_balance < 0.0:
                 raise(InsufficientBalanceException(f"Asset {self.name} is not allowed to have a negative balance, caused by transaction {transaction.name} on {current_date}"))
+        if self.min_earnings_date is not None:
+            self.check_earnings(transaction, current_date, ledger.contributions[index])
+        return f_balance, amount
+
+    def check_withdrawal(self, transaction: Transaction, current_date: date):
+        """ Check a withdrawal is allowed on a date
+
+        :param transaction: transaction withdrawing
+        :type transaction: Transaction
+        :param current_date: date of withdrawal
+        :type current_date: date
+        """
+        if self.min_withdrawal_date is not None and transaction.sepp_birth is None and not transaction.min_withdrawal_date_exception:
+            if current_date < self.min_withdrawal_date:
+                raise(PrematureWithdrawalException(f"Withdrawals not allowed for {self.name} prior to {self.min_withdrawal_date}, attempted on {current_date}"))
+
+    def check_earnings(self, transaction: Transaction, current_date: date, contribution_balance: float):
+        """ Check earnings are only withdrawn once allowed
+
+        :param transaction: transaction which changed the balance
+        :type transaction: Transaction
+        :param current_date: date of the change
+        :type current_date: date
+        :param contribution_balance: running contribution balance after the change
+        :type contribution_balance: float
+        """
         if self.min_earnings_date is not None and transaction.sepp_birth is None:
-            if self.contribution_balance < 0.0 and current_date < self.min_earnings_date:
+            if contribution_balance < 0.0 and current_date < self.min_earnings_date:
                 raise(PrematureWithdrawalException(f"Withdrawals of earnings not allowed for {self.name} prior to {self.min_earnings_date}, attempted on {current_date}"))
-        log = ActionLog(
-            action_type="Asset Transaction",
-            transaction=transaction,
-            amount=round(Decimal(amount)),
-            changed_item=self.name,
-            date = current_date,
-        )
-        return self.get_balance(), amount, log
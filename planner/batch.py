@@ -0,0 +1,197 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+from pathlib import Path
+from time import perf_counter
+import contextlib
+import io
+import os
+import re
+
+from tqdm import tqdm
+
+from planner.config_reading import read_configuration, load_configuration_file
+from planner.sinks import OutputFormatEnum, SINKS, DEFAULT_CHUNK_SIZE
+from planner.sweep import summarize_run
+
+# Household ids name partition directories
+HOUSEHOLD_ID_PATTERN = re.compile(r"^[A-Za-z0-9_.-]+$")
+HOUSEHOLD_TABLES = ["asset_states", "actions", "federal_taxes", "state_taxes"]
+
+def read_manifest(manifest_path: Path) -> list:
+    """ Read the households of a batch manifest
+
+    :param manifest_path: YAML manifest
+    :type manifest_path: Path
+    :return: dictionary per household of id, configuration paths,
+        list path, start and end
+    :rtype: list
+
+    Example manifest, paths are relative to the manifest::
+
+        households:
+            - id: smith
+              list: smith/list.yml
+            - id: jones
+              configs: [jones/assets.yml, jones/transactions.yml]
+              end: 2060-01-01
+    """
+    manifest_path = Path(manifest_path)
+    manifest = load_configuration_file(manifest_path)
+    households = []
+    ids = set()
+    for entry in manifest.get("households", []):
+        household_id = str(entry.get("id", ""))
+        if HOUSEHOLD_ID_PATTERN.match(household_id) is None:
+            raise(ValueError(f"Household id {household_id!r} must be letters, digits, '_', '.' or '-'"))
+        if household_id in ids:
+            raise(ValueError(f"Household id {household_id} is in the manifest more than once"))
+        ids.add(household_id)
+        if entry.get("list") is None and len(entry.get("configs", [])) == 0:
+            raise(ValueError(f"Household {household_id} needs either a list file or configs"))
+        households.append({
+            "id": household_id,
+            "configs": [manifest_path.parent / p for p in entry.get("configs", [])],
+            "list": None if entry.get("list") is None else manifest_path.parent / entry["list"],
+            "start": entry.get("start"),
+            "end": entry.get("end"),
+        })
+    return households
+
+def household_partition(output_directory: Path, table: str, household_id: str, output_format: OutputFormatEnum) -> Path:
+    """ File of one household's rows of a table
+
+    :param output_directory: directory of the batch dataset
+    :type output_directory: Path
+    :param table: one of HOUSEHOLD_TABLES
+    :type table: str
+    :param household_id: household id
+    :type household_id: str
+    :param output_format: format of the file
+    :type output_format: OutputFormatEnum
+    :return: path in a household=<id> partition directory
+    :rtype: Path
+
+    The household=<id> directories are Hive style partitions, so
+    each table reads back as one dataset keyed by household.
+    """
+    return Path(output_directory) / table / f"household={household_id}" / f"part-0.{OutputFormatEnum(output_format)}"
+
+def _partition_sink(output_directory: Path, table: str, household_id: str, output_format: OutputFormatEnum, chunk_size: int):
+    path = household_partition(output_directory, table, household_id, output_format)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return SINKS[OutputFormatEnum(output_format)](path, chunk_size=chunk_size)
+
+def household_summary(household_id: str) -> dict:
+    """ Summary of a household before it has run
+
+    :param household_id: household id
+    :type household_id: str
+    :return: household id with empty timing, error and run summary
+    :rtype: dict
+    """
+    return {
+        "household": household_id,
+        "seconds": None,
+        "days": None,
+        "error": None,
+        "final_net_worth": None,
+        "first_failure_date": None,
+        "failure": None,
+        "lifetime_taxes": None,
+    }
+
+def run_household(household: dict, output_directory: Path, output_format: OutputFormatEnum = OutputFormatEnum.csv, chunk_size: int = DEFAULT_CHUNK_SIZE, start: date = None, end: date = None) -> dict:
+    """ Run one household's plan and write its partitions
+
+    :param household: household from read_manifest
+    :type household: dict
+    :param output_directory: directory of the batch dataset
+    :type output_directory: Path
+    :param output_format: format of the partition files
+    :type output_format: OutputFormatEnum
+    :param chunk_size: number of rows buffered before writing
+    :type chunk_size: int
+    :param start: start date when the household has none, default today
+    :type start: date
+    :param end: end date when the household has none, default 20 years
+    :type end: date
+    :return: household id, seconds, error and run summary
+    :rtype: dict
+
+    Any exception is reported in the summary instead of raised, so
+    one bad plan does not stop the batch.
+    """
+    from planner.simulation import Simulation
+    started = perf_counter()
+    row = household_summary(household["id"])
+    # Partitions of an earlier run would be mixed with this run's
+    for table in HOUSEHOLD_TABLES:
+        household_partition(output_directory, table, household["id"], output_format).unlink(missing_ok=True)
+    try:
+        configuration = read_configuration(
+            household["configs"],
+            household["list"],
+            household["start"] or start,
+            household["end"] or end,
+        )
+        with contextlib.redirect_stdout(io.StringIO()):
+            simulation = Simulation(**configuration)
+            with _partition_sink(output_directory, "asset_states", household["id"], output_format, chunk_size) as state_sink, \
+                 _partition_sink(output_directory, "actions", household["id"], output_format, chunk_size) as action_sink:
+                days, _, _, fed_tax_data, state_tax_data, error_raised = simulation.run(
+                    update_func=lambda generator: generator,
+                    state_sink=state_sink,
+                    action_sink=action_sink,
+                )
+        for table, tax_data in [("federal_taxes", fed_tax_data), ("state_taxes", state_tax_data)]:
+            if tax_data is not None and len(tax_data) > 0:
+                with _partition_sink(output_directory, table, household["id"], output_format, chunk_size) as tax_sink:
+                    tax_sink.write(tax_data)
+        row["days"] = days
+        row.update(summarize_run(simulation, days, fed_tax_data, state_tax_data, error_raised))
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+    row["seconds"] = perf_counter() - started
+    return row
+
+def run_batch(households: list, output_directory: Path, output_format: OutputFormatEnum = OutputFormatEnum.csv, workers: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE, start: date = None, end: date = None) -> list:
+    """ Run many households' plans in parallel
+
+    :param households: households from read_manifest
+    :type households: list
+    :param output_directory: directory of the batch dataset
+    :type output_directory: Path
+    :param output_format: format of the partition files
+    :type output_format: OutputFormatEnum
+    :param workers: number of worker processes, default every core
+    :type workers: int
+    :param chunk_size: number of rows buffered before writing
+    :type chunk_size: int
+    :param start: start date for households without one
+    :type start: date
+    :param end: end date for households without one
+    :type end: date
+    :return: summary per household in manifest order, see run_household
+    :rtype: list
+
+    At most workers plans run at once.  Each worker reads its own
+    configuration and writes its own partitions, so only summaries
+    are passed between processes.
+    """
+    if workers is None:
+        workers = os.cpu_count()
+    rows = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(run_household, household, output_directory, output_format, chunk_size, start, end): household["id"]
+            for household in households
+        }
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Running households..."):
+            try:
+                rows[futures[future]] = future.result()
+            except Exception as e:
+                # Worker process died rather than the plan failing
+                row = household_summary(futures[future])
+                row["error"] = f"{type(e).__name__}: {e}"
+                rows[futures[future]] = row
+    return [rows[household["id"]] for household in households]
@@ -0,0 +1,187 @@
+from datetime import date
+import pickle
+
+from planner.transaction import Transaction, sepp_payments
+from planner.income_taxes import YearSummary
+
+def _date_ordinal(value: date) -> int:
+    if value is None:
+        return None
+    return value.toordinal()
+
+def _ordinal_date(value: int) -> date:
+    if value is None:
+        return None
+    return date.fromordinal(value)
+
+def _transaction_state(transaction: Transaction) -> tuple:
+    """ Mutable state of a transaction
+
+    :param transaction: transaction to capture
+    :type transaction: Transaction
+    :return: name, period counter, last executed and present value date ordinals
+    :rtype: tuple
+    """
+    return (
+        transaction.name,
+        transaction.period_counter,
+        _date_ordinal(transaction.last_executed),
+        _date_ordinal(transaction.value_date),
+    )
+
+def _restore_transaction(transaction: Transaction, state: tuple):
+    """ Restore state captured by _transaction_state
+
+    :param transaction: transaction to restore
+    :type transaction: Transaction
+    :param state: captured state
+    :type state: tuple
+    """
+    name, period_counter, last_executed, value_date = state
+    if transaction.name != name:
+        raise(ValueError(f"Checkpoint transaction {name} does not match simulation transaction {transaction.name}"))
+    transaction.period_counter = period_counter
+    transaction.last_executed = _ordinal_date(last_executed)
+    # Only maturity moves the present value date, otherwise it comes
+    # from the configuration which may differ in a branched run
+    if transaction.asset_maturity:
+        transaction.value_date = _ordinal_date(value_date)
+
+class SimulationCheckpoint:
+    """ Mutable state of a simulation at the end of a date
+
+    Everything is kept as plain numbers, strings and tuples so
+    checkpoints pickle quickly and compactly between processes.
+    Restoring into a Simulation built from the same configuration,
+    or one differing only after the checkpoint date, continues the
+    run exactly where it left off.
+    """
+
+    def __init__(self, current_date: int, assets: dict, transactions: list, mortgages: list, sepp: dict, tax_summaries: tuple, tax_totals: dict, mortgage_interest: float, action_count: int = 0):
+        """ Store captured state, see capture
+
+        :param current_date: ordinal of the last simulated date
+        :type current_date: int
+        :param assets: asset name to balances
+        :type assets: dict
+        :param transactions: transaction and donation transaction states in order
+        :type transactions: list
+        :param mortgages: mortgage states in order
+        :type mortgages: list
+        :param sepp: SEPP payments keyed by transaction name
+        :type sepp: dict
+        :param tax_summaries: federal and state yearly summary dictionaries
+        :type tax_summaries: tuple
+        :param tax_totals: yearly tax totals state
+        :type tax_totals: dict
+        :param mortgage_interest: mortgage interest paid so far this year
+        :type mortgage_interest: float
+        :param action_count: number of actions logged before the checkpoint
+        :type action_count: int
+        """
+        self.current_date = current_date
+        self.assets = assets
+        self.transactions = transactions
+        self.mortgages = mortgages
+        self.sepp = sepp
+        self.tax_summaries = tax_summaries
+        self.tax_totals = tax_totals
+        self.mortgage_interest = mortgage_interest
+        self.action_count = action_count
+
+    @property
+    def date(self) -> date:
+        """ Last simulated date
+
+        :return: date the checkpoint was captured at the end of
+        :rtype: date
+        """
+        return date.fromordinal(self.current_date)
+
+    @classmethod
+    def capture(cls, simulation, current_date: date, mortgage_interest: float, tax_totals: dict, action_count: int = 0) -> "SimulationCheckpoint":
+        """ Capture the state of a running simulation
+
+        :param simulation: simulation being run
+        :type simulation: Simulation
+        :param current_date: last simulated date
+        :type current_date: date
+        :param mortgage_interest: mortgage interest paid so far this year
+        :type mortgage_interest: float
+        :param tax_totals: yearly tax totals state
+        :type tax_totals: dict
+        :param action_count: number of actions logged before the checkpoint
+        :type action_count: int
+        :return: checkpoint
+        :rtype: SimulationCheckpoint
+        """
+        transactions = []
+        for transaction in simulation.transactions:
+            donation_state = None
+            if transaction.donation_transaction is not None:
+                donation_state = _transaction_state(transaction.donation_transaction)
+            transactions.append((_transaction_state(transaction), donation_state))
+        tax_summaries = tuple(
+            None if calculator is None else [s.dict() for s in calculator.summaries]
+            for calculator in [simulation.federal_income_taxes, simulation.state_income_taxes]
+        )
+        return cls(
+            current_date.toordinal(),
+            {
+                a.name: (a.f_balance, a.contribution_balance, a.cents_balance, a.contribution_cents)
+                for a in simulation.assets
+            },
+            transactions,
+            [_transaction_state(m) for m in simulation.mortgages],
+            dict(sepp_payments),
+            tax_summaries,
+            tax_totals,
+            mortgage_interest,
+            action_count,
+        )
+
+    def restore(self, simulation):
+        """ Put captured state into a simulation
+
+        :param simulation: simulation to continue, already set up
+        :type simulation: Simulation
+        """
+        if len(simulation.transactions) != len(self.transactions):
+            raise(ValueError(f"Checkpoint has {len(self.transactions)} transactions, simulation has {len(simulation.transactions)}"))
+        if len(simulation.mortgages) != len(self.mortgages):
+            raise(ValueError(f"Checkpoint has {len(self.mortgages)} mortgages, simulation has {len(simulation.mortgages)}"))
+        for asset in simulation.assets:
+            try:
+                asset.f_balance, asset.contribution_balance, asset.cents_balance, asset.contribution_cents = self.assets[asset.name]
+            except KeyError:
+                raise(ValueError(f"Asset {asset.name} is not in checkpoint"))
+        for transaction, (state, donation_state) in zip(simulation.transactions, self.transactions):
+            _restore_transaction(transaction, state)
+            if donation_state is not None:
+                _restore_transaction(transaction.donation_transaction, donation_state)
+        for mortgage, state in zip(simulation.mortgages, self.mortgages):
+            _restore_transaction(mortgage, state)
+        sepp_payments.clear()
+        sepp_payments.update(self.sepp)
+        for calculator, summaries in zip([simulation.federal_income_taxes, simulation.state_income_taxes], self.tax_summaries):
+            if calculator is not None and summaries is not None:
+                calculator.summaries = [YearSummary(**s) for s in summaries]
+
+    def to_bytes(self) -> bytes:
+        """ Serialize checkpoint
+
+        :return: pickled state
+        :rtype: bytes
+        """
+        return pickle.dumps(self.__dict__, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SimulationCheckpoint":
+        """ Deserialize checkpoint made by to_bytes
+
+        :param data: pickled state
+        :type data: bytes
+        :return: checkpoint
+        :rtype: SimulationCheckpoint
+        """
+        return cls(**pickle.loads(data))
@@ -1,6 +1,9 @@
 from decimal import Decimal
+import builtins
 import math
-from datetime import date
+from array import array
+from datetime import date, timedelta
+from calendar import monthrange, isleap
 
 from pydantic import BaseModel
 
@@ -74,6 +77,30 @@ def round(value: Decimal) -> Decimal:
     """
     return value.quantize(ZERO)
 
+def to_cents(amount: float) -> int:
+    """ Round an amount to a whole number of cents
+
+    :param amount: amount in dollars
+    :type amount: float
+    :return: amount in cents
+    :rtype: int
+
+    Same result as rounding Decimal(amount) to 2 places, round
+    with digits rounds the exact value of the float half to even.
+    """
+    # Built in round, this module's round is for Decimal
+    return builtins.round(builtins.round(amount, 2) * 100)
+
+def from_cents(cents: int) -> Decimal:
+    """ Convert whole cents to a 2 decimal place Decimal
+
+    :param cents: amount in cents
+    :type cents: int
+    :return: amount in dollars
+    :rtype: Decimal
+    """
+    return Decimal(cents).scaleb(-2)
+
 def future_value(present_value: float, interest: float, periods: int) -> float:
     """ Future value calculation
 
@@ -97,3 +124,84 @@ def amortorize(period_rate: float, periods: float, amount: float) -> float:
     denominator = term_exponential - 1
     return amount * (numerator / denominator)
 
+
+def next_day_of_month(current_date: date, day: int, last_date: date) -> date:
+    """ Find the next date falling on a given day of the month
+
+    :param current_date: earliest acceptable date
+    :type current_date: date
+    :param day: day of the month
+    :type day: int
+    :param last_date: latest acceptable date
+    :type last_date: date
+    :return: first matching date on or after current_date, None if after last_date
+
+    Months without the day (e.g. the 31st) are skipped
+    """
+    year = current_date.year
+    month = current_date.month
+    if current_date.day > day:
+        month += 1
+    while True:
+        if month > 12:
+            month = 1
+            year += 1
+        if date(year, month, 1) > last_date:
+            return None
+        if day <= monthrange(year, month)[1]:
+            return date(year, month, day)
+        month += 1
+
+def next_day_of_year(current_date: date, month: int, day: int, last_date: date) -> date:
+    """ Find the next date falling on a given month and day
+
+    :param current_date: earliest acceptable date
+    :type current_date: date
+    :param month: month of the year
+    :type month: int
+    :param day: day of the month
+    :type day: int
+    :param last_date: latest acceptable date
+    :type last_date: date
+    :return: first matching date on or after current_date, None if after last_date
+
+    February 29th only matches on leap years
+    """
+    year = current_date.year
+    if (current_date.month, current_date.day) > (month, day):
+        year += 1
+    while year <= last_date.year:
+        if month != 2 or day != 29 or isleap(year):
+            return date(year, month, day)
+        year += 1
+    return None
+
+def boundary_tables(first_date: date, last_date: date) -> tuple:
+    """ Month end and year end day ordinals within a span
+
+    :param first_date: first date of the span
+    :type first_date: date
+    :param last_date: last date of the span
+    :type last_date: date
+    :return: ascending month end ordinals, set of year end ordinals
+    :rtype: tuple
+    """
+    month_ends = array("i")
+    year_ends = set()
+    month_end = end_of_month(first_date)
+    while month_end <= last_date:
+        month_ends.append(month_end.toordinal())
+        if month_end.month == 12:
+            year_ends.add(month_end.toordinal())
+        month_end = end_of_month(month_end + timedelta(days=1))
+    return month_ends, year_ends
+
+def end_of_month(current_date: date) -> date:
+    """ Last day of the month of a date
+
+    :param current_date: date within the month
+    :type current_date: date
+    :return: last date of the month
+    :rtype: date
+    """
+    return date(current_date.year, current_date.month, monthrange(current_date.year, current_date.month)[1])
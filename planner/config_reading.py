@@ -1,9 +1,138 @@
+from collections import OrderedDict
 from pathlib import Path
 from dateutil.relativedelta import relativedelta
+import copy
 import datetime
+import hashlib
+import os
+import pickle
 
 import yaml
 
+# libyaml C loader when available, several times faster
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+FRAGMENT_SUFFIX = ".fragment"
+MAX_PARSED_FRAGMENTS = 256
+MAX_VALIDATED_SIMULATIONS = 8
+
+# Parsed files by resolved path: (modified time, size, sha256, data)
+_parsed_fragments = OrderedDict()
+
+# Validated simulations by configuration key
+_validated_simulations = OrderedDict()
+
+def _remember(cache: OrderedDict, key: str, value, max_entries: int):
+    """ Keep a value, dropping the least recently used beyond max_entries
+
+    :param cache: in memory cache, most recently used last
+    :type cache: OrderedDict
+    :param key: cache key
+    :type key: str
+    :param value: value to keep
+    :param max_entries: largest number of values kept
+    :type max_entries: int
+    """
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > max_entries:
+        cache.popitem(last=False)
+
+def _recall(cache: OrderedDict, key: str):
+    """ Value kept by _remember, marked as recently used
+
+    :param cache: in memory cache, most recently used last
+    :type cache: OrderedDict
+    :param key: cache key
+    :type key: str
+    :return: kept value, None if not kept
+    """
+    try:
+        cache.move_to_end(key)
+    except KeyError:
+        return None
+    return cache[key]
+
+def load_yaml(text: str):
+    """ Parse YAML text with the fastest available safe loader
+
+    :param text: YAML text
+    :type text: str
+    :return: parsed data
+    """
+    return yaml.load(text, Loader=SafeLoader)
+
+def _fragment_cache_path(cache_directory: Path, key: str) -> Path:
+    return Path(cache_directory) / f"{hashlib.sha256(key.encode()).hexdigest()}{FRAGMENT_SUFFIX}"
+
+def _store_fragment(key: str, entry: tuple, cache_directory: Path):
+    _remember(_parsed_fragments, key, entry, MAX_PARSED_FRAGMENTS)
+    if cache_directory is not None:
+        # Fragments share the size limit of the result cache
+        from planner.result_cache import ResultCache
+        cache = ResultCache(cache_directory)
+        path = _fragment_cache_path(cache_directory, key)
+        path.write_bytes(pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL))
+        cache.evict(keep=path)
+
+def load_configuration_file(path: Path, cache_directory: Path = None):
+    """ Parse a YAML file, reusing the last parse if it has not changed
+
+    :param path: YAML file path
+    :type path: Path
+    :param cache_directory: directory keeping parses between runs, default memory only
+    :type cache_directory: Path
+    :return: parsed data, a copy safe to modify
+
+    A file with the same modified time and size is not read again.
+    Otherwise it is only parsed again if its contents hash differs.
+    """
+    key = str(Path(path).resolve())
+    stat = Path(path).stat()
+    entry = _recall(_parsed_fragments, key)
+    if entry is None and cache_directory is not None:
+        fragment_path = _fragment_cache_path(cache_directory, key)
+        try:
+            entry = pickle.loads(fragment_path.read_bytes())
+        except (FileNotFoundError, pickle.UnpicklingError, EOFError):
+            entry = None
+        if entry is not None:
+            # Marked as used for eviction
+            os.utime(fragment_path)
+            _remember(_parsed_fragments, key, entry, MAX_PARSED_FRAGMENTS)
+    if entry is not None and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+        return copy.deepcopy(entry[3])
+    contents = Path(path).read_bytes()
+    digest = hashlib.sha256(contents).hexdigest()
+    if entry is not None and entry[2] == digest:
+        data = entry[3]
+    else:
+        data = load_yaml(contents)
+    _store_fragment(key, (stat.st_mtime_ns, stat.st_size, digest, data), cache_directory)
+    return copy.deepcopy(data)
+
+def read_rate_schedules(configuration: dict, directory: Path) -> dict:
+    """ Replace interest rate schedule files with the rates they hold
+
+    :param configuration: configuration read from a file
+    :type configuration: dict
+    :param directory: directory schedule files are relative to
+    :type directory: Path
+    :return: the same configuration
+
+    Reading the rates into the configuration lets result caches see
+    edits to a schedule file.
+    """
+    from planner.interest_rate import read_rate_schedule
+    for interest_rate in configuration.get("interest_rates", None) or []:
+        schedule_file = interest_rate.pop("schedule_file", None)
+        if schedule_file is not None:
+            interest_rate["schedule"] = read_rate_schedule(
+                Path(directory) / schedule_file,
+                interest_rate.get("schedule_column", None),
+            )
+    return configuration
+
 def combine_configs(config_list: list) -> dict:
     """ Combines multiple potentially subset dicts to a single
 
@@ -48,11 +177,11 @@ def combine_configs(config_list: list) -> dict:
                 pass
     return skeleton
 
-def read_configuration(configuration_paths: list, list_path: Path, start: datetime.date = None, end: datetime.date = None):
+def read_configuration(configuration_paths: list, list_path: Path, start: datetime.date = None, end: datetime.date = None, cache_directory: Path = None):
     if list_path is not None:
-        configuration_paths = [list_path.parent / p for p in yaml.safe_load(list_path.read_text())]
+        configuration_paths = [list_path.parent / p for p in load_configuration_file(list_path, cache_directory)]
     configurations = [
-        yaml.safe_load(p.read_text()) for p in configuration_paths
+        read_rate_schedules(load_configuration_file(p, cache_directory), Path(p).parent) for p in configuration_paths
     ]
     configuration = combine_configs(configurations)
     if start is None:
@@ -63,4 +192,25 @@ def read_configuration(configuration_paths: list, list_path: Path, start: dateti
         end = datetime.datetime.today().date() + relativedelta(years=20)
     else:
         configuration["end"] = end
-    return configuration
\ No newline at end of file
+    return configuration
+
+def load_simulation(configuration: dict):
+    """ Validated Simulation for a combined configuration
+
+    :param configuration: combined configuration
+    :type configuration: dict
+    :return: simulation ready to run
+    :rtype: Simulation
+
+    The most recently used validated simulations are kept in memory
+    only and copied out, on disk caches hold configurations and results.
+    """
+    from planner.simulation import Simulation
+    from planner.result_cache import configuration_key
+    key = configuration_key(configuration, "simulation")
+    simulation = _recall(_validated_simulations, key)
+    if simulation is None:
+        simulation = Simulation(**configuration)
+        _remember(_validated_simulations, key, simulation, MAX_VALIDATED_SIMULATIONS)
+    # Runs change the simulation so the kept one is never handed out
+    return copy.deepcopy(simulation)
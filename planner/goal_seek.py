@@ -0,0 +1,203 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal
+import contextlib
+import io
+import os
+
+from pydantic import TypeAdapter
+from tqdm import tqdm
+
+from planner.simulation import Simulation
+from planner.asset import PrematureWithdrawalException
+from planner.incremental import IncrementalRunner
+from planner.sweep import expand_grid, apply_overrides, find_named
+
+# Doubling steps tried when looking for an amount which fails
+MAX_BRACKET_STEPS = 60
+
+# Reads configured dates as Simulation does, from dates or strings
+DATE_ADAPTER = TypeAdapter(date)
+
+class GoalSeeker:
+    """ Search one configuration value for the limit of a successful run
+
+    A target is a sweep override key: ``transactions.<name>.amount``
+    for the largest amount a plan can afford, or ``dates.<name>`` for
+    the earliest date, such as a retirement date, it can afford.  A
+    run succeeds when it reaches the end without insufficient funds
+    or withdrawing from an asset before its min_withdrawal_date.
+    Success is assumed to be monotonic, a smaller amount or a later
+    date than a successful one also succeeds.
+
+    The configuration is run once with month end checkpoints, each
+    probe then only simulates from the last checkpoint before the
+    first date the target changes.
+    """
+
+    def __init__(self, configuration: dict, target: str):
+        """ Run the configuration as given
+
+        :param configuration: combined configuration
+        :type configuration: dict
+        :param target: override key of the value searched
+        :type target: str
+        """
+        parts = target.split(".")
+        if not ((len(parts) == 3 and parts[0] == "transactions" and parts[2] == "amount") or (len(parts) == 2 and parts[0] == "dates")):
+            raise(ValueError(f"Goal seek target {target} must be transactions.<name>.amount or dates.<name>"))
+        if parts[0] == "transactions" and len(find_named(configuration["transactions"], parts[1])) == 0:
+            raise(ValueError(f"Goal seek target {target} does not match any transaction"))
+        if parts[0] == "dates" and parts[1] not in configuration.get("dates", {}):
+            raise(ValueError(f"Goal seek target {target} does not match any date"))
+        self.target = target
+        # Probes only need to know whether the run succeeded
+        self.configuration = dict(configuration, log_actions=False)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.runner = IncrementalRunner(self.configuration, update_func=lambda generator: generator)
+        self.start = DATE_ADAPTER.validate_python(self.configuration["start"])
+        self.end = DATE_ADAPTER.validate_python(self.configuration["end"])
+        self.probes = 0
+
+    def succeeds(self, value) -> bool:
+        """ Whether the plan succeeds with the target set to a value
+
+        :param value: amount or date
+        :return: True if the run ends without insufficient funds or
+            a premature withdrawal
+        :rtype: bool
+        """
+        self.probes += 1
+        with contextlib.redirect_stdout(io.StringIO()):
+            edited = Simulation(**apply_overrides(self.configuration, {self.target: value}))
+            try:
+                error_raised = self.runner.run(edited)[-1]
+            except PrematureWithdrawalException:
+                # Larger amounts can reach into an account still locked
+                return False
+        return error_raised is None
+
+    def max_amount(self, low: Decimal = Decimal("0.00"), high: Decimal = None, tolerance: Decimal = Decimal("0.01")) -> Decimal:
+        """ Largest transaction amount the plan affords
+
+        :param low: smallest amount considered
+        :type low: Decimal
+        :param high: amount known to fail, default found by doubling
+        :type high: Decimal
+        :param tolerance: precision of the result
+        :type tolerance: Decimal
+        :return: largest successful amount within tolerance, None if low fails
+        :rtype: Decimal
+        """
+        # Searched in whole steps of the tolerance
+        tolerance = Decimal(tolerance)
+        low_steps = int(Decimal(low) / tolerance)
+        if not self.succeeds(low_steps * tolerance):
+            return None
+        if high is None:
+            current = Decimal(str(find_named(self.configuration["transactions"], self.target.split(".")[1])[0].get("amount", 0)))
+            high_steps = max(int(current / tolerance), low_steps + 1)
+            for _ in range(MAX_BRACKET_STEPS):
+                if not self.succeeds(high_steps * tolerance):
+                    break
+                low_steps = high_steps
+                high_steps *= 2
+            else:
+                raise(ValueError(f"No failing amount found for {self.target} up to {high_steps * tolerance}"))
+        else:
+            high_steps = int(Decimal(high) / tolerance)
+        while high_steps - low_steps > 1:
+            middle = (low_steps + high_steps) // 2
+            if self.succeeds(middle * tolerance):
+                low_steps = middle
+            else:
+                high_steps = middle
+        return low_steps * tolerance
+
+    def earliest_date(self, earliest: date = None, latest: date = None) -> date:
+        """ Earliest date the plan affords
+
+        :param earliest: earliest date considered, default the simulation start
+        :type earliest: date
+        :param latest: latest date considered, default the day before the simulation end
+        :type latest: date
+        :return: earliest successful date, None if the latest date fails
+        :rtype: date
+        """
+        if earliest is None:
+            earliest = self.start
+        if latest is None:
+            latest = self.end - timedelta(days=1)
+        if not self.succeeds(latest):
+            return None
+        if self.succeeds(earliest):
+            return earliest
+        low = earliest.toordinal()
+        high = latest.toordinal()
+        while high - low > 1:
+            middle = (low + high) // 2
+            if self.succeeds(date.fromordinal(middle)):
+                high = middle
+            else:
+                low = middle
+        return date.fromordinal(high)
+
+    def seek(self, **kwargs):
+        """ Limit of the target, see max_amount and earliest_date
+
+        :return: largest amount or earliest date, None if there is none
+        """
+        if self.target.startswith("dates."):
+            return self.earliest_date(**kwargs)
+        return self.max_amount(**kwargs)
+
+def seek_variation(arguments: tuple) -> dict:
+    """ Goal seek one variation of a configuration
+
+    :param arguments: configuration, target and seek keyword arguments
+    :type arguments: tuple
+    :return: value found, number of probes and any error
+    :rtype: dict
+    """
+    configuration, target, seek_kwargs = arguments
+    try:
+        seeker = GoalSeeker(configuration, target)
+        return {"value": seeker.seek(**seek_kwargs), "probes": seeker.probes, "error": None}
+    except Exception as e:
+        return {"value": None, "probes": None, "error": f"{type(e).__name__}: {e}"}
+
+def run_goal_seek(configuration: dict, target: str, grid: dict = None, workers: int = None, **seek_kwargs) -> list:
+    """ Goal seek every combination of a grid of overrides in parallel
+
+    :param configuration: combined base configuration
+    :type configuration: dict
+    :param target: override key of the value searched, see GoalSeeker
+    :type target: str
+    :param grid: override values, see sweep.expand_grid, default none
+    :type grid: dict
+    :param workers: number of worker processes, default every core
+    :type workers: int
+    :return: dictionary per combination of overrides and the value found
+    :rtype: list
+
+    Each search is sequential, independent searches such as one per
+    retirement date run in separate processes.
+    """
+    variations = expand_grid(grid or {})
+    arguments = [(apply_overrides(configuration, v), target, seek_kwargs) for v in variations]
+    if workers is None:
+        workers = os.cpu_count()
+    with ProcessPoolExecutor(max_workers=min(workers, len(arguments))) as executor:
+        results = list(tqdm(
+            executor.map(seek_variation, arguments),
+            total=len(arguments),
+            desc="Seeking goal for each variation...",
+        ))
+    rows = []
+    for overrides, result in zip(variations, results):
+        row = overrides.copy()
+        row[target] = result["value"]
+        row["probes"] = result["probes"]
+        row["error"] = result["error"]
+        rows.append(row)
+    return rows
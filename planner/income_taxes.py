@@ -1,3 +1,4 @@
+from bisect import bisect_left
 from decimal import Decimal
 from datetime import date
 
@@ -40,6 +41,14 @@ class YearSummary(BaseModel):
     max_rate: float
     balance_at_max_rate: Decimal
 
+class TaxYearTable(BaseModel):
+    bracket_sizes: List[float]
+    bracket_rates: List[float]
+    bracket_tops: List[float] # Cumulative income at top of each bracket
+    full_bracket_taxes: List[float] # Cumulative tax of all lower brackets
+    deductions: float
+    credits: float
+
 class IncomeTaxCaculator(InterestBaseModel):
     source: str
     deductions: List[TaxDeduction] = []
@@ -47,14 +56,19 @@ class IncomeTaxCaculator(InterestBaseModel):
     tax_brackets: List[Dict[str, float]] = TAX_BRACKETS
     summaries: List[YearSummary] = [] # Private
     relative_year: int = None # Private
+    year_tables: Dict[int, TaxYearTable] = {} # Private
 
-    def setup(self, asset_dict: dict, relative_year: int):
+    def setup(self, asset_dict: dict, relative_year: int, last_year: int = None):
         """ Setup tax source mapping
 
         :param asset_dict: dictionary of names to asset objects
         :type asset_dict: dict
         :param relative_year: year from which to grow
         :type relative_year: int
+        :param last_year: last year to build tax tables for, default none
+        :type last_year: int
+
+        Interest rates must already be linked when last_year is given.
         """
         try:
             self.source = asset_dict[self.source]
@@ -68,6 +82,10 @@ class IncomeTaxCaculator(InterestBaseModel):
             deduction.setup(relative_year)
         for credit in self.credits:
             credit.setup(relative_year)
+        self.year_tables = {}
+        if last_year is not None:
+            for year in range(relative_year, last_year + 1):
+                self.year_table(year)
 
     def get_interest_rate(self, interest_rates: dict):
         """ Need to push down interest rate assignments to subobjects
@@ -118,11 +136,94 @@ class IncomeTaxCaculator(InterestBaseModel):
                 taxed_amounts.append((100000000000.0, bracket[1]))
         return taxed_amounts
 
-    def calculate_taxes(self, action_logs: list, year: int, federal: bool, mortgage_interest: float, simulation_start: date) -> Transaction:        
+    def year_table(self, year: int) -> TaxYearTable:
+        """ Get inflated brackets, deductions and credits of a year
+
+        :param year: year of taxes
+        :type year: int
+        :return: table for the year, built once
+        :rtype: TaxYearTable
+        """
+        try:
+            return self.year_tables[year]
+        except KeyError:
+            pass
+        taxed_amounts = self.build_rates_list(year)
+        full_amounts = self.build_full_bracket_amounts(taxed_amounts)
+        bracket_tops = []
+        full_bracket_taxes = []
+        top = 0.0
+        full_taxes = 0.0
+        for (bracket_size, _), full_amount in zip(taxed_amounts, full_amounts):
+            top += bracket_size
+            bracket_tops.append(top)
+            full_bracket_taxes.append(full_taxes)
+            full_taxes += full_amount
+        table = TaxYearTable(
+            bracket_sizes=[size for size, _ in taxed_amounts],
+            bracket_rates=[rate for _, rate in taxed_amounts],
+            bracket_tops=bracket_tops,
+            full_bracket_taxes=full_bracket_taxes,
+            deductions=sum([d.get_amount(year) for d in self.deductions if d.executable(year)]),
+            credits=sum([c.get_amount(year) for c in self.credits if c.executable(year)]),
+        )
+        self.year_tables[year] = table
+        return table
+
+    def bracket_taxes(self, year: int, balance: float) -> tuple:
+        """ Taxes on income after deductions
+
+        :param year: year of taxes
+        :type year: int
+        :param balance: income after deductions
+        :type balance: float
+        :return: taxes, marginal rate and income in the marginal bracket
+        :rtype: tuple
+        """
+        table = self.year_table(year)
+        if balance <= 0.0:
+            # Nothing taxed, reported with the top rate
+            return 0.0, table.bracket_rates[-1], balance
+        bracket_index = bisect_left(table.bracket_tops, balance)
+        bracket_balance = balance - (table.bracket_tops[bracket_index] - table.bracket_sizes[bracket_index])
+        bracket_rate = table.bracket_rates[bracket_index]
+        taxes_owed = table.full_bracket_taxes[bracket_index] + bracket_balance * bracket_rate
+        return taxes_owed, bracket_rate, bracket_balance
+
+    def marginal_rate(self, year: int, balance: float) -> float:
+        """ Rate of the highest bracket reached by income
+
+        :param year: year of taxes
+        :type year: int
+        :param balance: income after deductions
+        :type balance: float
+        :return: marginal tax rate
+        :rtype: float
+        """
+        _, bracket_rate, _ = self.bracket_taxes(year, balance)
+        return bracket_rate
+
+    def extrapolation_factor(self, year: int, simulation_start: date) -> float:
+        """ Factor scaling a partly simulated first year to a full year
+
+        :param year: year of taxes
+        :type year: int
+        :param simulation_start: simulation start date
+        :type simulation_start: date
+        :return: factor, 0.0 when the whole year is simulated
+        :rtype: float
+        """
+        if year == simulation_start.year:
+            unsimulated_days = simulation_start.timetuple().tm_yday - 1
+            if unsimulated_days > 0:
+                return 365 / (365 - unsimulated_days)
+        return 0.0
+
+    def calculate_taxes(self, tax_totals, year: int, federal: bool, mortgage_interest: float, simulation_start: date) -> Transaction:        
         """Calculate taxes owed on income
 
-        :param action_logs: transactions for the year
-        :type action_logs: list
+        :param tax_totals: running yearly totals of actions
+        :type tax_totals: TaxAccumulator
         :param year: year of taxes and actions
         :type year: int
         :param federal: is federal taxes, True = Yes, False = State
@@ -130,50 +231,33 @@ class IncomeTaxCaculator(InterestBaseModel):
         :return: a transaction for taxes owed (or refunded)
         :rtype: Transaction
         """
-        taxable_income = sum([a.amount for a in action_logs if a.transaction.income_taxable and a.amount > ZERO])
-        extrapolation_factor = 0.0
-        if year == simulation_start.year:
-            unsimulated_days = simulation_start.timetuple().tm_yday - 1
-            if unsimulated_days > 0:
-                extrapolation_factor = (365 / (365 - unsimulated_days))
-                taxable_income = round(Decimal(extrapolation_factor * float(taxable_income)))
+        taxable_income = tax_totals.total(year, "income_taxable")
+        extrapolation_factor = self.extrapolation_factor(year, simulation_start)
+        if extrapolation_factor != 0.0:
+            taxable_income = round(Decimal(extrapolation_factor * float(taxable_income)))
         balance = float(taxable_income)
         if federal:
-            deductions = sum([a.amount for a in action_logs if a.transaction.fed_tax_deductable])
+            deductions = tax_totals.total(year, "fed_tax_deductable")
         else: # state
-            deductions = sum([a.amount for a in action_logs if a.transaction.state_tax_deductable])
-        if year == simulation_start.year and extrapolation_factor != 0.0:
+            deductions = tax_totals.total(year, "state_tax_deductable")
+        if extrapolation_factor != 0.0:
             deductions = round(Decimal(extrapolation_factor * float(deductions)))
-        deductions -= round(Decimal(sum([d.get_amount(year) for d in self.deductions if d.executable(year)])))
+        table = self.year_table(year)
+        deductions -= round(Decimal(table.deductions))
         # This is technically not good, losing some precision I htink
         deductions -= round(Decimal(mortgage_interest))
         balance += float(deductions)
         income_post_deductions = round(Decimal(balance))
-        taxed_amounts = self.build_rates_list(year)
-        full_amounts = self.build_full_bracket_amounts(taxed_amounts)
-        taxes_owed = 0.0
-        bracket_index = 0    
-        entering_balance = balance    
-        while balance > 0.0:
-            # Use later to capture how much money was in the highest bracket
-            entering_balance = balance
-            bracket_quantity, bracket_rate = taxed_amounts[bracket_index]
-            if balance > bracket_quantity:
-                taxes_owed += full_amounts[bracket_index]
-                balance -= bracket_quantity
-            else:
-                taxes_owed += balance * bracket_rate
-                balance -= balance
-            bracket_index += 1
+        taxes_owed, max_rate, entering_balance = self.bracket_taxes(year, balance)
         taxes_owed_pre_credits = round(Decimal(taxes_owed))
-        credit_total = sum([c.get_amount(year) for c in self.credits if c.executable(year)])
+        credit_total = table.credits
         taxes_owed -= credit_total
         # Tax payment actions have a negative amount
         # so they are added to decrease taxes owed
         if federal:
-            taxes_paid = sum([a.amount for a in action_logs if a.transaction.fed_income_tax_payment])
+            taxes_paid = tax_totals.total(year, "fed_income_tax_payment")
         else: # state
-            taxes_paid = sum([a.amount for a in action_logs if a.transaction.state_income_tax_payment])
+            taxes_paid = tax_totals.total(year, "state_income_tax_payment")
         tax_balance = taxes_owed + float(taxes_paid)
         
         
@@ -187,7 +271,7 @@ class IncomeTaxCaculator(InterestBaseModel):
             taxes_prepaid = taxes_paid,
             taxes = round(Decimal(taxes_owed)),
             tax_bill = round(Decimal(tax_balance)),
-            max_rate = taxed_amounts[bracket_index-1][1],
+            max_rate = max_rate,
             balance_at_max_rate=round(Decimal(entering_balance)),
         ))
         
@@ -0,0 +1,156 @@
+from datetime import date, timedelta
+
+from planner.simulation import Simulation
+from planner.action_log import ActionLogger
+from planner.common import end_of_month
+from planner.result_cache import ResultCache, configuration_key, pack_results, unpack_results
+
+# Run state and links which are not configuration
+TRANSACTION_STATE_FIELDS = {
+    "fire_calendar",
+    "payment",
+    "amortization",
+    "donation_transaction",
+    "raw_data",
+}
+SIMULATION_SCHEDULE_FIELDS = {
+    "transactions",
+    "mortgages",
+    "dates",
+    "end",
+    "checkpoints",
+    "interest_rates",
+}
+
+def _transaction_configuration(transaction) -> dict:
+    """ Configuration of a set up transaction or mortgage
+
+    :param transaction: transaction to describe
+    :type transaction: Transaction
+    :return: field values without run state
+    :rtype: dict
+    """
+    return transaction.dict(exclude=TRANSACTION_STATE_FIELDS)
+
+def first_affected_date(base: Simulation, edited: Simulation) -> date:
+    """ Earliest date an edit to a simulation can change results
+
+    :param base: simulation as originally configured, not yet run
+    :type base: Simulation
+    :param edited: simulation with edits, not yet run
+    :type edited: Simulation
+    :return: first date which may differ, None if nothing was edited
+    :rtype: date
+
+    An edited transaction can only change results from the earlier
+    of its old and new start dates, or the day after the earlier end
+    date when only the end moved.  Any other kind of edit affects
+    the whole simulation.
+    """
+    if base.dict(exclude=SIMULATION_SCHEDULE_FIELDS) != edited.dict(exclude=SIMULATION_SCHEDULE_FIELDS):
+        return edited.start
+    # Running balances are kept out of the models
+    if base.ledger.state() != edited.ledger.state():
+        return edited.start
+    # Setting up again after an edit repeats the default rate
+    if {i.name: i.dict() for i in base.interest_rates} != {i.name: i.dict() for i in edited.interest_rates}:
+        return edited.start
+    base_entries = base.transactions + base.mortgages
+    edited_entries = edited.transactions + edited.mortgages
+    if len(base.transactions) != len(edited.transactions) or len(base.mortgages) != len(edited.mortgages):
+        return edited.start
+    affected = []
+    if base.end != edited.end:
+        affected.append(min(base.end, edited.end))
+    for base_entry, edited_entry in zip(base_entries, edited_entries):
+        if base_entry.name != edited_entry.name:
+            return edited.start
+        base_configuration = _transaction_configuration(base_entry)
+        edited_configuration = _transaction_configuration(edited_entry)
+        if base_configuration == edited_configuration:
+            continue
+        base_configuration["end_date"] = edited_configuration["end_date"]
+        if base_configuration == edited_configuration:
+            affected.append(min(base_entry.end_date, edited_entry.end_date) + timedelta(days=1))
+        else:
+            affected.append(min(base_entry.start_date, edited_entry.start_date))
+    if len(affected) == 0:
+        return None
+    return max(min(affected), edited.start)
+
+class IncrementalRunner:
+    """ Re-run edited simulations from the first affected date
+
+    The configuration is run once, saving a checkpoint at every
+    month end.  An edited simulation continues from the last
+    checkpoint before its first affected date and the results are
+    joined onto the original run's results before that checkpoint.
+    """
+
+    def __init__(self, configuration: dict, update_func = None, cache: ResultCache = None):
+        """ Run the original configuration
+
+        :param configuration: combined configuration
+        :type configuration: dict
+        :param update_func: progress wrapper passed to Simulation.run
+        :param cache: cache of the original run and checkpoints, default none
+        :type cache: ResultCache
+        """
+        self.configuration = configuration
+        self.update_func = update_func
+        key = configuration_key(configuration, "incremental")
+        cached = None
+        if cache is not None:
+            cached = cache.get(key)
+        if cached is not None:
+            packed, self.checkpoints = cached
+            self.results = unpack_results(packed)
+            return
+        base = Simulation(**configuration)
+        checkpoint_dates = []
+        month_end = end_of_month(base.start)
+        while month_end < base.end:
+            checkpoint_dates.append(month_end)
+            month_end = end_of_month(month_end + timedelta(days=1))
+        self.results = base.run(update_func=update_func, checkpoint_dates=checkpoint_dates)
+        self.checkpoints = base.checkpoints
+        if cache is not None:
+            cache.put(key, (pack_results(self.results), self.checkpoints))
+
+    def checkpoint_before(self, affected_date: date):
+        """ Latest checkpoint before a date
+
+        :param affected_date: first date which may differ
+        :type affected_date: date
+        :return: checkpoint, None if there is none before the date
+        :rtype: SimulationCheckpoint
+        """
+        earlier_dates = [d for d in self.checkpoints.keys() if d < affected_date]
+        if len(earlier_dates) == 0:
+            return None
+        return self.checkpoints[max(earlier_dates)]
+
+    def run(self, edited: Simulation) -> tuple:
+        """ Run an edited copy of the configuration
+
+        :param edited: simulation built from the configuration then edited, not yet run
+        :type edited: Simulation
+        :return: same results as Simulation.run of the edited simulation
+        :rtype: tuple
+        """
+        affected_date = first_affected_date(Simulation(**self.configuration), edited)
+        if affected_date is None:
+            return self.results
+        checkpoint = self.checkpoint_before(affected_date)
+        if checkpoint is None:
+            return edited.run(update_func=self.update_func)
+        days, asset_states, action_logger, fed_tax_data, state_tax_data, error_raised = edited.run(
+            update_func=self.update_func,
+            checkpoint=checkpoint,
+        )
+        _, base_states, base_logger, _, _, _ = self.results
+        asset_states = [s for s in base_states if s["date"] <= checkpoint.date] + asset_states
+        joined_logger = ActionLogger()
+        joined_logger.extend(base_logger, checkpoint.action_count)
+        joined_logger.extend(action_logger)
+        return days, asset_states, joined_logger, fed_tax_data, state_tax_data, error_raised
@@ -1,12 +1,56 @@
 from datetime import date
+from pathlib import Path
+from typing import Dict, List
+import bisect
+import csv
+import math
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
-from planner.common import future_value
+# Largest number of day counts remembered per rate
+GROWTH_CACHE_SIZE = 4096
+SCHEDULE_YEAR_COLUMN = "year"
+
+def read_rate_schedule(path: Path, column: str = None) -> Dict[int, float]:
+    """ Read yearly % rates from a CSV file
+
+    :param path: CSV file with a year column and one or more rate columns
+    :type path: Path
+    :param column: rate column to read, default the only rate column
+    :type column: str
+    :return: yearly % rate keyed by year
+    :rtype: Dict[int, float]
+
+    Columns are named by the header row, for example year, stocks and
+    inflation for historical annual returns.
+    """
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        if SCHEDULE_YEAR_COLUMN not in reader.fieldnames:
+            raise(ValueError(f"Rate schedule {path} has no {SCHEDULE_YEAR_COLUMN} column"))
+        columns = [c for c in reader.fieldnames if c != SCHEDULE_YEAR_COLUMN]
+        if column is None:
+            if len(columns) != 1:
+                raise(ValueError(f"Rate schedule {path} has several rate columns, choose one of {columns}"))
+            column = columns[0]
+        elif column not in columns:
+            raise(ValueError(f"Rate schedule {path} has no column {column}"))
+        return {int(row[SCHEDULE_YEAR_COLUMN]): float(row[column]) for row in reader if row[column] != ""}
 
 class InterestRate(BaseModel):
     name: str
     rate: float = 0.0 # Yearly % rate
+    volatility: float = 0.0 # Yearly % standard deviation, Monte Carlo only
+    schedule: Dict[int, float] = None # Yearly % rate from each year on, rate is used before the first
+    schedule_file: str = None # CSV of yearly % rates read into schedule
+    schedule_column: str = None # Column of schedule_file, default the only rate column
+    schedule_start: int = None # Schedule year of the first simulated year, default the same year
+    growth_factors: Dict[int, float] = Field(default_factory=dict, exclude=True) # Private
+    growth_factors_rate: float = Field(None, exclude=True) # Private
+    schedule_offset: int = Field(0, exclude=True) # Private
+    schedule_first_year: int = Field(None, exclude=True) # Private
+    schedule_daily_rates: List[float] = Field(None, exclude=True) # Private
+    schedule_year_growth: List[float] = Field(None, exclude=True) # Private
 
     @property
     def daily_rate(self) -> float:
@@ -16,7 +60,107 @@ class InterestRate(BaseModel):
         :rtype: float
         """
         return (self.rate / 100.0) / 365.0
-    
+
+    @property
+    def scheduled(self) -> bool:
+        """ Whether a compiled schedule sets the rate each year
+
+        :return: True once compile_schedule has built the growth table
+        :rtype: bool
+        """
+        return self.schedule_year_growth is not None
+
+    def rate_in_year(self, year: int) -> float:
+        """ Yearly % rate during a simulated year
+
+        :param year: simulated year
+        :type year: int
+        :return: yearly % rate
+        :rtype: float
+        """
+        if self.schedule is None:
+            return self.rate
+        years = sorted(self.schedule.keys())
+        index = bisect.bisect_right(years, year + self.schedule_offset)
+        if index == 0:
+            return self.rate
+        return self.schedule[years[index - 1]]
+
+    def compile_schedule(self, first_year: int, last_year: int):
+        """ Build the cumulative growth at the start of each scheduled year
+
+        :param first_year: first simulated year
+        :type first_year: int
+        :param last_year: last simulated year
+        :type last_year: int
+
+        Growth between two dates is then the ratio of their cumulative
+        growths, however many rate changes lie between them.  The table
+        covers the simulated years and every change in the schedule,
+        outside of it the rate stays the same.
+        """
+        if self.schedule is None and self.schedule_file is not None:
+            self.schedule = read_rate_schedule(Path(self.schedule_file), self.schedule_column)
+        if self.schedule is None:
+            return
+        if self.schedule_start is not None:
+            self.schedule_offset = self.schedule_start - first_year
+        if len(self.schedule) > 0:
+            first_year = min(first_year, min(self.schedule.keys()) - self.schedule_offset)
+            last_year = max(last_year, max(self.schedule.keys()) - self.schedule_offset)
+        daily_rates = []
+        year_growth = [1.0]
+        for year in range(first_year, last_year + 1):
+            daily_rates.append((self.rate_in_year(year) / 100.0) / 365.0)
+            days = (date(year + 1, 1, 1) - date(year, 1, 1)).days
+            year_growth.append(year_growth[-1] * math.pow(1 + daily_rates[-1], days))
+        self.schedule_first_year = first_year
+        self.schedule_daily_rates = daily_rates
+        self.schedule_year_growth = year_growth
+
+    def cumulative_growth(self, current_date: date) -> float:
+        """ Growth of a compiled schedule from the start of its first year
+
+        :param current_date: date to grow to
+        :type current_date: date
+        :return: growth factor, below one before the first year
+        :rtype: float
+        """
+        index = current_date.year - self.schedule_first_year
+        if index < 0:
+            days = (current_date - date(self.schedule_first_year, 1, 1)).days
+            return math.pow(1 + self.daily_rate, days)
+        if index >= len(self.schedule_daily_rates):
+            index = len(self.schedule_daily_rates) - 1
+        days = (current_date - date(self.schedule_first_year + index, 1, 1)).days
+        return self.schedule_year_growth[index] * math.pow(1 + self.schedule_daily_rates[index], days)
+
+    def growth_factor(self, days: int) -> float:
+        """ Growth of one unit of value over a number of days
+
+        :param days: number of days of growth
+        :type days: int
+        :return: growth factor
+        :rtype: float
+
+        Factors are remembered by day count, the same few counts
+        (one day, a month, a year) are used over and over.  The
+        factor is the same pow as calculating it every time, so
+        results do not change.
+        """
+        if self.growth_factors_rate != self.rate:
+            # Rate was edited, remembered factors are stale
+            self.growth_factors = {}
+            self.growth_factors_rate = self.rate
+        try:
+            return self.growth_factors[days]
+        except KeyError:
+            if len(self.growth_factors) >= GROWTH_CACHE_SIZE:
+                self.growth_factors = {}
+            factor = math.pow(1 + self.daily_rate, days)
+            self.growth_factors[days] = factor
+            return factor
+
     def calculate_value(self, present_value: float, present_date: date, future_date: date) -> float:
         """ Calculate future value using this interest rate
 
@@ -29,11 +173,9 @@ class InterestRate(BaseModel):
         :return: future value at requested date
         :rtype: float
         """
-        if self.rate == 0.0:
+        if self.schedule_year_growth is not None:
+            return present_value * (self.cumulative_growth(future_date) / self.cumulative_growth(present_date))
+        elif self.rate == 0.0:
             return present_value
         else:
-            return future_value(
-                present_value, 
-                self.daily_rate, 
-                (future_date - present_date).days,
-            )
\ No newline at end of file
+            return present_value * self.growth_factor((future_date - present_date).days)
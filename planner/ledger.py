@@ -0,0 +1,102 @@
+from array import array
+from datetime import date
+
+class AssetLedger:
+    """ Running balances of assets in contiguous arrays
+
+    Each asset reads and writes its running balances here through
+    its ledger index, so actions in the simulation loop are plain
+    array updates rather than validated model attribute writes.
+    A simulation keeps every asset in one ledger, an asset used on
+    its own or copied gets a ledger of its own.
+    """
+    __slots__ = ("balances", "contributions", "cents_balances", "contribution_cents")
+
+    def __init__(self, assets: list = ()):
+        """ Move assets into the ledger
+
+        :param assets: assets whose current balances are moved in
+        :type assets: list
+        """
+        self.balances = array("d")
+        self.contributions = array("d")
+        self.cents_balances = array("q")
+        self.contribution_cents = array("q")
+        for asset in assets:
+            self.add(asset, *asset.ledger_balances())
+
+    def add(self, asset, f_balance: float, contribution_balance: float, cents_balance: int = None, contribution_cents: int = None):
+        """ Give an asset the next index of the ledger
+
+        :param asset: asset to keep balances for
+        :type asset: Asset
+        :param f_balance: running balance
+        :type f_balance: float
+        :param contribution_balance: running contribution balance
+        :type contribution_balance: float
+        :param cents_balance: running balance in cents, default none
+        :type cents_balance: int
+        :param contribution_cents: running contribution balance in cents, default none
+        :type contribution_cents: int
+        """
+        asset.ledger = self
+        asset.ledger_index = len(self.balances)
+        self.balances.append(f_balance)
+        self.contributions.append(contribution_balance)
+        self.cents_balances.append(cents_balance or 0)
+        self.contribution_cents.append(contribution_cents or 0)
+
+    def state(self) -> tuple:
+        """ Copy of every running balance
+
+        :return: balances, contributions and their cents
+        :rtype: tuple
+        """
+        return (
+            self.balances.tolist(),
+            self.contributions.tolist(),
+            self.cents_balances.tolist(),
+            self.contribution_cents.tolist(),
+        )
+
+class TransactionLedger:
+    """ Run state of transactions in contiguous arrays
+
+    Each transaction reads and writes its period counter, last
+    execution date and running present value date here through its
+    ledger index, so executions in the simulation loop are plain list
+    updates rather than validated model attribute writes.  A
+    simulation keeps every transaction in one ledger, a transaction
+    used on its own or copied gets a ledger of its own.
+    """
+    __slots__ = ("period_counters", "last_executed", "value_dates")
+
+    def __init__(self, transactions: list = ()):
+        """ Move transactions into the ledger
+
+        :param transactions: transactions whose current run state is moved in
+        :type transactions: list
+        """
+        self.period_counters = array("l")
+        self.last_executed = []
+        self.value_dates = []
+        for transaction in transactions:
+            self.add(transaction, *transaction.ledger_state())
+
+    def add(self, transaction, period_counter: int, last_executed: date, value_date: date):
+        """ Give a transaction the next index of the ledger
+
+        :param transaction: transaction to keep run state for
+        :type transaction: Transaction
+        :param period_counter: executions since the last period started
+        :type period_counter: int
+        :param last_executed: date of the last execution, None before the first
+        :type last_executed: date
+        :param value_date: running present value date
+        :type value_date: date
+        """
+        transaction.ledger = self
+        transaction.ledger_index = len(self.period_counters)
+        self.period_counters.append(period_counter)
+        self.last_executed.append(last_executed)
+        self.value_dates.append(value_date)
@@ -0,0 +1,136 @@
+from datetime import date, timedelta
+import math
+
+from strenum import StrEnum
+
+from planner.transaction import Transaction, FrequencyEnum
+
+class MaturityModeEnum(StrEnum):
+    daily = "daily"
+    deferred = "deferred"
+
+# Limit meaning every execution of the day has happened
+END_OF_DAY = (math.inf, math.inf)
+
+def deferrable(transaction: Transaction) -> bool:
+    """ Whether an asset maturity transaction can be applied in one step
+
+    :param transaction: transaction to check
+    :type transaction: Transaction
+    :return: True = can be deferred, False = must execute on schedule
+    :rtype: bool
+
+    Only daily maturity compounds the same as a single step over
+    many days, anything else depends on the balance on its dates.
+    """
+    return (
+        transaction.asset_maturity
+        and transaction.frequency == FrequencyEnum.daily
+        and transaction.frequency_periods == 1
+        and transaction.source is None
+        and transaction.donation_factor is None
+    )
+
+class DeferredMaturity:
+    """ Daily asset maturity applied only when the asset is used
+
+    Between uses an asset balance only changes through maturity,
+    so all the days since the last use compound in one step giving
+    the same balance as maturing every day.  Days are matured up to
+    a limit of (date, priority, order), matching the executions that
+    would already have happened in the daily schedule.  With
+    maturity first, as in monthly steps, an asset always matures
+    through the limit date before it is used.
+    """
+
+    def __init__(self, transactions: list, action_logger, first_date: date, last_date: date, maturity_first: bool = False):
+        """ Collect the deferred maturity transactions by asset
+
+        :param transactions: (order, transaction) of deferrable transactions
+        :type transactions: list
+        :param action_logger: logger receiving maturity actions
+        :type action_logger: ActionLogger
+        :param first_date: first simulated date
+        :type first_date: date
+        :param last_date: last simulated date
+        :type last_date: date
+        :param maturity_first: maturity executes before everything else on a date, default False
+        :type maturity_first: bool
+        """
+        self.action_logger = action_logger
+        self.first_date = first_date
+        self.last_date = last_date
+        self.maturity_first = maturity_first
+        self.pending = {}
+        for order, transaction in transactions:
+            self.pending.setdefault(transaction.destination.name, []).append((order, transaction))
+
+    def mature(self, asset, limit_date: date, limit: tuple = END_OF_DAY):
+        """ Apply maturity to an asset for all days before a limit
+
+        :param asset: asset to mature
+        :type asset: Asset
+        :param limit_date: date of the limit
+        :type limit_date: date
+        :param limit: (priority, order) of the limit on limit_date, not included
+        :type limit: tuple
+        """
+        if asset is None or asset.name not in self.pending:
+            return
+        for order, transaction in self.pending[asset.name]:
+            through_date = self.through_date(order, transaction, limit_date, limit)
+            if through_date is not None:
+                self.apply(transaction, asset, through_date)
+
+    def apply(self, transaction: Transaction, asset, through_date: date):
+        """ Execute a deferred maturity transaction for all days through a date
+
+        :param transaction: deferred maturity transaction
+        :type transaction: Transaction
+        :param asset: asset to mature
+        :type asset: Asset
+        :param through_date: last day to mature
+        :type through_date: date
+        """
+        amount = transaction.get_amount(through_date, True)
+        # Same state as executing every day through the date
+        transaction.mark_executed(through_date)
+        _, amount = asset.execute_transaction(amount, transaction, True, through_date)
+        self.action_logger.add_action(through_date, amount, asset.name, transaction)
+
+    def through_date(self, order: int, transaction: Transaction, limit_date: date, limit: tuple) -> date:
+        """ Last day a deferred transaction would have executed before a limit
+
+        :param order: position of the transaction in the simulation
+        :type order: int
+        :param transaction: deferred maturity transaction
+        :type transaction: Transaction
+        :param limit_date: date of the limit
+        :type limit_date: date
+        :param limit: (priority, order) of the limit on limit_date, not included
+        :type limit: tuple
+        :return: date to mature through, None if already matured
+        :rtype: date
+        """
+        through_date = limit_date
+        if not self.maturity_first and (transaction.priority, order) >= limit:
+            through_date -= timedelta(days=1)
+        through_date = min(through_date, transaction.end_date, self.last_date)
+        if through_date < transaction.start_date or through_date < self.first_date:
+            return None
+        if transaction.last_executed is not None and through_date <= transaction.last_executed:
+            return None
+        return through_date
+
+    def mature_all(self, assets: list, limit_date: date, limit: tuple = END_OF_DAY):
+        """ Apply maturity to every asset for all days before a limit
+
+        :param assets: assets to mature
+        :type assets: list
+        :param limit_date: date of the limit
+        :type limit_date: date
+        :param limit: (priority, order) of the limit on limit_date, not included
+        :type limit: tuple
+        """
+        for asset in assets:
+            self.mature(asset, limit_date, limit)
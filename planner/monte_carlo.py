@@ -0,0 +1,538 @@
+from datetime import date, timedelta
+import warnings
+
+from planner.simulation import Simulation, consume
+from planner.scheduler import EventScheduler
+from planner.maturity import DeferredMaturity, deferrable
+from planner.transaction import Transaction
+from planner.mortgage import Mortgage
+from planner.asset import Asset
+from planner.interest_rate import InterestRate
+from planner.income_taxes import IncomeTaxCaculator, TaxYearTable
+from planner.action_log import TAX_FIELDS, INCOME_TAXABLE
+from planner.common import boundary_tables, to_cents
+
+DEFAULT_PERCENTILES = [5.0, 25.0, 50.0, 75.0, 95.0]
+
+class PathRates:
+    """ Yearly interest rates drawn separately for every path
+
+    Rates with a volatility get a normally distributed yearly rate
+    per path, centred on the scheduled rate of the year if there is
+    one, compounded daily within the year.  Growth between two dates
+    is the ratio of the cumulative growth at each date.
+    """
+
+    def __init__(self, interest_rates: list, first_year: int, last_year: int, paths: int, generator):
+        """ Draw the yearly rates
+
+        :param interest_rates: interest rates of the simulation
+        :type interest_rates: list
+        :param first_year: first year needing drawn rates
+        :type first_year: int
+        :param last_year: last year needing drawn rates
+        :type last_year: int
+        :param paths: number of paths
+        :type paths: int
+        :param generator: random number generator
+        :type generator: np.random.Generator
+        """
+        # numpy is only needed for Monte Carlo runs
+        import numpy as np
+        self.first_year = first_year
+        self.last_year = last_year
+        days_in_year = np.array([
+            (date(year + 1, 1, 1) - date(year, 1, 1)).days for year in range(first_year, last_year + 1)
+        ])
+        self.daily_rates = {}
+        self.year_start_growth = {}
+        for interest_rate in interest_rates:
+            if interest_rate.volatility == 0.0 or interest_rate.name in self.daily_rates:
+                continue
+            mean = interest_rate.rate
+            if interest_rate.scheduled:
+                # Drawn around the scheduled rate of each year
+                mean = np.array([interest_rate.rate_in_year(year) for year in range(first_year, last_year + 1)])[:, None]
+            yearly_rates = generator.normal(
+                mean,
+                interest_rate.volatility,
+                (len(days_in_year), paths),
+            )
+            daily_rates = (yearly_rates / 100.0) / 365.0
+            year_start_growth = np.ones((len(days_in_year) + 1, paths))
+            year_start_growth[1:] = np.cumprod((1.0 + daily_rates) ** days_in_year[:, None], axis=0)
+            self.daily_rates[interest_rate.name] = daily_rates
+            self.year_start_growth[interest_rate.name] = year_start_growth
+
+    def growth(self, interest_rate: InterestRate, present_date: date, future_date: date):
+        """ Growth factor between two dates
+
+        :param interest_rate: interest rate to grow with
+        :type interest_rate: InterestRate
+        :param present_date: date of present value
+        :type present_date: date
+        :param future_date: date of future value
+        :type future_date: date
+        :return: factor per path, or a single factor for fixed rates
+        :rtype: np.ndarray
+        """
+        if interest_rate.name not in self.daily_rates:
+            return interest_rate.calculate_value(1.0, present_date, future_date)
+        return self._cumulative_growth(interest_rate, future_date) / self._cumulative_growth(interest_rate, present_date)
+
+    def scale(self, interest_rate: InterestRate, present_date: date, future_date: date):
+        """ Growth of each path relative to the fixed or scheduled rate
+
+        :param interest_rate: interest rate to grow with
+        :type interest_rate: InterestRate
+        :param present_date: date of present value
+        :type present_date: date
+        :param future_date: date of future value
+        :type future_date: date
+        :return: factor per path, 1.0 for rates without volatility
+        :rtype: np.ndarray
+        """
+        if interest_rate.name not in self.daily_rates:
+            return 1.0
+        return self.growth(interest_rate, present_date, future_date) / interest_rate.calculate_value(1.0, present_date, future_date)
+
+    def _cumulative_growth(self, interest_rate: InterestRate, current_date: date):
+        """ Growth from the start of the first year to a date
+
+        :param interest_rate: interest rate to grow with
+        :type interest_rate: InterestRate
+        :param current_date: date to grow to
+        :type current_date: date
+        :return: growth factor per path
+        :rtype: np.ndarray
+
+        Outside of the drawn years the fixed or scheduled rate is used.
+        """
+        year_start_growth = self.year_start_growth[interest_rate.name]
+        if current_date.year < self.first_year:
+            return interest_rate.calculate_value(1.0, date(self.first_year, 1, 1), current_date)
+        if current_date.year > self.last_year:
+            return year_start_growth[-1] * interest_rate.calculate_value(1.0, date(self.last_year + 1, 1, 1), current_date)
+        index = current_date.year - self.first_year
+        days = (current_date - date(current_date.year, 1, 1)).days
+        return year_start_growth[index] * (1.0 + self.daily_rates[interest_rate.name][index]) ** days
+
+class PathDeferredMaturity(DeferredMaturity):
+    """ Deferred daily maturity applied to every path at once
+    """
+
+    def __init__(self, transactions: list, monte_carlo: "MonteCarlo", first_date: date, last_date: date):
+        super().__init__(transactions, None, first_date, last_date)
+        self.monte_carlo = monte_carlo
+
+    def apply(self, transaction: Transaction, asset: Asset, through_date: date):
+        amounts = self.monte_carlo.get_amount(transaction, through_date)
+        transaction.mark_executed(through_date)
+        self.monte_carlo.execute_transaction(asset, amounts, transaction, True, through_date)
+
+class MonteCarlo:
+    """ Run many return paths of a simulation together
+
+    Asset balances are held as arrays with one entry per path, so a
+    single pass over the execution schedule advances every path.  A
+    path that cannot fund a transaction fails and stops changing,
+    the others continue.  Daily asset maturity is always deferred.
+
+    Amounts, balance checks, mortgage payments and income taxes use
+    the same rules as a simulation, given the balances of every path.
+    """
+
+    def __init__(self, simulation: Simulation, paths: int, seed: int = None, percentiles: list = None):
+        """ Prepare a Monte Carlo run
+
+        :param simulation: simulation to run, must not have been run already
+        :type simulation: Simulation
+        :param paths: number of return paths
+        :type paths: int
+        :param seed: random seed for repeatable runs
+        :type seed: int
+        :param percentiles: percentiles of asset balances to report
+        :type percentiles: list
+        """
+        # numpy is only needed for Monte Carlo runs
+        import numpy as np
+        self.simulation = simulation
+        self.paths = paths
+        self.generator = np.random.default_rng(seed)
+        if percentiles is None:
+            percentiles = DEFAULT_PERCENTILES
+        self.percentiles = percentiles
+        self.asset_index = {a.name: index for index, a in enumerate(simulation.assets)}
+        self.balances = np.repeat(
+            np.array([a.f_balance for a in simulation.assets], dtype=float).reshape(-1, 1), paths, axis=1
+        )
+        self.contribution_balances = np.repeat(
+            np.array([a.contribution_balance for a in simulation.assets], dtype=float).reshape(-1, 1), paths, axis=1
+        )
+        self.alive = np.ones(paths, dtype=bool)
+        self.failure_dates = np.full(paths, None, dtype=object)
+        self.sepp_payments = {}
+        self.rates = PathRates(
+            simulation.interest_rates,
+            simulation.start.year,
+            simulation.end.year,
+            paths,
+            self.generator,
+        )
+        self._reset_year()
+
+    def _reset_year(self):
+        """ Clear yearly income tax totals
+        """
+        import numpy as np
+        self.tax_totals = {field: np.zeros(self.paths) for field in TAX_FIELDS}
+        self.mortgage_interest = np.zeros(self.paths)
+
+    def fail(self, failed, current_date: date):
+        """ Stop paths that could not complete a transaction
+
+        :param failed: paths that failed
+        :type failed: np.ndarray
+        :param current_date: date of the failure
+        :type current_date: date
+        """
+        newly_failed = failed & self.alive
+        self.failure_dates[newly_failed] = current_date
+        self.alive &= ~failed
+
+    def get_amount(self, transaction: Transaction, current_date: date):
+        """ Transaction amount for every path
+
+        :param transaction: transaction to execute
+        :type transaction: Transaction
+        :param current_date: date of execution
+        :type current_date: date
+        :return: amount per path, before any donation factor
+        :rtype: np.ndarray
+
+        Amounts come from Transaction.requested_amount, paths that
+        cannot fund a required amount fail instead of raising.
+        """
+        import numpy as np
+        source_balance = None
+        if transaction.source is not None:
+            source_balance = self.balances[self.asset_index[transaction.source.name]]
+        destination_balance = None
+        if transaction.destination is not None:
+            destination_balance = self.balances[self.asset_index[transaction.destination.name]]
+        amount = transaction.requested_amount(
+            current_date,
+            source_balance,
+            destination_balance,
+            lambda value, present_date, future_date: value * self.rates.growth(transaction.interest_rate, present_date, future_date),
+            self.sepp_payments,
+            positive=lambda value: np.maximum(value, 0.0),
+        )
+        # Fixed amounts at fixed rates are the same on every path
+        amount = np.zeros(self.paths) + amount
+        if transaction.source is not None:
+            amount = self._limit(transaction, amount, source_balance, current_date)
+            if transaction.contributions_only:
+                contribution_balance = self.contribution_balances[self.asset_index[transaction.source.name]]
+                amount = self._limit(transaction, amount, contribution_balance, current_date)
+        return amount
+
+    def _limit(self, transaction: Transaction, amount, available, current_date: date):
+        """ Fail or reduce amounts above what is available
+
+        :param transaction: transaction being executed
+        :type transaction: Transaction
+        :param amount: requested amount per path
+        :type amount: np.ndarray
+        :param available: available amount per path
+        :type available: np.ndarray
+        :param current_date: date of execution
+        :type current_date: date
+        :return: amount per path
+        :rtype: np.ndarray
+        """
+        import numpy as np
+        insufficient = amount > available
+        if transaction.amount_required:
+            self.fail(insufficient, current_date)
+            return amount
+        return np.where(insufficient, available, amount)
+
+    def execute_transaction(self, asset: Asset, amounts, transaction: Transaction, deposit: bool, current_date: date):
+        """ Change an asset balance on every running path
+
+        :param asset: asset to change
+        :type asset: Asset
+        :param amounts: amount per path
+        :type amounts: np.ndarray
+        :param transaction: transaction being executed
+        :type transaction: Transaction
+        :param deposit: whether the transaction is a deposit (true) or withdrawal (false)
+        :type deposit: bool
+        :param current_date: date of transaction
+        :type current_date: date
+
+        Same checks as Asset.execute_transaction, a negative balance
+        fails the path instead of raising.
+        """
+        import numpy as np
+        index = self.asset_index[asset.name]
+        if deposit:
+            change = amounts
+        else:
+            asset.check_withdrawal(transaction, current_date)
+            change = -1.0 * amounts
+        change = np.where(self.alive, change, 0.0)
+        self.balances[index] += change
+        if not transaction.asset_maturity:
+            self.contribution_balances[index] += change
+        if not asset.allow_negative_balance:
+            self.fail(self.balances[index] < 0.0, current_date)
+        if np.any(self.alive):
+            asset.check_earnings(transaction, current_date, float(np.min(self.contribution_balances[index][self.alive])))
+        for field_index, field in enumerate(TAX_FIELDS):
+            if getattr(transaction, field):
+                if field_index == INCOME_TAXABLE:
+                    # Only increases in balance are income
+                    self.tax_totals[field] += np.maximum(change, 0.0)
+                else:
+                    self.tax_totals[field] += change
+
+    def execute_mortgage(self, mortgage: Mortgage, current_date: date):
+        """ Make a mortgage payment on every path with debt remaining
+
+        :param mortgage: mortgage to pay
+        :type mortgage: Mortgage
+        :param current_date: date of payment
+        :type current_date: date
+
+        Paths whose debt is as scheduled pay the amortization table's
+        row, the others the same split of their own debt balance.
+        """
+        import numpy as np
+        debt = self.balances[self.asset_index[mortgage.destination.name]]
+        # Same rounding to cents as to_cents, in numpy
+        debt_cents = np.round(np.round(debt, 2) * 100)
+        remaining = np.abs(debt)
+        payments = np.full(self.paths, mortgage.monthly_payment(current_date))
+        interests = remaining * mortgage.loan_rate_month
+        principals = payments - interests
+        # Last payment closes out the debt
+        closing = remaining < principals
+        principals = np.where(closing, remaining, principals)
+        payments = np.where(closing, interests + remaining, payments)
+        scheduled = np.zeros(self.paths, dtype=bool)
+        row = None if mortgage.amortization is None else mortgage.amortization.get(current_date.toordinal())
+        if row is not None:
+            opening, payment, interest, principal, _ = row
+            scheduled = debt_cents == to_cents(opening)
+            payments = np.where(scheduled, payment, payments)
+            interests = np.where(scheduled, interest, interests)
+            principals = np.where(scheduled, principal, principals)
+        paying = self.alive & (scheduled | (debt_cents != 0))
+        payments = np.where(paying, payments, 0.0)
+        interests = np.where(paying, interests, 0.0)
+        principals = np.where(paying, principals, 0.0)
+        if not np.any(payments):
+            return
+        self.mortgage_interest += interests
+        self.execute_transaction(mortgage.source, payments, mortgage, False, current_date)
+        self.execute_transaction(mortgage.destination, principals, mortgage, True, current_date)
+
+    def bracket_taxes(self, table: TaxYearTable, balance):
+        """ Taxes on each path's income after deductions
+
+        :param table: brackets of the tax year
+        :type table: TaxYearTable
+        :param balance: income after deductions per path
+        :type balance: numpy.ndarray
+        :return: taxes per path
+        :rtype: numpy.ndarray
+
+        Same lookup as IncomeTaxCaculator.bracket_taxes for all paths.
+        """
+        import numpy as np
+        tops = np.array(table.bracket_tops)
+        index = np.minimum(np.searchsorted(tops, balance, side="left"), len(tops) - 1)
+        bracket_balance = balance - (tops[index] - np.array(table.bracket_sizes)[index])
+        taxes_owed = np.array(table.full_bracket_taxes)[index] + bracket_balance * np.array(table.bracket_rates)[index]
+        # Nothing taxed without income
+        return np.where(balance <= 0.0, 0.0, taxes_owed)
+
+    def calculate_taxes(self, calculator: IncomeTaxCaculator, year: int, federal: bool, current_date: date):
+        """ Pay or refund income taxes for the year on every path
+
+        :param calculator: income tax definition
+        :type calculator: IncomeTaxCaculator
+        :param year: year of taxes
+        :type year: int
+        :param federal: is federal taxes, True = Yes, False = State
+        :type federal: bool
+        :param current_date: date of payment
+        :type current_date: date
+
+        Same rules as IncomeTaxCaculator.calculate_taxes without
+        rounding of the individual amounts.  Brackets, deductions and
+        credits grow with each path's rates, so taxes on a path are
+        the taxes of the calculator's year table scaled by the path's
+        growth relative to the fixed rate.
+        """
+        import numpy as np
+        year_date = date(year, 1, 1)
+        taxable_income = self.tax_totals["income_taxable"]
+        if federal:
+            deductions = self.tax_totals["fed_tax_deductable"]
+            taxes_paid = self.tax_totals["fed_income_tax_payment"]
+            tax_str = "Federal"
+        else:
+            deductions = self.tax_totals["state_tax_deductable"]
+            taxes_paid = self.tax_totals["state_income_tax_payment"]
+            tax_str = "State"
+        extrapolation_factor = calculator.extrapolation_factor(year, self.simulation.start)
+        if extrapolation_factor != 0.0:
+            taxable_income = extrapolation_factor * taxable_income
+            deductions = extrapolation_factor * deductions
+        for deduction in calculator.deductions:
+            if deduction.executable(year):
+                deductions = deductions - deduction.get_amount(year) * self.rates.scale(deduction.interest_rate, date(deduction.relative_year, 1, 1), year_date)
+        deductions = deductions - self.mortgage_interest
+        balance = taxable_income + deductions
+        bracket_scale = np.broadcast_to(
+            self.rates.scale(calculator.interest_rate, date(calculator.relative_year, 1, 1), year_date),
+            balance.shape,
+        )
+        taxes_owed = self.bracket_taxes(calculator.year_table(year), balance / bracket_scale) * bracket_scale
+        for credit in calculator.credits:
+            if credit.executable(year):
+                taxes_owed = taxes_owed - credit.get_amount(year) * self.rates.scale(credit.interest_rate, date(credit.relative_year, 1, 1), year_date)
+        # Tax payments have a negative amount
+        tax_balance = taxes_owed + taxes_paid
+        tax_transaction = Transaction(name=f"{tax_str} Income Taxes", source=calculator.source.name)
+        tax_transaction.source = calculator.source
+        refund = tax_balance < 0.0
+        amounts = self._limit(tax_transaction, np.abs(tax_balance), self.balances[self.asset_index[calculator.source.name]], current_date)
+        if np.any(refund & self.alive):
+            self.execute_transaction(calculator.source, np.where(refund, amounts, 0.0), tax_transaction, True, current_date)
+        if np.any(~refund & self.alive):
+            self.execute_transaction(calculator.source, np.where(refund, 0.0, amounts), tax_transaction, False, current_date)
+
+    def snapshot(self, current_date: date) -> list:
+        """ Percentiles of every asset balance over the running paths
+
+        :param current_date: date of the snapshot
+        :type current_date: date
+        :return: dictionary per asset of balance percentiles
+        :rtype: list
+        """
+        import numpy as np
+        if np.all(self.alive):
+            bands = np.percentile(self.balances, self.percentiles, axis=1)
+        else:
+            with warnings.catch_warnings():
+                # All paths failed
+                warnings.simplefilter("ignore", RuntimeWarning)
+                bands = np.nanpercentile(np.where(self.alive, self.balances, np.nan), self.percentiles, axis=1)
+        states = []
+        for index, asset in enumerate(self.simulation.assets):
+            state = {
+                "date": current_date,
+                "name": asset.name,
+                "category": asset.category,
+            }
+            for percentile_index, percentile in enumerate(self.percentiles):
+                state[f"p{percentile:g}"] = float(bands[percentile_index][index])
+            states.append(state)
+        return states
+
+    def run(self, update_func = None) -> tuple:
+        """ Run every path from start to end
+
+        :return: number of days in simulation execution, monthly asset balance percentiles,
+            yearly failure probability, overall failure probability
+        :rtype: tuple
+
+        A path fails where the deterministic simulation would raise
+        InsufficientBalanceException.
+        """
+        import numpy as np
+        simulation = self.simulation
+        days = 0
+        asset_bands = []
+        yearly_failures = []
+        total_days = (simulation.end - simulation.start).days
+        generator = range(total_days)
+        if update_func is None:
+            # Imported here as only console runs show progress
+            from tqdm import tqdm
+            generator = tqdm(generator, desc=f"Running {self.paths} paths for each day...")
+        else:
+            generator = update_func(generator)
+        progress = iter(generator)
+        last_date = simulation.start + timedelta(days=total_days - 1)
+        scheduled_transactions = []
+        deferred_transactions = []
+        for order, transaction in enumerate(simulation.transactions):
+            if deferrable(transaction):
+                deferred_transactions.append((order, transaction))
+            else:
+                scheduled_transactions.append((order, transaction))
+        scheduler = EventScheduler(scheduled_transactions, simulation.mortgages, simulation.start, last_date)
+        deferred_maturity = PathDeferredMaturity(deferred_transactions, self, simulation.start, last_date)
+        start_day = simulation.start.toordinal()
+        last_day = last_date.toordinal()
+        month_ends, year_ends = boundary_tables(simulation.start, last_date)
+        month_end_days = set(month_ends)
+        day = None
+        if total_days > 0:
+            day = start_day
+        while day is not None:
+            current_date = date.fromordinal(day)
+            transaction_entries, mortgage_entries = scheduler.pop_day(day)
+            for _, _, priority, order, transaction in transaction_entries:
+                deferred_maturity.mature(transaction.source, current_date, (priority, order))
+                deferred_maturity.mature(transaction.destination, current_date, (priority, order))
+                if transaction.donation_transaction is not None:
+                    deferred_maturity.mature(transaction.donation_transaction.source, current_date, (priority, order))
+                amount = self.get_amount(transaction, current_date)
+                if transaction.destination is not None:
+                    self.execute_transaction(transaction.destination, amount, transaction, True, current_date)
+                if transaction.source is not None:
+                    self.execute_transaction(transaction.source, amount, transaction, False, current_date)
+                if transaction.donation_factor is not None:
+                    donation_transaction = transaction.donation_transaction
+                    self.execute_transaction(donation_transaction.source, amount * transaction.donation_factor, donation_transaction, False, current_date)
+            for entry in mortgage_entries:
+                mortgage = entry[-1]
+                deferred_maturity.mature(mortgage.source, current_date)
+                deferred_maturity.mature(mortgage.destination, current_date)
+                self.execute_mortgage(mortgage, current_date)
+            scheduler.reschedule(transaction_entries + mortgage_entries)
+
+            if day in month_end_days:
+                deferred_maturity.mature_all(simulation.assets, current_date)
+            if day in year_ends:
+                if simulation.federal_income_taxes is not None:
+                    self.calculate_taxes(simulation.federal_income_taxes, current_date.year, True, current_date)
+                if simulation.state_income_taxes is not None:
+                    self.calculate_taxes(simulation.state_income_taxes, current_date.year, False, current_date)
+                self._reset_year()
+                yearly_failures.append({
+                    "year": current_date.year,
+                    "failure_probability": float(np.mean(~self.alive)),
+                })
+            if day in month_end_days:
+                asset_bands.extend(self.snapshot(current_date))
+
+            simulated_days = day - start_day + 1
+            consume(progress, simulated_days - days)
+            days = simulated_days
+            if not np.any(self.alive):
+                break
+            day = simulation._next_simulated_day(scheduler, day + 1, last_day, month_ends)
+
+        if np.any(self.alive):
+            consume(progress)
+            days = total_days
+            if total_days > 0:
+                deferred_maturity.mature_all(simulation.assets, last_date)
+        return days, asset_bands, yearly_failures, float(np.mean(~self.alive))
@@ -1,8 +1,9 @@
 from decimal import Decimal
 from datetime import date
+from typing import Any
 
 from planner.transaction import Transaction, FrequencyEnum
-from planner.common import round, ZERO, amortorize
+from planner.common import round, ZERO, amortorize, to_cents, InsufficientBalanceException
 
 class Mortgage(Transaction):
     loan_amount: Decimal
@@ -10,6 +11,8 @@ class Mortgage(Transaction):
     term_months: int
     extra_principal: Decimal = ZERO
     extra_principal_start: date = None
+    payment: float = None # Private
+    amortization: Any = None # Private
 
     @property
     def loan_rate_month(self):
@@ -23,7 +26,115 @@ class Mortgage(Transaction):
         if self.extra_principal_start is None:
             self.extra_principal_start = start_date
         super().setup(start_date, *args, **kwargs)
-    
+        self.payment = amortorize(self.loan_rate_month, float(self.term_months), float(self.loan_amount))
+        self.amortization = self.compile_amortization()
+
+    def monthly_payment(self, current_date: date) -> float:
+        """ Scheduled payment including any extra principal
+
+        :param current_date: date of the payment
+        :type current_date: date
+        :return: payment amount
+        :rtype: float
+        """
+        payment = self.payment
+        if payment is None:
+            payment = amortorize(self.loan_rate_month, float(self.term_months), float(self.loan_amount))
+        if current_date >= self.extra_principal_start:
+            payment += float(self.extra_principal)
+        return payment
+
+    def compile_amortization(self) -> dict:
+        """ Payments on every compiled calendar date until the debt is paid
+
+        :return: date ordinal to (opening balance, payment, interest,
+            principal, closing balance)
+        :rtype: dict
+
+        Payments are applied to a copy of the destination exactly as a
+        run applies them, so a run whose debt balance matches the
+        opening balance of a row to the cent makes the row's payment.
+        """
+        # Payments to the copy leave the real debt alone
+        debt = self.destination.copy()
+        rows = {}
+        for day in self.fire_calendar:
+            if debt.get_balance() == ZERO:
+                break
+            opening = debt.f_balance
+            payment_date = date.fromordinal(day)
+            payment, interest, principal = self.payment_split(opening, payment_date)
+            try:
+                debt.execute_transaction(principal, self, True, payment_date)
+            except InsufficientBalanceException:
+                break
+            rows[day] = (opening, payment, interest, principal, debt.f_balance)
+        return rows
+
+    def payment_split(self, debt_balance: float, current_date: date) -> tuple:
+        """ Payment of a debt balance and its interest and principal
+
+        :param debt_balance: running balance of the debt
+        :type debt_balance: float
+        :param current_date: date of the payment
+        :type current_date: date
+        :return: payment, interest and principal
+        :rtype: tuple
+        """
+        remaining = abs(debt_balance)
+        payment = self.monthly_payment(current_date)
+        interest = float(remaining) * self.loan_rate_month
+        principal = payment - interest
+        if remaining < principal:
+            # Last payment closes out the debt
+            principal = remaining
+            payment = interest + remaining
+        return payment, interest, principal
+
+    def amortization_row(self, current_date: date, debt_balance: float = None) -> tuple:
+        """ Compiled payment for a date if the debt is as scheduled
+
+        :param current_date: date of the payment
+        :type current_date: date
+        :param debt_balance: balance of the debt, default the destination balance
+        :type debt_balance: float
+        :return: row of the amortization table, None if there is no
+            row or the debt balance differs from it by a cent or more
+        :rtype: tuple
+
+        Monthly steps pay on month ends, which only have a row when
+        the mortgage is paid on the last day of the month.
+        """
+        if self.amortization is None:
+            return None
+        if debt_balance is None:
+            debt_balance = self.destination.f_balance
+        row = self.amortization.get(current_date.toordinal())
+        if row is None or to_cents(row[0]) != to_cents(debt_balance):
+            return None
+        return row
+
+    def amortization_table(self) -> list:
+        """ Amortization schedule as a report
+
+        :return: date, payment, interest, principal and remaining
+            balance of each payment
+        :rtype: list
+        """
+        if self.amortization is None:
+            return []
+        return [
+            {
+                "date": date.fromordinal(day),
+                "name": self.name,
+                "payment": round(Decimal(payment)),
+                "interest": round(Decimal(interest)),
+                "principal": round(Decimal(principal)),
+                "balance": round(Decimal(abs(closing))),
+            }
+            for day, (_, payment, interest, principal, closing) in self.amortization.items()
+        ]
+
     def check(self):
         """ Assure the mortgage is configured correctly
         """
@@ -42,25 +153,27 @@ class Mortgage(Transaction):
         :return: value at requested date
         :rtype: float
         """
-        payment = amortorize(self.loan_rate_month, float(self.term_months), float(self.loan_amount))
-        if current_date >= self.extra_principal_start:
-            payment += float(self.extra_principal)
-        payment_principal = payment - self.payment_interest
-        # Pay against debt/mortgage
-        closeout = False
-        if abs(self.destination.f_balance) < payment_principal:
-            closeout = True
-        if deposit:
-            if closeout:
-                return_amount = abs(self.destination.f_balance)
-            else:
-                return_amount = payment_principal
-        else:
-            if closeout:
-                return_amount = self.payment_interest + abs(self.destination.f_balance)
-            else:
-                return_amount = payment
-        return return_amount
+        row = self.amortization_row(current_date)
+        if row is not None:
+            return row[3] if deposit else row[1]
+        # Debt no longer follows the schedule
+        payment, _, principal = self.payment_split(self.destination.f_balance, current_date)
+        return principal if deposit else payment
+
+    def has_balance(self, debt_balance: float = None) -> bool:
+        """ Whether debt remains to be paid
+
+        :param debt_balance: balance of the debt, default the destination balance
+        :type debt_balance: float
+        :return: true = debt remaining, false = paid off
+        :rtype: bool
+
+        Checked on each date of the compiled calendar, as the payoff
+        date depends on the run.
+        """
+        if debt_balance is None:
+            return self.destination.get_balance() != ZERO
+        return to_cents(debt_balance) != 0
 
     def executable(self, *args, **kwargs) -> bool:
         """ Additional special logic on when to run mortgage transactions
@@ -68,7 +181,7 @@ class Mortgage(Transaction):
         :return: true = should execute, false = should not
         :rtype: bool
         """
-        if self.destination.get_balance() == ZERO:
+        if not self.has_balance():
             return False
         else:
-            return super().executable(*args, **kwargs)
\ No newline at end of file
+            return super().executable(*args, **kwargs)
@@ -0,0 +1,141 @@
+from time import perf_counter
+import json
+
+from strenum import StrEnum
+
+class ProfilePhaseEnum(StrEnum):
+    scheduling = "scheduling"
+    get_amount = "get_amount"
+    execute_transaction = "execute_transaction"
+    mortgages = "mortgages"
+    maturity = "maturity"
+    taxes = "taxes"
+    snapshots = "snapshots"
+
+class RunProfiler:
+    """ Timings and counters for the phases of Simulation.run
+
+    Pass to Simulation.run to collect cumulative seconds and counts
+    for each phase of the daily loop, and per transaction executions
+    and seconds which are also totalled by frequency.  Runs without
+    a profiler skip all of the measuring.
+    """
+
+    def __init__(self):
+        self.phase_seconds = {p: 0.0 for p in ProfilePhaseEnum}
+        self.phase_counts = {p: 0 for p in ProfilePhaseEnum}
+        # Name to [frequency, executions, seconds spent getting
+        # amounts and executing]
+        self.transactions = {}
+        self.simulated_days = 0
+        self.total_seconds = 0.0
+
+    def _transaction_counters(self, transaction) -> list:
+        try:
+            return self.transactions[transaction.name]
+        except KeyError:
+            counters = [str(transaction.frequency), 0, 0.0]
+            self.transactions[transaction.name] = counters
+            return counters
+
+    def add(self, phase: ProfilePhaseEnum, started: float, transaction = None) -> float:
+        """ Add the time since started to a phase
+
+        :param phase: phase which was running
+        :type phase: ProfilePhaseEnum
+        :param started: perf_counter when the phase started
+        :type started: float
+        :param transaction: transaction the time is spent on, default none
+        :type transaction: Transaction
+        :return: perf_counter now, the start of the next phase
+        :rtype: float
+        """
+        now = perf_counter()
+        self.phase_seconds[phase] += now - started
+        self.phase_counts[phase] += 1
+        if transaction is not None:
+            self._transaction_counters(transaction)[2] += now - started
+        return now
+
+    def count_scheduled(self, started: float, entries: list):
+        """ Add the time finding a day's transactions and count their executions
+
+        :param started: perf_counter before the scheduler was asked for the day
+        :type started: float
+        :param entries: scheduled entries with the transaction last
+        :type entries: list
+        """
+        self.add(ProfilePhaseEnum.scheduling, started)
+        for entry in entries:
+            self._transaction_counters(entry[-1])[1] += 1
+
+    def count_execution(self, transaction):
+        """ Count an execution of a transaction not counted by count_scheduled
+
+        :param transaction: executed transaction such as a mortgage
+        :type transaction: Transaction
+        """
+        self._transaction_counters(transaction)[1] += 1
+
+    def report(self) -> dict:
+        """ Structured profile of the run
+
+        :return: phases, transactions by name and totals by frequency
+        :rtype: dict
+        """
+        phases = {
+            str(p): {"seconds": self.phase_seconds[p], "count": self.phase_counts[p]}
+            for p in ProfilePhaseEnum
+        }
+        transactions = {}
+        frequencies = {}
+        for name, (frequency, executions, seconds) in self.transactions.items():
+            transactions[name] = {
+                "frequency": frequency,
+                "executions": executions,
+                "seconds": seconds,
+            }
+            totals = frequencies.setdefault(frequency, {"transactions": 0, "executions": 0, "seconds": 0.0})
+            totals["transactions"] += 1
+            totals["executions"] += executions
+            totals["seconds"] += seconds
+        return {
+            "simulated_days": self.simulated_days,
+            "total_seconds": self.total_seconds,
+            "other_seconds": self.total_seconds - sum(self.phase_seconds.values()),
+            "phases": phases,
+            "frequencies": frequencies,
+            "transactions": transactions,
+        }
+
+    def write_json(self, path):
+        """ Write the structured report
+
+        :param path: JSON file to write
+        :type path: Path
+        """
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=4)
+
+    def format_report(self, top: int = 10) -> str:
+        """ Readable summary of the profile
+
+        :param top: number of slowest transactions listed
+        :type top: int
+        :return: text table
+        :rtype: str
+        """
+        report = self.report()
+        lines = [f"Simulated {report['simulated_days']} days in {report['total_seconds']:.3f}s"]
+        lines.append(f"{'Phase':<24}{'Seconds':>10}{'Count':>12}")
+        for phase, data in report["phases"].items():
+            lines.append(f"{phase:<24}{data['seconds']:>10.3f}{data['count']:>12}")
+        lines.append(f"{'other':<24}{report['other_seconds']:>10.3f}")
+        lines.append(f"{'Frequency':<24}{'Seconds':>10}{'Executions':>12}")
+        for frequency, data in report["frequencies"].items():
+            lines.append(f"{frequency:<24}{data['seconds']:>10.3f}{data['executions']:>12}")
+        lines.append(f"{'Transaction':<24}{'Seconds':>10}{'Executions':>12}")
+        slowest = sorted(report["transactions"].items(), key=lambda item: item[1]["seconds"], reverse=True)
+        for name, data in slowest[:top]:
+            lines.append(f"{name[:23]:<24}{data['seconds']:>10.3f}{data['executions']:>12}")
+        return "\n".join(lines)
@@ -0,0 +1,180 @@
+from pathlib import Path
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import zlib
+
+from planner.action_log import ActionLogger
+from planner.simulation import Simulation
+from planner.config_reading import FRAGMENT_SUFFIX
+
+# Digest of the planner source, see engine_version
+_engine_version = None
+
+DEFAULT_MAX_BYTES = 1024 ** 3
+CACHE_SUFFIX = ".result"
+
+def engine_version() -> str:
+    """ Digest of the planner package source
+
+    :return: hexadecimal digest, the same until any module changes
+    :rtype: str
+
+    Any edit to the engine can change results, so results cached
+    before it are never reused.
+    """
+    global _engine_version
+    if _engine_version is None:
+        digest = hashlib.sha256()
+        for path in sorted(Path(__file__).parent.glob("*.py")):
+            digest.update(path.name.encode())
+            digest.update(path.read_bytes())
+        _engine_version = digest.hexdigest()
+    return _engine_version
+
+def configuration_key(configuration: dict, kind: str = "run") -> str:
+    """ Hash of a combined configuration and the engine version
+
+    :param configuration: combined configuration including start and end
+    :type configuration: dict
+    :param kind: type of result stored for the configuration
+    :type kind: str
+    :return: hexadecimal digest
+    :rtype: str
+
+    Keys are sorted and dates, Decimals and paths written as strings,
+    so the same configuration always gives the same key.
+    """
+    normalized = json.dumps(
+        {"engine_version": engine_version(), "kind": kind, "configuration": configuration},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+class ResultCache:
+    """ On disk store of results keyed by configuration hash
+
+    Each result is a zlib compressed pickle.  Reading a result marks
+    it as recently used, the least recently used results are removed
+    once the cache is larger than max_bytes.  Parsed configuration
+    fragments stored in the same directory count towards the size.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        """ Set up cache directory
+
+        :param directory: directory holding cached results
+        :type directory: Path
+        :param max_bytes: largest total size of cached results
+        :type max_bytes: int
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}{CACHE_SUFFIX}"
+
+    def get(self, key: str):
+        """ Load a cached result
+
+        :param key: configuration key
+        :type key: str
+        :return: stored result, None if not cached
+        """
+        path = self.path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            result = pickle.loads(zlib.decompress(data))
+        except (zlib.error, pickle.UnpicklingError, EOFError):
+            # Damaged entry, run again
+            path.unlink(missing_ok=True)
+            return None
+        os.utime(path)
+        return result
+
+    def put(self, key: str, result):
+        """ Store a result and evict old results if over size
+
+        :param key: configuration key
+        :type key: str
+        :param result: picklable result
+        """
+        data = zlib.compress(pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+        # Written whole then renamed so readers never see part of a file
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(file_descriptor, "wb") as f:
+            f.write(data)
+        os.replace(temporary_path, self.path(key))
+        self.evict(keep=self.path(key))
+
+    def evict(self, keep: Path = None):
+        """ Remove least recently used entries until under max_bytes
+
+        :param keep: entry never to remove, default none
+        :type keep: Path
+        """
+        entries = []
+        paths = list(self.directory.glob(f"*{CACHE_SUFFIX}")) + list(self.directory.glob(f"*{FRAGMENT_SUFFIX}"))
+        for path in paths:
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        entries.sort()
+        total = sum([size for _, size, _ in entries])
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+
+def pack_results(results: tuple) -> tuple:
+    """ Make Simulation.run results storable
+
+    :param results: results of Simulation.run
+    :type results: tuple
+    :return: results with the action log as plain columns
+    :rtype: tuple
+    """
+    days, asset_states, action_logger, fed_tax_data, state_tax_data, error_raised = results
+    return days, asset_states, action_logger.to_columns(), fed_tax_data, state_tax_data, error_raised
+
+def unpack_results(packed: tuple) -> tuple:
+    """ Results stored by pack_results in the form of Simulation.run
+
+    :param packed: stored results
+    :type packed: tuple
+    :return: results with the action log restored
+    :rtype: tuple
+    """
+    days, asset_states, action_columns, fed_tax_data, state_tax_data, error_raised = packed
+    return days, asset_states, ActionLogger.from_columns(action_columns), fed_tax_data, state_tax_data, error_raised
+
+def cached_run(configuration: dict, cache: ResultCache, update_func = None) -> tuple:
+    """ Run a configuration unless its results are already cached
+
+    :param configuration: combined configuration
+    :type configuration: dict
+    :param cache: result cache
+    :type cache: ResultCache
+    :param update_func: progress wrapper passed to Simulation.run
+    :return: same results as Simulation.run
+    :rtype: tuple
+    """
+    key = configuration_key(configuration)
+    packed = cache.get(key)
+    if packed is None:
+        packed = pack_results(Simulation(**configuration).run(update_func=update_func))
+        cache.put(key, packed)
+    return unpack_results(packed)
@@ -0,0 +1,159 @@
+from bisect import bisect_left, bisect_right
+from datetime import date
+from array import array
+from heapq import heappush, heappop
+import math
+
+from planner.transaction import Transaction
+
+TRANSACTION_EVENT = 0
+MORTGAGE_EVENT = 1
+# Asset maturity runs ahead of every transaction of a step
+STEP_MATURITY_PRIORITY = -math.inf
+
+class EventScheduler:
+    """ Merge of the compiled execution calendars of transactions
+
+    Entries are keyed by (date ordinal, event type, priority, order)
+    so popping a day gives transactions in the same order as sorting
+    the day's ready list by priority, followed by mortgages in
+    their listed order.  Each transaction has one entry queued, for
+    its next date in its fire_calendar.
+
+    With step days, every date of a calendar is moved to the first
+    step day on or after it, so each entry stands for all of the
+    transaction's executions within that step.  Asset maturity then
+    executes first, growing the balance the step opened with.
+    """
+
+    def __init__(self, transactions: list, mortgages: list, first_date: date, last_date: date, step_days: array = None):
+        """ Schedule the first execution of every transaction
+
+        :param transactions: (order, transaction) of transactions to schedule
+        :type transactions: list
+        :param mortgages: mortgages to schedule
+        :type mortgages: list
+        :param first_date: first simulated date
+        :type first_date: date
+        :param last_date: last simulated date
+        :type last_date: date
+        :param step_days: ascending ordinals ending with last_date, default every day
+        :type step_days: array
+        """
+        self.last_date = last_date
+        self.last_day = last_date.toordinal()
+        self.step_days = step_days
+        self.queue = []
+        # Position in each calendar of the queued entry by (event type, order)
+        self.cursors = {}
+        # Calendar dates the queued entry stands for by (event type, order)
+        self.executions = {}
+        for order, transaction in transactions:
+            priority = transaction.priority
+            if step_days is not None and transaction.asset_maturity:
+                priority = STEP_MATURITY_PRIORITY
+            self.schedule(TRANSACTION_EVENT, priority, order, transaction, first_date)
+        for order, mortgage in enumerate(mortgages):
+            self.schedule(MORTGAGE_EVENT, 0, order, mortgage, first_date)
+
+    def schedule(self, event_type: int, priority: int, order: int, transaction: Transaction, current_date: date):
+        """ Queue first execution of a transaction on or after a date
+
+        :param event_type: TRANSACTION_EVENT or MORTGAGE_EVENT
+        :type event_type: int
+        :param priority: execution priority within a day
+        :type priority: int
+        :param order: position in the original list, breaks priority ties
+        :type order: int
+        :param transaction: transaction to schedule
+        :type transaction: Transaction
+        :param current_date: earliest date to schedule on
+        :type current_date: date
+        """
+        index = bisect_left(transaction.fire_calendar, current_date.toordinal())
+        self.push(event_type, priority, order, transaction, index)
+
+    def push(self, event_type: int, priority: int, order: int, transaction: Transaction, index: int):
+        """ Queue an execution from a transaction's calendar
+
+        :param event_type: TRANSACTION_EVENT or MORTGAGE_EVENT
+        :type event_type: int
+        :param priority: execution priority within a day
+        :type priority: int
+        :param order: position in the original list, breaks priority ties
+        :type order: int
+        :param transaction: transaction to schedule
+        :type transaction: Transaction
+        :param index: position in the calendar, nothing is queued past its end
+        :type index: int
+        """
+        calendar = transaction.fire_calendar
+        if index < len(calendar) and calendar[index] <= self.last_day:
+            day = calendar[index]
+            if self.step_days is not None:
+                day = self.step_days[bisect_left(self.step_days, day)]
+                following = bisect_right(calendar, day, index)
+                self.executions[(event_type, order)] = following - index
+                # Cursor on the last date within the step
+                index = following - 1
+            heappush(self.queue, (day, event_type, priority, order, transaction))
+            self.cursors[(event_type, order)] = index
+
+    def next_day(self) -> int:
+        """ Day of the next queued execution
+
+        :return: date ordinal of the next execution, None if queue is empty
+        :rtype: int
+        """
+        if len(self.queue) == 0:
+            return None
+        return self.queue[0][0]
+
+    def pop_day(self, day: int) -> tuple:
+        """ Get the transactions and mortgages that execute on a date
+
+        :param day: ordinal of the date being simulated
+        :type day: int
+        :return: ordered transactions and ordered mortgages
+        :rtype: tuple
+
+        Mortgages only execute if they still have a balance.  Popped
+        entries are queued again by reschedule.
+        """
+        transactions = []
+        mortgages = []
+        while len(self.queue) > 0 and self.queue[0][0] == day:
+            entry = heappop(self.queue)
+            if entry[1] == TRANSACTION_EVENT:
+                transactions.append(entry)
+            else:
+                mortgages.append(entry)
+        return transactions, mortgages
+
+    def reschedule(self, entries: list):
+        """ Queue the following execution of popped entries
+
+        :param entries: entries returned by pop_day
+        :type entries: list
+        """
+        for _, event_type, priority, order, transaction in entries:
+            self.push(event_type, priority, order, transaction, self.cursors[(event_type, order)] + 1)
+
+def format_calendars(transactions: list, limit: int = 6) -> str:
+    """ Readable listing of compiled execution calendars
+
+    :param transactions: set up transactions and mortgages
+    :type transactions: list
+    :param limit: number of dates shown from the start of each calendar
+    :type limit: int
+    :return: one line per transaction
+    :rtype: str
+    """
+    lines = []
+    for transaction in transactions:
+        dates = transaction.calendar_dates()
+        shown = ", ".join([d.isoformat() for d in dates[:limit]])
+        if len(dates) > limit:
+            shown += f", ... {dates[-1].isoformat()}"
+        lines.append(f"{transaction.name} ({transaction.frequency}, {len(dates)} dates): {shown}")
+    return "\n".join(lines)
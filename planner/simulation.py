@@ -1,57 +1,50 @@
-from datetime import date
-from dateutil.relativedelta import relativedelta 
-from typing import List, Dict, Union
+from datetime import date, timedelta
+from typing import List, Dict, Union, Any
 from copy import deepcopy
+from collections import deque
+from itertools import islice
+from array import array
+from bisect import bisect_left
+from time import perf_counter
 
-from pydantic import BaseModel
-from tqdm import tqdm
+from pydantic import BaseModel, Field
+from strenum import StrEnum
 
 from planner.asset import Asset
+from planner.ledger import AssetLedger, TransactionLedger
 from planner.interest_rate import InterestRate
-from planner.common import DEFAULT_INTEREST, ZERO
-from planner.transaction import Transaction, InsufficientBalanceException, TransactionGroup
+from planner.common import DEFAULT_INTEREST, ZERO, boundary_tables
+from planner.transaction import Transaction, InsufficientBalanceException, TransactionGroup, sepp_payments
 from planner.mortgage import Mortgage
 from planner.income_taxes import IncomeTaxCaculator
-from planner.action_log import ActionLog
+from planner.action_log import ActionLogger
+from planner.sinks import ResultSink
+from planner.scheduler import EventScheduler
+from planner.maturity import MaturityModeEnum, DeferredMaturity, deferrable, END_OF_DAY
+from planner.checkpoint import SimulationCheckpoint
+from planner.profiling import RunProfiler, ProfilePhaseEnum
 
 ZERO_INTEREST_RATE = InterestRate(name=DEFAULT_INTEREST)
 
-class ActionLogger:
+def consume(iterator, steps: int = None):
+    """ Advance an iterator without using its values
 
-    def __init__(self):
-        self.action_logs = {}
-        self.year = None
+    :param iterator: iterator to advance
+    :param steps: number of steps, None to exhaust
+    :type steps: int
+    """
+    if steps is None:
+        deque(iterator, maxlen=0)
+    else:
+        deque(islice(iterator, steps), maxlen=0)
 
-    def set_year(self, year: int):
-        """ set year on logger
+class LedgerModeEnum(StrEnum):
+    float = "float"
+    cents = "cents"
 
-        :param year: year of action(s)
-        :type year: int
-        """
-        self.year = year
-        self.action_logs[self.year] = []
-
-    def add_action_log(self, action_log: ActionLog):
-        """ Assess and add action log to list if good
-
-        :param action_log: action log dictionary
-        :type action_log: ActionLog
-
-        We don't want $0.00 actions
-        """
-        if action_log.amount == ZERO:
-            return
-        self.action_logs[self.year].append(action_log)
-
-    def flatten_logs(self) -> list:
-        sorted_years = list(self.action_logs.keys())
-        sorted_years.sort()
-        flat_list = []
-        for key in sorted_years:
-            flat_list.extend([
-                l.to_dict() for l in self.action_logs[key]
-            ])
-        return flat_list
+class StepModeEnum(StrEnum):
+    daily = "daily"
+    monthly = "monthly"
 
 class Simulation(BaseModel):
     start: date
@@ -63,6 +56,13 @@ class Simulation(BaseModel):
     mortgages: List[Mortgage] = []
     federal_income_taxes: IncomeTaxCaculator = None
     state_income_taxes: IncomeTaxCaculator = None
+    maturity_mode: MaturityModeEnum = MaturityModeEnum.daily
+    log_actions: bool = True
+    ledger_mode: LedgerModeEnum = LedgerModeEnum.float
+    step_mode: StepModeEnum = StepModeEnum.daily
+    checkpoints: Dict[date, Any] = {} # Private
+    ledger: Any = Field(None, exclude=True) # Private
+    transaction_ledger: Any = Field(None, exclude=True) # Private
 
     def __init__(self, *args, **kwargs):
         """Initialization with setup
@@ -79,9 +79,16 @@ class Simulation(BaseModel):
         # Setup defualt 0 interest rate
         self.interest_rates.append(ZERO_INTEREST_RATE)
         interest_rate_dict = {i.name: i for i in self.interest_rates}
+        for interest_rate in self.interest_rates:
+            interest_rate.compile_schedule(self.start.year, self.end.year)
         # for asset in self.assets:
         #     asset.get_interest_rate(interest_rate_dict)
         asset_dict = {a.name: a for a in self.assets}
+        # Every running balance in one ledger
+        self.ledger = AssetLedger(self.assets)
+        if self.ledger_mode == LedgerModeEnum.cents:
+            for asset in self.assets:
+                asset.use_cents_ledger()
         self.transactions = self._flatten_transactions()
         for transaction in self.transactions:
             transaction.setup(self.start, self.end, asset_dict, interest_rate_dict, self.dates)
@@ -99,12 +106,19 @@ class Simulation(BaseModel):
                 transaction.donation_transaction = donation_transaction
         for mortgage in self.mortgages:
             mortgage.setup(self.start, self.end, asset_dict, interest_rate_dict, self.dates)
+        # Every transaction's run state in one ledger
+        self.transaction_ledger = TransactionLedger(
+            self.transactions
+            + [t.donation_transaction for t in self.transactions if t.donation_transaction is not None]
+            + self.mortgages
+        )
+        # Rates are linked first so setup can build the yearly tax tables
         if self.federal_income_taxes is not None:
-            self.federal_income_taxes.setup(asset_dict, self.start.year)        
             self.federal_income_taxes.get_interest_rate(interest_rate_dict)
+            self.federal_income_taxes.setup(asset_dict, self.start.year, self.end.year)
         if self.state_income_taxes is not None:
-            self.state_income_taxes.setup(asset_dict, self.start.year)
             self.state_income_taxes.get_interest_rate(interest_rate_dict)
+            self.state_income_taxes.setup(asset_dict, self.start.year, self.end.year)
 
     def _flatten_transactions(self):
         new_list = []
@@ -115,143 +129,323 @@ class Simulation(BaseModel):
                 new_list.append(entry)
         return new_list
 
-    def run(self, update_func = None) -> tuple:
+    def _next_simulated_day(self, scheduler: EventScheduler, next_day: int, last_day: int, month_ends: array, checkpoint_days: deque = None) -> int:
+        """ Find the next date on which anything can happen
+
+        :param scheduler: scheduler of transaction executions
+        :type scheduler: EventScheduler
+        :param next_day: ordinal of the date following the last simulated date
+        :type next_day: int
+        :param last_day: ordinal of the last date of the simulation
+        :type last_day: int
+        :param month_ends: ascending month end ordinals through last_day
+        :type month_ends: array
+        :param checkpoint_days: ordered ordinals still to be checkpointed
+        :type checkpoint_days: deque
+        :return: ordinal of the next date to simulate, None if simulation is complete
+        :rtype: int
+        """
+        if next_day > last_day:
+            return None
+        candidates = []
+        month_end_index = bisect_left(month_ends, next_day)
+        if month_end_index < len(month_ends):
+            candidates.append(month_ends[month_end_index])
+        if scheduler.next_day() is not None:
+            candidates.append(scheduler.next_day())
+        if checkpoint_days:
+            candidates.append(checkpoint_days[0])
+        if len(candidates) == 0:
+            return None
+        next_simulated_day = min(candidates)
+        if next_simulated_day > last_day:
+            return None
+        return next_simulated_day
+
+    def run(self, update_func = None, state_sink: ResultSink = None, action_sink: ResultSink = None, checkpoint: SimulationCheckpoint = None, stop_date: date = None, checkpoint_dates: list = None, profiler: RunProfiler = None) -> tuple:
         """ Run simulation from start to end
 
+        :param state_sink: destination for monthly asset states, default keep in memory
+        :type state_sink: ResultSink
+        :param action_sink: destination for change logs, default keep in memory
+        :type action_sink: ResultSink
+        :param checkpoint: state to continue from the day after, default start fresh
+        :type checkpoint: SimulationCheckpoint
+        :param stop_date: last date to simulate, default simulation end
+        :type stop_date: date
+        :param checkpoint_dates: dates to capture state at the end of into checkpoints
+        :type checkpoint_dates: list
+        :param profiler: collects phase timings and counters, default none
+        :type profiler: RunProfiler
         :return: number of days in simulation execution, periodic asset state, change logs
         :rtype: tuple
 
-        Each day:
+        With sinks, asset states and actions are written as the run
+        progresses instead of being returned, actions once a chunk
+        of them has been logged.  Sinks are flushed but not closed.
+
+        Only days with a possible transaction or mortgage execution,
+        month end or year end are simulated, the rest have no effect.
+        Each simulated day:
 
         1. Execute Transactions
         2. Execute Mortgages
-        3. Mature Assets
+        3. Calculate income taxes at year end
 
         Capture asset state monthly
+
+        A continued run only returns asset states and actions from
+        after the checkpoint, the returned days count from the start.
+
+        In monthly step mode only month ends and the last date are
+        simulated.  Every execution within a month happens on its
+        last day, fixed amounts are multiplied by the number of
+        executions.  Asset maturity compounds the balance the month
+        opened with for the whole month, then everything else runs in
+        priority order.  Checkpoints are only taken at steps.
         """
-        current_date = self.start
-        current_month = self.start.month
+        run_started = perf_counter()
         days = 0
         asset_states = []
-        action_logger = ActionLogger()
-        action_logger.set_year(current_date.year)
+        # SEPP payments are fixed within a run, not across runs
+        sepp_payments.clear()
+        action_logger = ActionLogger(self.log_actions)
         error_raised = None
         mortgage_interest = 0.0
-        #while current_date <= self.end and error_raised is None:
+        first_date = self.start
+        if checkpoint is not None:
+            checkpoint.restore(self)
+            action_logger.tax_totals.set_state(checkpoint.tax_totals)
+            mortgage_interest = checkpoint.mortgage_interest
+            first_date = checkpoint.date + timedelta(days=1)
+            days = (first_date - self.start).days
+        action_logger.set_year(first_date.year)
+        self.checkpoints = {}
         
         total_days = (self.end - self.start).days
         generator = range(total_days)
         if update_func is None:
+            # Imported here as only console runs show progress
+            from tqdm import tqdm
             generator = tqdm(generator, desc="Running simulation for each day...")
         else:
             generator = update_func(generator)
-        for _ in generator:
-            next_date = current_date + relativedelta(days=1)
-            last_day_of_month = False
-            year_ended = False
-            if next_date.month != current_month:
-                last_day_of_month = True
-            if next_date.year != current_date.year:
-                year_ended = True
-            ready_transactions = []
-            for transaction in self.transactions:
-                if transaction.executable(current_date):
-                    ready_transactions.append(
-                        (transaction.priority, transaction)
-                    )
-            ready_transactions.sort(key=lambda tup: tup[0])
-            for _, transaction in ready_transactions:
-                try:
-                    # TODO: Still do better on assuring this does not partially complete
-                    # Maybe need to do withdrawal first now that order is fixed?
-                    deposit_amount = None
-                    withdrawal_amount = None
-                    donation_amount = None
-                    if transaction.destination is not None:
-                        deposit_amount = transaction.get_amount(current_date, True)
-                    if transaction.source is not None:
-                        withdrawal_amount = transaction.get_amount(current_date, False)
-                    if transaction.donation_factor is not None:
-                        donation_amount = transaction.get_amount(current_date, False, is_donation=True)
-                    if deposit_amount is not None:
-                        _, _, transaction_log = transaction.destination.execute_transaction(deposit_amount, transaction, True, current_date)
-                        action_logger.add_action_log(transaction_log)
-                    if withdrawal_amount is not None:
-                        _, _, transaction_log = transaction.source.execute_transaction(withdrawal_amount, transaction, False, current_date)
-                        action_logger.add_action_log(transaction_log)
-                    if donation_amount is not None:
-                        _, _, transaction_log = transaction.donation_transaction.source.execute_transaction(donation_amount, transaction.donation_transaction, False, current_date)
-                        action_logger.add_action_log(transaction_log)
-                except InsufficientBalanceException as e:
-                    error_raised = e
-                    break
-            
-            for mortgage in self.mortgages:
-                if mortgage.executable(current_date):
-                    # Order is important here, change source then destination
-                    # mortgage amount based on remaining balance of debt, so change debt second
+        progress = iter(generator)
+        consume(progress, days)
+        last_date = self.start + timedelta(days=total_days - 1)
+        if stop_date is not None:
+            last_date = min(last_date, stop_date)
+        pending_checkpoints = deque(sorted([d.toordinal() for d in checkpoint_dates or [] if first_date <= d <= last_date]))
+        # The loop runs on date ordinals, dates are only made for the
+        # transactions, logs and results of simulated days
+        start_day = self.start.toordinal()
+        last_day = last_date.toordinal()
+        month_ends, year_ends = boundary_tables(first_date, last_date)
+        month_end_days = set(month_ends)
+        step_days = None
+        if self.step_mode == StepModeEnum.monthly:
+            step_days = array("i", month_ends)
+            if len(step_days) == 0 or step_days[-1] != last_day:
+                step_days.append(last_day)
+            for checkpoint_day in pending_checkpoints:
+                if checkpoint_day not in month_end_days:
+                    raise(ValueError(f"Checkpoint date {date.fromordinal(checkpoint_day)} is not a month end, monthly steps only checkpoint month ends"))
+        scheduled_transactions = []
+        deferred_transactions = []
+        for order, transaction in enumerate(self.transactions):
+            if self.maturity_mode == MaturityModeEnum.deferred and deferrable(transaction):
+                deferred_transactions.append((order, transaction))
+            else:
+                scheduled_transactions.append((order, transaction))
+        scheduler = EventScheduler(scheduled_transactions, self.mortgages, first_date, last_date, step_days)
+        executions = 1
+        deferred_maturity = DeferredMaturity(deferred_transactions, action_logger, self.start, last_date, maturity_first=step_days is not None)
+        # Point in the schedule everything has executed up to
+        executed_limit = END_OF_DAY
+        try:
+            day = None
+            if checkpoint is not None:
+                day = self._next_simulated_day(scheduler, first_date.toordinal(), last_day, month_ends, pending_checkpoints)
+            elif total_days > 0 and first_date <= last_date:
+                day = start_day if step_days is None else step_days[0]
+            while day is not None:
+                current_date = date.fromordinal(day)
+                last_day_of_month = day in month_end_days
+                year_ended = day in year_ends
+                if profiler is not None:
+                    started = perf_counter()
+                # Compiled calendars give only transactions executing today
+                transaction_entries, mortgage_entries = scheduler.pop_day(day)
+                if profiler is not None:
+                    profiler.count_scheduled(started, transaction_entries)
+                for _, event_type, priority, order, transaction in transaction_entries:
+                    if step_days is not None:
+                        executions = scheduler.executions[(event_type, order)]
                     try:
-                        payment_amount = mortgage.get_amount(current_date, False)
-                        principal_amount = mortgage.get_amount(current_date, True)
-                        mortgage_interest += mortgage.payment_interest
-                        _, _, mortgage_log = mortgage.source.execute_transaction(payment_amount, mortgage, False, current_date)
-                        action_logger.add_action_log(mortgage_log)
-                        _, _, mortgage_log = mortgage.destination.execute_transaction(principal_amount, mortgage, True, current_date)
-                        action_logger.add_action_log(mortgage_log)
+                        deferred_maturity.mature(transaction.source, current_date, (priority, order))
+                        deferred_maturity.mature(transaction.destination, current_date, (priority, order))
+                        if transaction.donation_transaction is not None:
+                            deferred_maturity.mature(transaction.donation_transaction.source, current_date, (priority, order))
+                        # TODO: Still do better on assuring this does not partially complete
+                        # Maybe need to do withdrawal first now that order is fixed?
+                        if profiler is not None:
+                            started = perf_counter()
+                        deposit_amount = None
+                        withdrawal_amount = None
+                        donation_amount = None
+                        if transaction.destination is not None:
+                            deposit_amount = transaction.get_amount(current_date, True, executions=executions)
+                        if transaction.source is not None:
+                            withdrawal_amount = transaction.get_amount(current_date, False, executions=executions)
+                        if transaction.donation_factor is not None:
+                            donation_amount = transaction.get_amount(current_date, False, is_donation=True, executions=executions)
+                        if profiler is not None:
+                            started = profiler.add(ProfilePhaseEnum.get_amount, started, transaction)
+                        if deposit_amount is not None:
+                            _, amount = transaction.destination.execute_transaction(deposit_amount, transaction, True, current_date)
+                            action_logger.add_action(current_date, amount, transaction.destination.name, transaction)
+                        if withdrawal_amount is not None:
+                            _, amount = transaction.source.execute_transaction(withdrawal_amount, transaction, False, current_date)
+                            action_logger.add_action(current_date, amount, transaction.source.name, transaction)
+                        if donation_amount is not None:
+                            _, amount = transaction.donation_transaction.source.execute_transaction(donation_amount, transaction.donation_transaction, False, current_date)
+                            action_logger.add_action(current_date, amount, transaction.donation_transaction.source.name, transaction.donation_transaction)
+                        if profiler is not None:
+                            profiler.add(ProfilePhaseEnum.execute_transaction, started, transaction)
                     except InsufficientBalanceException as e:
                         error_raised = e
+                        # Nothing later in the day executed
+                        executed_limit = (priority, order)
                         break
             
-            if year_ended:
-                if self.federal_income_taxes is not None:
-                    tax_transaction, deposit = self.federal_income_taxes.calculate_taxes(
-                        action_logger.action_logs[current_date.year], 
-                        current_date.year,
-                        True,
-                        mortgage_interest,
-                        self.start,
-                    )
-                    # Pydantic won't allow direct assignment
-                    # the way the delayed assignment is handled
-                    tax_transaction.interest_rate = ZERO_INTEREST_RATE
-                    try:
-                        tax_transaction_amount = tax_transaction.get_amount(current_date, deposit)
-                        _, _, transaction_log = tax_transaction.source.execute_transaction(tax_transaction_amount, tax_transaction, deposit, current_date)
-                        action_logger.add_action_log(transaction_log)
-                    except InsufficientBalanceException as e:
-                        error_raised = e
-                if self.state_income_taxes is not None:
-                    tax_transaction, deposit = self.state_income_taxes.calculate_taxes(
-                        action_logger.action_logs[current_date.year],
-                        current_date.year,
-                        False,
-                        mortgage_interest,
-                        self.start,
-                    )
-                    # Pydantic won't allow direct assignment
-                    # the way the delayed assignment is handled
-                    tax_transaction.interest_rate = ZERO_INTEREST_RATE
-                    try:
-                        tax_transaction_amount = tax_transaction.get_amount(current_date, deposit)
-                        _, _, transaction_log = tax_transaction.source.execute_transaction(tax_transaction_amount, tax_transaction, deposit, current_date)
-                        action_logger.add_action_log(transaction_log)
-                    except InsufficientBalanceException as e:
-                        error_raised = e
-                action_logger.set_year(next_date.year)
-                mortgage_interest = 0.0
+                for entry in mortgage_entries:
+                    if profiler is not None:
+                        started = perf_counter()
+                    mortgage = entry[-1]
+                    deferred_maturity.mature(mortgage.source, current_date, executed_limit)
+                    deferred_maturity.mature(mortgage.destination, current_date, executed_limit)
+                    if mortgage.has_balance():
+                        # Order is important here, change source then destination
+                        # mortgage amount based on remaining balance of debt, so change debt second
+                        try:
+                            row = mortgage.amortization_row(current_date)
+                            if row is not None:
+                                _, payment_amount, interest, principal_amount, _ = row
+                            else:
+                                payment_amount, interest, principal_amount = mortgage.payment_split(mortgage.destination.f_balance, current_date)
+                            mortgage_interest += interest
+                            _, amount = mortgage.source.execute_transaction(payment_amount, mortgage, False, current_date)
+                            action_logger.add_action(current_date, amount, mortgage.source.name, mortgage)
+                            _, amount = mortgage.destination.execute_transaction(principal_amount, mortgage, True, current_date)
+                            action_logger.add_action(current_date, amount, mortgage.destination.name, mortgage)
+                            if profiler is not None:
+                                profiler.count_execution(mortgage)
+                        except InsufficientBalanceException as e:
+                            error_raised = e
+                            break
+                    if profiler is not None:
+                        profiler.add(ProfilePhaseEnum.mortgages, started, mortgage)
+                scheduler.reschedule(transaction_entries + mortgage_entries)
+            
+                if year_ended or last_day_of_month:
+                    if profiler is not None:
+                        started = perf_counter()
+                    deferred_maturity.mature_all(self.assets, current_date, executed_limit)
+                    if profiler is not None:
+                        profiler.add(ProfilePhaseEnum.maturity, started)
+                if year_ended:
+                    if profiler is not None:
+                        started = perf_counter()
+                    if self.federal_income_taxes is not None:
+                        tax_transaction, deposit = self.federal_income_taxes.calculate_taxes(
+                            action_logger.tax_totals,
+                            current_date.year,
+                            True,
+                            mortgage_interest,
+                            self.start,
+                        )
+                        # Pydantic won't allow direct assignment
+                        # the way the delayed assignment is handled
+                        tax_transaction.interest_rate = ZERO_INTEREST_RATE
+                        try:
+                            tax_transaction_amount = tax_transaction.get_amount(current_date, deposit)
+                            _, amount = tax_transaction.source.execute_transaction(tax_transaction_amount, tax_transaction, deposit, current_date)
+                            action_logger.add_action(current_date, amount, tax_transaction.source.name, tax_transaction)
+                        except InsufficientBalanceException as e:
+                            error_raised = e
+                    if self.state_income_taxes is not None:
+                        tax_transaction, deposit = self.state_income_taxes.calculate_taxes(
+                            action_logger.tax_totals,
+                            current_date.year,
+                            False,
+                            mortgage_interest,
+                            self.start,
+                        )
+                        # Pydantic won't allow direct assignment
+                        # the way the delayed assignment is handled
+                        tax_transaction.interest_rate = ZERO_INTEREST_RATE
+                        try:
+                            tax_transaction_amount = tax_transaction.get_amount(current_date, deposit)
+                            _, amount = tax_transaction.source.execute_transaction(tax_transaction_amount, tax_transaction, deposit, current_date)
+                            action_logger.add_action(current_date, amount, tax_transaction.source.name, tax_transaction)
+                        except InsufficientBalanceException as e:
+                            error_raised = e
+                    action_logger.set_year(current_date.year + 1)
+                    mortgage_interest = 0.0
+                    if profiler is not None:
+                        profiler.add(ProfilePhaseEnum.taxes, started)
             
-            if last_day_of_month:
-                for asset in self.assets:                                        
-                    asset_states.append(asset.get_state(current_date))
+                if action_sink is not None and len(action_logger) >= action_sink.chunk_size:
+                    action_sink.write_columns(action_logger.pop_columns())
+                if last_day_of_month:
+                    if profiler is not None:
+                        started = perf_counter()
+                    states = [asset.get_state(current_date) for asset in self.assets]
+                    if state_sink is None:
+                        asset_states.extend(states)
+                    else:
+                        state_sink.write(states)
+                    if profiler is not None:
+                        profiler.add(ProfilePhaseEnum.snapshots, started)
             
-            current_date = next_date
-            current_month = current_date.month            
-            days += 1
+                simulated_days = day - start_day + 1
+                consume(progress, simulated_days - days)
+                days = simulated_days
+
+                if error_raised is not None:
+                    print("Simulation was unable to complete due to error:")
+                    print(error_raised)
+                    break
+
+                if pending_checkpoints and pending_checkpoints[0] == day:
+                    pending_checkpoints.popleft()
+                    self.checkpoints[current_date] = SimulationCheckpoint.capture(
+                        self,
+                        current_date,
+                        mortgage_interest,
+                        action_logger.tax_totals.get_state(),
+                        action_logger.logged_count,
+                    )
+
+                day = self._next_simulated_day(scheduler, day + 1, last_day, month_ends, pending_checkpoints)
 
-            if error_raised is not None:
-                print("Simulation was unable to complete due to error:")
-                print(error_raised)
-                break
+            if error_raised is None:
+                # Remaining days have nothing to execute
+                simulated_days = last_day - start_day + 1
+                consume(progress, simulated_days - days)
+                days = simulated_days
+            if days > 0:
+                deferred_maturity.mature_all(self.assets, self.start + timedelta(days=days - 1), executed_limit)
+        finally:
+            # Keep partial results when the run stops early
+            if action_sink is not None:
+                action_sink.write_columns(action_logger.pop_columns())
+                action_sink.flush()
+            if state_sink is not None:
+                state_sink.flush()
+            if profiler is not None:
+                profiler.simulated_days += days
+                profiler.total_seconds += perf_counter() - run_started
 
         print("Summarizing simulation results...")
         if self.federal_income_taxes is not None:
@@ -262,4 +456,4 @@ class Simulation(BaseModel):
             state_tax_data = self.state_income_taxes.summarize()
         else:
             state_tax_data = None
-        return days, asset_states, action_logger.flatten_logs(), fed_tax_data, state_tax_data, error_raised
+        return days, asset_states, action_logger, fed_tax_data, state_tax_data, error_raised
@@ -0,0 +1,267 @@
+import csv
+import json
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+from strenum import StrEnum
+
+DEFAULT_CHUNK_SIZE = 10000
+
+class OutputFormatEnum(StrEnum):
+    csv = "csv"
+    parquet = "parquet"
+    jsonl = "jsonl"
+
+def plain_value(value):
+    """ Convert a result value to a JSON / Parquet friendly type
+
+    :param value: value from an asset state or action row
+    :return: float for Decimal, ISO string for date, otherwise unchanged
+    """
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+class ResultSink:
+    """ Destination for rows of results written in chunks
+
+    Rows are buffered and written every chunk_size rows so
+    memory use does not grow with the length of a simulation.
+    """
+
+    def __init__(self, path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """ Set up sink
+
+        :param path: file to write
+        :type path: Path
+        :param chunk_size: number of rows buffered before writing
+        :type chunk_size: int
+        """
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+        self.buffer = []
+        self.rows_written = 0
+
+    def write(self, rows: list):
+        """ Add rows, writing full chunks
+
+        :param rows: dictionary per row
+        :type rows: list
+        """
+        self.buffer.extend(rows)
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """ Write all buffered rows """
+        if len(self.buffer) == 0:
+            return
+        self.write_chunk(self.buffer)
+        self.rows_written += len(self.buffer)
+        self.buffer = []
+
+    def write_columns(self, columns: dict):
+        """ Write rows given as one list per column, in chunks
+
+        :param columns: values of each column, all of the same length
+        :type columns: dict
+
+        Buffered rows are written first to keep the order of rows.
+        """
+        self.flush()
+        row_count = len(next(iter(columns.values()), []))
+        for start in range(0, row_count, self.chunk_size):
+            self.write_column_chunk({
+                name: values[start:start + self.chunk_size]
+                for name, values in columns.items()
+            })
+        self.rows_written += row_count
+
+    def write_chunk(self, rows: list):
+        """ Write rows to the file
+
+        :param rows: dictionary per row
+        :type rows: list
+        """
+        raise(NotImplementedError)
+
+    def write_column_chunk(self, columns: dict):
+        """ Write rows given as columns to the file
+
+        :param columns: values of each column
+        :type columns: dict
+
+        Formats without a columnar writer write the rows.
+        """
+        names = list(columns)
+        self.write_chunk([dict(zip(names, values)) for values in zip(*columns.values())])
+
+    def close(self):
+        """ Write remaining rows and close the file """
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+class CsvSink(ResultSink):
+    """ Rows written to a CSV file, header from the first row """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.file = open(self.path, "w", newline="")
+        self.writer = None
+
+    def write_chunk(self, rows: list):
+        if self.writer is None:
+            self.writer = csv.DictWriter(self.file, fieldnames=list(rows[0].keys()))
+            self.writer.writeheader()
+        self.writer.writerows(rows)
+        self.file.flush()
+
+    def write_column_chunk(self, columns: dict):
+        if self.writer is None:
+            self.writer = csv.DictWriter(self.file, fieldnames=list(columns))
+            self.writer.writeheader()
+        # Rows are already in field order
+        self.writer.writer.writerows(zip(*columns.values()))
+        self.file.flush()
+
+    def close(self):
+        super().close()
+        self.file.close()
+
+class JsonLinesSink(ResultSink):
+    """ Rows written as one JSON object per line """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.file = open(self.path, "w")
+
+    def write_chunk(self, rows: list):
+        self.file.writelines([
+            json.dumps({k: plain_value(v) for k, v in row.items()}) + "\n"
+            for row in rows
+        ])
+        self.file.flush()
+
+    def close(self):
+        super().close()
+        self.file.close()
+
+class ParquetSink(ResultSink):
+    """ Rows written as Parquet row groups, requires pyarrow
+
+    Without a schema, column types come from the rows.  Chunks are
+    held until every column has had a value, so a column which is
+    empty in the first chunk still gets the type of its values.
+    """
+
+    def __init__(self, *args, schema = None, **kwargs):
+        """ Set up sink
+
+        :param schema: pyarrow schema of the rows, default from the rows
+        :type schema: pyarrow.Schema
+        """
+        super().__init__(*args, **kwargs)
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise(ImportError("pyarrow is required for Parquet output, install it or choose another output format"))
+        self.pyarrow = pyarrow
+        self.schema = schema
+        self.writer = None
+        # Chunks waiting for the type of every column
+        self.pending = []
+
+    def write_chunk(self, rows: list):
+        self.write_table(self.pyarrow.Table.from_pylist([
+            {k: plain_value(v) for k, v in row.items()}
+            for row in rows
+        ], schema=self.schema))
+
+    def write_column_chunk(self, columns: dict):
+        self.write_table(self.pyarrow.Table.from_pydict({
+            name: [plain_value(v) for v in values]
+            for name, values in columns.items()
+        }, schema=self.schema))
+
+    def write_table(self, table):
+        """ Write a chunk once the type of every column is known
+
+        :param table: rows of the chunk
+        :type table: pyarrow.Table
+        """
+        if self.writer is not None:
+            self.writer.write_table(table.cast(self.writer.schema))
+            return
+        self.pending.append(table)
+        schema = self.pyarrow.unify_schemas([t.schema for t in self.pending])
+        if not any([self.pyarrow.types.is_null(field.type) for field in schema]):
+            self.open_writer(schema)
+
+    def open_writer(self, schema):
+        """ Start the file and write the pending chunks
+
+        :param schema: schema of every chunk
+        :type schema: pyarrow.Schema
+        """
+        self.writer = self.pyarrow.parquet.ParquetWriter(self.path, schema)
+        for table in self.pending:
+            self.writer.write_table(table.cast(schema))
+        self.pending = []
+
+    def close(self):
+        super().close()
+        if self.writer is None and len(self.pending) > 0:
+            # Columns which never had a value stay untyped
+            self.open_writer(self.pyarrow.unify_schemas([t.schema for t in self.pending]))
+        if self.writer is not None:
+            self.writer.close()
+
+def write_csv(rows: list, path: Path):
+    """ Write rows to a CSV file without pandas
+
+    :param rows: dictionary per row
+    :type rows: list
+    :param path: file to write
+    :type path: Path
+
+    Columns are every key in order of first appearance, missing
+    values are left empty.
+    """
+    fieldnames = {}
+    for row in rows:
+        fieldnames.update(dict.fromkeys(row))
+    with open(path, "w", newline="") as f:
+        # Same line endings as the pandas files these replace
+        writer = csv.DictWriter(f, fieldnames=list(fieldnames), lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(rows)
+
+SINKS = {
+    OutputFormatEnum.csv: CsvSink,
+    OutputFormatEnum.parquet: ParquetSink,
+    OutputFormatEnum.jsonl: JsonLinesSink,
+}
+
+def make_sink(output_format: OutputFormatEnum, name: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> ResultSink:
+    """ Create a sink for a format
+
+    :param output_format: format of the file
+    :type output_format: OutputFormatEnum
+    :param name: file name without extension
+    :type name: str
+    :param chunk_size: number of rows buffered before writing
+    :type chunk_size: int
+    :return: sink writing to name with the format's extension
+    :rtype: ResultSink
+    """
+    output_format = OutputFormatEnum(output_format)
+    return SINKS[output_format](Path(f"{name}.{output_format}"), chunk_size=chunk_size)
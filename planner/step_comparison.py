@@ -0,0 +1,73 @@
+import contextlib
+import io
+
+from planner.simulation import Simulation, StepModeEnum
+from planner.profiling import RunProfiler, ProfilePhaseEnum
+from planner.sweep import summarize_run
+
+def run_step_mode(configuration: dict, step_mode: StepModeEnum) -> tuple:
+    """ Run a configuration quietly in one step mode
+
+    :param configuration: combined configuration
+    :type configuration: dict
+    :param step_mode: step mode to run in
+    :type step_mode: StepModeEnum
+    :return: run summary with steps and seconds, month end asset states
+    :rtype: tuple
+    """
+    profiler = RunProfiler()
+    with contextlib.redirect_stdout(io.StringIO()):
+        simulation = Simulation(**dict(configuration, step_mode=step_mode, log_actions=False))
+        days, asset_states, _, fed_tax_data, state_tax_data, error_raised = simulation.run(
+            update_func=lambda generator: generator,
+            profiler=profiler,
+        )
+    summary = {
+        "step_mode": str(step_mode),
+        "steps": profiler.phase_counts[ProfilePhaseEnum.scheduling],
+        "seconds": profiler.total_seconds,
+    }
+    summary.update(summarize_run(simulation, days, fed_tax_data, state_tax_data, error_raised))
+    return summary, asset_states
+
+def compare_step_modes(configuration: dict) -> tuple:
+    """ Difference between monthly and daily steps of the same plan
+
+    :param configuration: combined configuration
+    :type configuration: dict
+    :return: run summary per step mode, dictionary per asset of
+        final balances, their difference and the largest month end
+        difference
+    :rtype: tuple
+
+    Differences are monthly less daily.  Month end balances are only
+    compared while both runs were still going.
+    """
+    summaries = []
+    balances = []
+    for step_mode in [StepModeEnum.daily, StepModeEnum.monthly]:
+        summary, asset_states = run_step_mode(configuration, step_mode)
+        summaries.append(summary)
+        balances.append({(s["date"], s["name"]): float(s["balance"]) for s in asset_states})
+    daily_balances, monthly_balances = balances
+    rows = {}
+    for (state_date, name), daily_balance in daily_balances.items():
+        row = rows.setdefault(name, {
+            "name": name,
+            "date": None,
+            "daily_balance": None,
+            "monthly_balance": None,
+            "difference": None,
+            "max_difference": 0.0,
+        })
+        if (state_date, name) not in monthly_balances:
+            continue
+        difference = monthly_balances[(state_date, name)] - daily_balance
+        if abs(difference) > abs(row["max_difference"]):
+            row["max_difference"] = difference
+        if row["date"] is None or state_date > row["date"]:
+            row["date"] = state_date
+            row["daily_balance"] = daily_balance
+            row["monthly_balance"] = monthly_balances[(state_date, name)]
+            row["difference"] = difference
+    return summaries, list(rows.values())
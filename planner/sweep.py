@@ -0,0 +1,180 @@
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
+from datetime import timedelta
+from itertools import product
+import contextlib
+import io
+import os
+
+from tqdm import tqdm
+
+from planner.simulation import Simulation
+from planner.asset import PrematureWithdrawalException
+
+NAMED_SECTIONS = [
+    "transactions",
+    "mortgages",
+    "interest_rates",
+    "assets",
+]
+
+def expand_grid(grid: dict) -> list:
+    """ Expand a grid of override values to every combination
+
+    :param grid: override values, see apply_overrides for the layout
+    :type grid: dict
+    :return: list of dictionaries of override key to value
+    :rtype: list
+
+    Example grid::
+
+        dates:
+            retirement: [2031-01-01, 2033-01-01]
+        transactions:
+            Groceries:
+                amount: [500.00, 600.00]
+        interest_rates:
+            stocks:
+                rate: [5.0, 7.0]
+        end: [2060-01-01]
+    """
+    axes = []
+    for section, section_values in grid.items():
+        if section == "dates":
+            for name, values in section_values.items():
+                axes.append((f"dates.{name}", values))
+        elif section in NAMED_SECTIONS:
+            for name, fields in section_values.items():
+                for field, values in fields.items():
+                    axes.append((f"{section}.{name}.{field}", values))
+        else:
+            axes.append((section, section_values))
+    keys = [key for key, _ in axes]
+    return [dict(zip(keys, values)) for values in product(*[values for _, values in axes])]
+
+def find_named(entries: list, name: str) -> list:
+    """ Find configuration entries by name, including nested transactions
+
+    :param entries: configuration entries
+    :type entries: list
+    :param name: name to find
+    :type name: str
+    :return: matching entries
+    :rtype: list
+    """
+    found = []
+    for entry in entries:
+        if entry.get("name") == name:
+            found.append(entry)
+        found.extend(find_named(entry.get("sub_transactions", []), name))
+    return found
+
+def apply_overrides(configuration: dict, overrides: dict) -> dict:
+    """ Apply override values to a copy of a configuration
+
+    :param configuration: combined configuration
+    :type configuration: dict
+    :param overrides: dictionary of override key to value
+    :type overrides: dict
+    :return: configuration with overrides applied
+    :rtype: dict
+
+    Keys are ``dates.<name>``, ``<section>.<name>.<field>`` for named
+    entries of transactions, mortgages, interest_rates and assets, or
+    a top level configuration key such as ``end``.
+    """
+    configuration = deepcopy(configuration)
+    for key, value in overrides.items():
+        parts = key.split(".")
+        if parts[0] == "dates":
+            configuration.setdefault("dates", {})[parts[1]] = value
+        elif parts[0] in NAMED_SECTIONS:
+            entries = find_named(configuration[parts[0]], parts[1])
+            if len(entries) == 0:
+                raise(ValueError(f"Sweep override {key} does not match any entry in {parts[0]}"))
+            for entry in entries:
+                entry[parts[2]] = value
+        else:
+            configuration[key] = value
+    return configuration
+
+def summarize_run(simulation: Simulation, days: int, fed_tax_data: list, state_tax_data: list, error_raised: Exception) -> dict:
+    """ Summarize a completed simulation run
+
+    :param simulation: simulation that was run
+    :type simulation: Simulation
+    :param days: number of days simulated
+    :type days: int
+    :param fed_tax_data: yearly federal tax summaries
+    :type fed_tax_data: list
+    :param state_tax_data: yearly state tax summaries
+    :type state_tax_data: list
+    :param error_raised: error that ended the run early
+    :type error_raised: Exception
+    :return: final net worth, first failure date and lifetime taxes
+    :rtype: dict
+    """
+    first_failure_date = None
+    if error_raised is not None:
+        first_failure_date = simulation.start + timedelta(days=days - 1)
+    lifetime_taxes = 0.0
+    for tax_data in [fed_tax_data, state_tax_data]:
+        if tax_data is not None:
+            lifetime_taxes += sum([float(t["taxes"]) for t in tax_data])
+    return {
+        "final_net_worth": sum([a.f_balance for a in simulation.assets]),
+        "first_failure_date": first_failure_date,
+        "failure": None if error_raised is None else str(error_raised),
+        "lifetime_taxes": lifetime_taxes,
+    }
+
+def run_variation(configuration: dict) -> dict:
+    """ Run one simulation quietly and summarize it
+
+    :param configuration: combined configuration
+    :type configuration: dict
+    :return: run summary
+    :rtype: dict
+
+    A premature withdrawal ends the variation's run with the error
+    as its failure, other variations still run.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Summaries only need balances and taxes
+        simulation = Simulation(**dict(configuration, log_actions=False))
+        try:
+            days, _, _, fed_tax_data, state_tax_data, error_raised = simulation.run(update_func=lambda g: g)
+        except PrematureWithdrawalException as e:
+            return dict(summarize_run(simulation, 0, None, None, None), failure=str(e))
+    return summarize_run(simulation, days, fed_tax_data, state_tax_data, error_raised)
+
+def run_sweep(configuration: dict, grid: dict, workers: int = None) -> list:
+    """ Run every combination of a grid of overrides in parallel
+
+    :param configuration: combined base configuration
+    :type configuration: dict
+    :param grid: override values, see expand_grid
+    :type grid: dict
+    :param workers: number of worker processes, default every core
+    :type workers: int
+    :return: dictionary per combination of overrides and run summary
+    :rtype: list
+    """
+    variations = expand_grid(grid)
+    configurations = [apply_overrides(configuration, v) for v in variations]
+    if workers is None:
+        workers = os.cpu_count()
+    # Fewer round trips between processes for large sweeps
+    chunksize = max(1, len(configurations) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        summaries = list(tqdm(
+            executor.map(run_variation, configurations, chunksize=chunksize),
+            total=len(configurations),
+            desc="Running sweep variations...",
+        ))
+    rows = []
+    for overrides, summary in zip(variations, summaries):
+        row = overrides.copy()
+        row.update(summary)
+        rows.append(row)
+    return rows
@@ -1,20 +1,35 @@
+from array import array
+from bisect import bisect_left
 from decimal import Decimal
 from strenum import StrEnum
-from datetime import date
+from datetime import date, timedelta
 from typing import List, Union, Dict, Any
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from planner.common import (
     ZERO, 
     DateBaseModel,
     InsufficientBalanceException,
     amortorize,
+    next_day_of_month,
+    next_day_of_year,
 )
 from planner.life_expectancy import LIFE_EXPECTANCY
+from planner.ledger import TransactionLedger
 
 sepp_payments = {}
 
+def positive_part(amount: float) -> float:
+    """ Amount if it is positive
+
+    :param amount: amount
+    :type amount: float
+    :return: amount, 0.0 if it is not positive
+    :rtype: float
+    """
+    return amount if amount > 0.0 else 0.0
+
 class FrequencyEnum(StrEnum):
     monthly = "monthly"
     daily = "daily"
@@ -49,67 +64,199 @@ class Transaction(DateBaseModel):
     donation_source: str = None
     donation_name: str = ""
     donation_transaction: "Transaction" = None # Private
-    period_counter: int = 0 # Private
-    last_executed: date = None # Private
+    fire_calendar: Any = None # Private
+    ledger: Any = Field(None, exclude=True) # Private
+    ledger_index: int = None # Private
     raw_data: Dict[str, Any] = None    
 
     def __init__(self, **kwargs):
+        """ Transaction initialization
+
+        Run state is kept in a ledger, a simulation moves every
+        transaction into one.  A transaction used on its own gets a
+        ledger of its own on first use.
+        """
         super().__init__(**kwargs)
         self.raw_data = kwargs
 
-    def get_amount(self, current_date: date, deposit: bool, is_donation: bool = False) -> float:
-        """ Get transaction amount at current point in time
+    def ledger_state(self) -> tuple:
+        """ Run state to move into a ledger
+
+        :return: period counter, last execution date and running
+            present value date, the configured values before the
+            transaction has a ledger
+        :rtype: tuple
+        """
+        if self.ledger is None:
+            return 0, None, self.present_value_date
+        return self.period_counter, self.last_executed, self.value_date
+
+    def own_ledger(self) -> TransactionLedger:
+        """ Move the run state into a ledger of its own
+
+        :return: new ledger
+        :rtype: TransactionLedger
+        """
+        return TransactionLedger([self])
+
+    def copy(self, *args, **kwargs) -> "Transaction":
+        """ Copy which changes independently of the original
+
+        :return: copy with its run state in its own ledger
+        :rtype: Transaction
+        """
+        copied = super().copy(*args, **kwargs)
+        copied.own_ledger()
+        return copied
+
+    def __copy__(self) -> "Transaction":
+        copied = super().__copy__()
+        copied.own_ledger()
+        return copied
+
+    @property
+    def period_counter(self) -> int:
+        """ Executions since the last period started
+
+        :return: period counter
+        :rtype: int
+        """
+        if self.ledger is None:
+            self.own_ledger()
+        return self.ledger.period_counters[self.ledger_index]
+
+    @period_counter.setter
+    def period_counter(self, value: int):
+        if self.ledger is None:
+            self.own_ledger()
+        self.ledger.period_counters[self.ledger_index] = value
+
+    @property
+    def last_executed(self) -> date:
+        """ Date of the last execution
+
+        :return: last execution date, None before the first
+        :rtype: date
+        """
+        if self.ledger is None:
+            self.own_ledger()
+        return self.ledger.last_executed[self.ledger_index]
+
+    @last_executed.setter
+    def last_executed(self, value: date):
+        if self.ledger is None:
+            self.own_ledger()
+        self.ledger.last_executed[self.ledger_index] = value
+
+    @property
+    def value_date(self) -> date:
+        """ Running present value date, moved by asset maturity
+
+        :return: date amounts are valued at
+        :rtype: date
+        """
+        if self.ledger is None:
+            self.own_ledger()
+        return self.ledger.value_dates[self.ledger_index]
+
+    @value_date.setter
+    def value_date(self, value: date):
+        if self.ledger is None:
+            self.own_ledger()
+        self.ledger.value_dates[self.ledger_index] = value
+
+    def mark_executed(self, current_date: date):
+        """ Record an execution which completes a period
+
+        :param current_date: date of execution
+        :type current_date: date
+        """
+        if self.ledger is None:
+            self.own_ledger()
+        self.ledger.last_executed[self.ledger_index] = current_date
+        self.ledger.period_counters[self.ledger_index] = 0
+
+    def requested_amount(self, current_date: date, source_balance: float, destination_balance: float, grow, payments: dict, positive = positive_part, executions: int = 1) -> float:
+        """ Amount before it is limited by the source balance
 
         :param current_date: date to assess amount
         :type current_date: date
-        :param deposit: whether the transaction is a deposit (true) or withdrawal (false)
-        :type deposit: bool
-        :return: value at requested date
+        :param source_balance: running balance of the source, None without one
+        :type source_balance: float
+        :param destination_balance: running balance of the destination, None without one
+        :type destination_balance: float
+        :param grow: future value of (present value, present date, future date)
+        :param payments: fixed SEPP payments by transaction name, filled on first use
+        :type payments: dict
+        :param positive: positive part of an amount, default positive_part
+        :param executions: number of executions made at once, only multiplies fixed amounts
+        :type executions: int
+        :return: requested amount
         :rtype: float
+
+        Balances are only used in arithmetic, grow and positive, so
+        the same rules give the amount of every Monte Carlo path from
+        arrays of balances.
         """
-        return_amount = 0.0
         if self.amount_remaining_balance:
-            source_remaining_balance = self.source.f_balance
-            if source_remaining_balance > 0.0:
-                return_amount = source_remaining_balance
+            return positive(source_balance)
         elif self.sepp_birth is not None and self.sepp_interest_rate_yearly is not None:
             try:
-                return_amount = sepp_payments[self.name]
+                return payments[self.name]
             except KeyError:
                 # hasn't been calculated yet
                 age = int((current_date - self.sepp_birth).days / 365.0)
                 age_factor = LIFE_EXPECTANCY[age]
-                return_amount = amortorize(
+                payments[self.name] = amortorize(
                     self.sepp_interest_rate_yearly / 100.0,
                     age_factor,
-                    self.source.f_balance
+                    source_balance,
                 )
-                sepp_payments[self.name] = return_amount
+                return payments[self.name]
         elif self.sepp_birth is not None:
             age = int((current_date - self.sepp_birth).days / 365.0)
             age_factor = LIFE_EXPECTANCY[age]
-            return_amount = self.source.f_balance / age_factor
+            return source_balance / age_factor
         elif self.amount_above is not None:
-            float_threshold = float(self.amount_above)
-            if self.source.f_balance >= float_threshold:
-                return_amount = self.source.f_balance - float_threshold
+            return positive(source_balance - float(self.amount_above))
         elif self.maintain_balance is not None:
-            deposit_needed = float(self.maintain_balance) - self.destination.f_balance
-            if deposit_needed > 0.0:
-                return_amount = deposit_needed
+            return positive(float(self.maintain_balance) - destination_balance)
         elif self.asset_maturity:
-            return_amount = self.interest_rate.calculate_value(
-                float(self.destination.f_balance),
-                self.present_value_date,
-                current_date,
-            ) - self.destination.f_balance
-            self.present_value_date = current_date
-        else:
-            return_amount = self.interest_rate.calculate_value(
-                float(self.amount),
-                self.present_value_date,
-                current_date,
-            )
+            if self.ledger is None:
+                self.own_ledger()
+            value_dates = self.ledger.value_dates
+            return_amount = grow(destination_balance, value_dates[self.ledger_index], current_date) - destination_balance
+            value_dates[self.ledger_index] = current_date
+            return return_amount
+        # Only maturity moves the present value date
+        return grow(float(self.amount), self.present_value_date, current_date) * executions
+
+    def get_amount(self, current_date: date, deposit: bool, is_donation: bool = False, executions: int = 1) -> float:
+        """ Get transaction amount at current point in time
+
+        :param current_date: date to assess amount
+        :type current_date: date
+        :param deposit: whether the transaction is a deposit (true) or withdrawal (false)
+        :type deposit: bool
+        :param executions: number of executions made at once, only multiplies fixed amounts
+        :type executions: int
+        :return: value at requested date
+        :rtype: float
+        """
+        source_balance = None
+        if self.source is not None:
+            source_balance = self.source.f_balance
+        destination_balance = None
+        if self.destination is not None:
+            destination_balance = self.destination.f_balance
+        return_amount = self.requested_amount(
+            current_date,
+            source_balance,
+            destination_balance,
+            self.interest_rate.calculate_value,
+            sepp_payments,
+            executions=executions,
+        )
         if self.source is not None:
             if return_amount > self.source.f_balance:
                 if self.amount_required:
@@ -142,6 +289,7 @@ class Transaction(DateBaseModel):
         """
         if self.present_value_date is None:
             self.present_value_date = start_date
+        self.value_date = self.present_value_date
         if self.source is not None:
             try:
                 self.source = asset_dict[self.source]
@@ -171,6 +319,8 @@ class Transaction(DateBaseModel):
         self.get_interest_rate(interest_rates)
         self.setup_dates(start_date, end_date, date_dict)
         self.check()
+        # The simulation end date itself is not simulated
+        self.fire_calendar = self.compile_calendar(start_date, end_date - timedelta(days=1))
         if self.category is None:
             self.category = f"{self.name} (Uncategorized)"
 
@@ -205,41 +355,78 @@ class Transaction(DateBaseModel):
         :type current_date: date
         :return: true = should execute, false = should not
         :rtype: bool
+
+        Looks the date up in the compiled calendar.  Before setup the
+        calendar runs from start_date to end_date.
+        """
+        calendar = self.fire_calendar
+        if calendar is None:
+            calendar = self.compile_calendar(self.start_date, self.end_date)
+        day = current_date.toordinal()
+        index = bisect_left(calendar, day)
+        return index < len(calendar) and calendar[index] == day
+
+    def compile_calendar(self, first_date: date, last_date: date) -> array:
+        """ Every date the transaction executes on from a fresh setup
+
+        :param first_date: first simulated date
+        :type first_date: date
+        :param last_date: last date to include
+        :type last_date: date
+        :return: ascending date ordinals
+        :rtype: array
+
+        Only every frequency_periods-th matching date executes,
+        starting with the first.  Weekly and biweekly periods are
+        counted from the first start_date day of a month on or after
+        first_date.  The transaction is not changed.
         """
-        execute = False
-        if current_date >= self.start_date and current_date <= self.end_date:
-            if self.frequency == FrequencyEnum.daily:
-                execute = True
-            elif self.frequency == FrequencyEnum.yearly:
-                if current_date.day == self.start_date.day and current_date.month == self.start_date.month:
-                    execute = True
-            elif self.frequency == FrequencyEnum.monthly:
-                if current_date.day == self.start_date.day:
-                    execute = True
+        fire_days = array("i")
+        first_date = max(first_date, self.start_date)
+        last_date = min(last_date, self.end_date)
+        if first_date > last_date:
+            return fire_days
+        last_day = last_date.toordinal()
+        if self.frequency == FrequencyEnum.daily:
+            # The period counter starts full, so the first date always
+            # executes then every frequency_periods dates after
+            fire_days.extend(range(first_date.toordinal(), last_day + 1, self.frequency_periods))
+        elif self.frequency in [FrequencyEnum.weekly, FrequencyEnum.biweekly]:
+            first_execution = next_day_of_month(first_date, self.start_date.day, last_date)
+            if first_execution is None:
+                return fire_days
+            if self.frequency_periods == 1:
+                step = 14 if self.frequency == FrequencyEnum.biweekly else 7
+                fire_days.extend(range(first_execution.toordinal(), last_day + 1, step))
             else:
-                if self.last_executed is None:
-                    if self.frequency in [FrequencyEnum.biweekly, FrequencyEnum.weekly]:
-                        if current_date.day == self.start_date.day:
-                            execute = True
+                # Periods are counted from the last execution, which
+                # the skipped periods never move, so only the first runs
+                fire_days.append(first_execution.toordinal())
+        else:
+            candidates = []
+            current_date = first_date
+            while True:
+                if self.frequency == FrequencyEnum.monthly:
+                    candidate = next_day_of_month(current_date, self.start_date.day, last_date)
                 else:
-                    if self.frequency == FrequencyEnum.biweekly:
-                        if (current_date - self.last_executed).days == 14:
-                            execute = True
-                    elif self.frequency == FrequencyEnum.weekly:
-                        if (current_date - self.last_executed).days == 7:
-                            execute = True
-                    else:
-                        raise(ValueError(f"Unknown transaction frequency: {self.frequency}"))
-        if execute:
-            self.period_counter += 1
-            if self.period_counter >= self.frequency_periods:
-                self.period_counter = 0
-            else:
-                execute = False
-        if execute:
-            self.last_executed = current_date
-        return execute
-    
+                    candidate = next_day_of_year(current_date, self.start_date.month, self.start_date.day, last_date)
+                if candidate is None or candidate > last_date:
+                    break
+                candidates.append(candidate.toordinal())
+                current_date = candidate + timedelta(days=1)
+            fire_days.extend(candidates[::self.frequency_periods])
+        return fire_days
+
+    def calendar_dates(self) -> list:
+        """ Compiled execution dates
+
+        :return: dates the transaction executes on, empty before setup
+        :rtype: list
+        """
+        if self.fire_calendar is None:
+            return []
+        return [date.fromordinal(d) for d in self.fire_calendar]
+
     def to_dict(self) -> dict:
         """ Capturing static data
 
@@ -7,6 +7,6 @@ setup(
     author='Author Name',
     author_email='author@gmail.com',
     description='Description of my package',
-    packages=find_packages(),    
+    packages=find_packages(exclude=['benchmarks']),    
     install_requires=['pyyaml', 'pydantic'],
 )
\ No newline at end of file
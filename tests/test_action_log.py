@@ -0,0 +1,60 @@
+from datetime import date
+from decimal import Decimal
+
+from planner.action_log import ActionLogger, TaxAccumulator
+from planner.transaction import Transaction
+
+def test_action_logger():
+    salary = Transaction(
+        name="salary",
+        start_date=date(2023,1,1),
+        income_taxable=True,
+    )
+    rent = Transaction(
+        name="rent",
+        start_date=date(2023,1,1),
+    )
+    logger = ActionLogger()
+    logger.set_year(2023)
+    logger.add_action(date(2023,1,1), 1000.004, "Checking", salary)
+    logger.add_action(date(2023,1,1), -500.0, "Checking", rent)
+    # $0.00 actions are dropped
+    logger.add_action(date(2023,1,2), 0.001, "Checking", rent)
+    logger.set_year(2024)
+    logger.add_action(date(2024,1,1), -200.0, "Checking", salary)
+    assert(len(logger) == 3)
+    assert(logger.tax_totals.total(2023, "income_taxable") == Decimal("1000.00"))
+    # Only increases are taxable income
+    assert(logger.tax_totals.total(2024, "income_taxable") == Decimal("0.00"))
+    assert(logger.tax_totals.total(2025, "income_taxable") == Decimal("0.00"))
+    flat = logger.flatten_logs()
+    assert(flat[1]["transaction_name"] == "rent")
+    assert(flat[1]["amount"] == Decimal("-500.00"))
+    assert(flat[2]["date"] == date(2024,1,1))
+    data = logger.to_dataframe()
+    assert(list(data["transaction_name"]) == ["salary", "rent", "salary"])
+    assert(list(data["amount"]) == [1000.0, -500.0, -200.0])
+    assert(list(data["changed_item"]) == ["Checking"] * 3)
+    columns = logger.row_columns()
+    assert(list(columns) == list(flat[0]))
+    assert([dict(zip(columns, values)) for values in zip(*columns.values())] == flat)
+    assert(logger.pop_columns()["amount"] == [f["amount"] for f in flat])
+    assert(len(logger) == 0)
+    assert(logger.logged_count == 3)
+
+def test_tax_totals_without_logging():
+    payment = Transaction(
+        name="estimated tax",
+        start_date=date(2023,1,1),
+        fed_income_tax_payment=True,
+    )
+    logger = ActionLogger(log_actions=False)
+    logger.set_year(2023)
+    logger.add_action(date(2023,1,1), -1500.0, "Checking", payment)
+    logger.add_action(date(2023,4,1), -1500.0, "Checking", payment)
+    assert(len(logger) == 0)
+    assert(logger.tax_totals.total(2023, "fed_income_tax_payment") == Decimal("-3000.00"))
+    assert(logger.tax_totals.total(2023, "state_income_tax_payment") == Decimal("0.00"))
+    restored = TaxAccumulator()
+    restored.set_state(logger.tax_totals.get_state())
+    assert(restored.total(2023, "fed_income_tax_payment") == Decimal("-3000.00"))
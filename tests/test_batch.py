@@ -0,0 +1,40 @@
+import csv
+
+from planner.batch import read_manifest, run_batch, household_partition
+
+PLAN = """start: 2023-01-01
+end: 2024-01-01
+assets:
+    - name: Bank
+      balance: {balance}
+transactions:
+    - name: Rent
+      amount: 50.00
+      source: Bank
+"""
+
+def test_run_batch(tmp_path):
+    (tmp_path / "smith.yml").write_text(PLAN.format(balance="1000.00"))
+    (tmp_path / "jones.yml").write_text(PLAN.format(balance="100.00"))
+    (tmp_path / "bad.yml").write_text("assets:\n    - balance: 1.00\n")
+    (tmp_path / "manifest.yml").write_text("""households:
+    - id: smith
+      configs: [smith.yml]
+    - id: bad
+      configs: [bad.yml]
+    - id: jones
+      configs: [jones.yml]
+""")
+    households = read_manifest(tmp_path / "manifest.yml")
+    output_directory = tmp_path / "output"
+    # CSV by default, Parquet needs the optional pyarrow
+    rows = run_batch(households, output_directory, workers=2)
+    assert([r["household"] for r in rows] == ["smith", "bad", "jones"])
+    # A bad plan is reported without stopping the others
+    assert(rows[0]["error"] is None and rows[0]["failure"] is None)
+    assert(rows[1]["error"] is not None)
+    assert(rows[2]["error"] is None and rows[2]["failure"] is not None)
+    assert(all(r["seconds"] >= 0.0 for r in rows))
+    with open(household_partition(output_directory, "actions", "smith", "csv")) as f:
+        assert(len(list(csv.DictReader(f))) == 12)
+    assert(not household_partition(output_directory, "actions", "bad", "csv").exists())
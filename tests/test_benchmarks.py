@@ -0,0 +1,24 @@
+from benchmarks.synthetic import generate_plan
+from benchmarks.run import benchmark, regressions
+from planner import Simulation
+
+def test_generate_plan():
+    configuration = generate_plan(assets=3, transactions=10, group_depth=2, mortgages=1, years=2)
+    assert(configuration == generate_plan(assets=3, transactions=10, group_depth=2, mortgages=1, years=2))
+    simulation = Simulation(**configuration)
+    # Growth per extra asset, the transactions and four leaves of the group
+    assert(len(simulation.assets) == 4)
+    assert(len(simulation.transactions) == 2 + 10 + 4)
+    assert(len(simulation.mortgages) == 1)
+    result = benchmark(configuration)
+    assert(result["days"] == 731)
+    assert(result["actions"] > 0)
+
+def test_regressions():
+    baseline = {"small": {"setup_seconds": 0.001, "run_seconds": 1.0, "columns_seconds": 0.1, "csv_seconds": 0.1}}
+    results = {"small": {"setup_seconds": 0.0011, "run_seconds": 1.1, "columns_seconds": 0.1, "csv_seconds": 0.2}}
+    assert(regressions(results, baseline, 0.2) == ["small csv_seconds: 0.2000s is 2.00x the 0.1000s baseline"])
+    # Only the ratio counts, however short the stage
+    results["small"]["setup_seconds"] = 0.005
+    assert(len(regressions(results, baseline, 0.2)) == 2)
+    assert(regressions(results, {}, 0.2) == [])
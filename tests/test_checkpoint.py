@@ -0,0 +1,71 @@
+from datetime import date
+
+import yaml
+
+from planner import Simulation
+from planner.checkpoint import SimulationCheckpoint
+
+def configuration(retirement: str) -> dict:
+    return yaml.safe_load(f"""start: 2023-01-01
+end: 2027-01-01
+dates:
+    retirement: {retirement}
+interest_rates:
+    - name: stocks
+      rate: 6.0
+assets:
+    - name: Bank
+      balance: 1000.00
+    - name: Brokerage
+      balance: 50000.00
+transactions:
+    - name: Brokerage growth
+      destination: Brokerage
+      frequency: daily
+      asset_maturity: True
+      interest_rate: stocks
+    - name: Salary
+      amount: 4000.00
+      destination: Bank
+      income_taxable: True
+      end: retirement
+    - name: Rent
+      amount: 1500.00
+      source: Bank
+      frequency: biweekly
+    - name: Retirement draw
+      amount: 3500.00
+      source: Brokerage
+      destination: Bank
+      start: retirement
+federal_income_taxes:
+    source: Bank
+""")
+
+def test_resume():
+    simulation = Simulation(**configuration("2025-01-01"))
+    checkpoint_date = date(2024, 3, 15)
+    days, _, _, fed_tax_data, _, _ = simulation.run(checkpoint_dates=[checkpoint_date])
+    checkpoint = SimulationCheckpoint.from_bytes(simulation.checkpoints[checkpoint_date].to_bytes())
+    assert(checkpoint.date == checkpoint_date)
+    resumed = Simulation(**configuration("2025-01-01"))
+    resumed_days, asset_states, _, resumed_tax_data, _, _ = resumed.run(checkpoint=checkpoint)
+    assert(resumed_days == days)
+    assert(resumed_tax_data == fed_tax_data)
+    assert(asset_states[0]["date"] == date(2024, 3, 31))
+    for asset, resumed_asset in zip(simulation.assets, resumed.assets):
+        assert(asset.f_balance == resumed_asset.f_balance)
+
+def test_branch():
+    # Shared history up to the end of 2023, then different retirement dates
+    base = Simulation(**configuration("2025-01-01"))
+    days, _, _, _, _, _ = base.run(stop_date=date(2023, 12, 31), checkpoint_dates=[date(2023, 12, 31)])
+    assert(days == 365)
+    checkpoint = base.checkpoints[date(2023, 12, 31)]
+    for retirement in ["2024-06-01", "2026-01-01"]:
+        full = Simulation(**configuration(retirement))
+        full.run()
+        branch = Simulation(**configuration(retirement))
+        branch.run(checkpoint=checkpoint)
+        for asset, branch_asset in zip(full.assets, branch.assets):
+            assert(asset.f_balance == branch_asset.f_balance)
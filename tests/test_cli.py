@@ -0,0 +1,33 @@
+from pathlib import Path
+import subprocess
+import sys
+
+# Cumulative microseconds to import cli.py, far above the measured
+# cost so only pulling heavy modules back into startup fails
+IMPORT_TIME_BUDGET = 150000
+HEAVY_MODULES = ["pandas", "numpy", "pydantic", "tqdm", "yaml", "dateutil"]
+ROOT = Path(__file__).parent.parent
+
+def test_import_time():
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import sys, cli; print(sorted(set({HEAVY_MODULES!r}) & set(sys.modules)))"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert(result.stdout.strip() == "[]")
+    cli_line = [l for l in result.stderr.splitlines() if l.split("|")[-1].strip() == "cli"][0]
+    assert(int(cli_line.split("|")[1]) < IMPORT_TIME_BUDGET)
+
+def test_help():
+    result = subprocess.run([sys.executable, "cli.py", "--help"], cwd=ROOT, capture_output=True, text=True)
+    assert(result.returncode == 0)
+    assert("--output_format" in result.stdout)
+
+def test_conflicting_options():
+    # Options a mode does not use stop the run instead of being ignored
+    for arguments in [["-c", "plan.yml", "--profile", "amortization"], ["-f", "parquet", "batch", "manifest.yml"], ["-c", "plan.yml", "-m", "10", "--cache_dir", "cache"]]:
+        result = subprocess.run([sys.executable, "cli.py"] + arguments, cwd=ROOT, capture_output=True, text=True)
+        assert(result.returncode == 2)
+        assert("cannot be used with" in result.stderr)
@@ -0,0 +1,76 @@
+import os
+
+from planner import config_reading
+from planner.config_reading import read_configuration, load_configuration_file, load_simulation
+
+ASSETS = """assets:
+    - name: Bank
+      balance: 100.00
+"""
+
+TRANSACTIONS = """transactions:
+    - name: a
+      amount: {amount}
+      destination: Bank
+"""
+
+def write_plan(tmp_path, amount: str):
+    (tmp_path / "assets.yml").write_text(ASSETS)
+    (tmp_path / "transactions.yml").write_text(TRANSACTIONS.format(amount=amount))
+    (tmp_path / "list.yml").write_text("- assets.yml\n- transactions.yml\n")
+
+def test_changed_files_parsed(tmp_path, monkeypatch):
+    write_plan(tmp_path, "50.00")
+    configuration = read_configuration([], tmp_path / "list.yml", cache_directory=tmp_path / "cache")
+    assert(configuration["transactions"][0]["amount"] == 50.0)
+    # Results are copies so editing one does not change the cache
+    configuration["transactions"][0]["amount"] = 0.0
+    parsed = []
+    load_yaml = config_reading.load_yaml
+    def counting_load_yaml(text):
+        parsed.append(text)
+        return load_yaml(text)
+    monkeypatch.setattr(config_reading, "load_yaml", counting_load_yaml)
+    config_reading._parsed_fragments.clear()
+    configuration = read_configuration([], tmp_path / "list.yml", cache_directory=tmp_path / "cache")
+    assert(configuration["transactions"][0]["amount"] == 50.0)
+    assert(len(parsed) == 0)
+    # Touched but unchanged files are hashed, not parsed
+    os.utime(tmp_path / "assets.yml", ns=(0, 0))
+    load_configuration_file(tmp_path / "assets.yml")
+    assert(len(parsed) == 0)
+    (tmp_path / "transactions.yml").write_text(TRANSACTIONS.format(amount="75.00"))
+    configuration = read_configuration([], tmp_path / "list.yml")
+    assert(configuration["transactions"][0]["amount"] == 75.0)
+    assert(len(parsed) == 1)
+
+def test_load_simulation(tmp_path):
+    write_plan(tmp_path, "50.00")
+    configuration = read_configuration([], tmp_path / "list.yml")
+    configuration["start"] = "2023-01-01"
+    configuration["end"] = "2024-01-01"
+    simulation = load_simulation(configuration)
+    cached_simulation = load_simulation(configuration)
+    assert(cached_simulation is not simulation)
+    assert(cached_simulation.dict() == simulation.dict())
+    asset_states = simulation.run()[1]
+    # Running a copy leaves the kept simulation unrun
+    assert(load_simulation(configuration).dict() == cached_simulation.dict())
+    assert(cached_simulation.run()[1] == asset_states)
+
+def test_rate_schedule_file(tmp_path):
+    (tmp_path / "rates").mkdir()
+    (tmp_path / "rates" / "returns.csv").write_text("year,stocks\n2020,10.0\n2021,-5.0\n")
+    (tmp_path / "rates" / "rates.yml").write_text("interest_rates:\n    - name: stocks\n      schedule_file: returns.csv\n")
+    configuration = read_configuration([tmp_path / "rates" / "rates.yml"], None)
+    # Files are relative to the YAML and read into the configuration
+    assert(configuration["interest_rates"][0] == {"name": "stocks", "schedule": {2020: 10.0, 2021: -5.0}})
+
+def test_kept_simulations_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(config_reading, "MAX_VALIDATED_SIMULATIONS", 2)
+    config_reading._validated_simulations.clear()
+    write_plan(tmp_path, "50.00")
+    configuration = read_configuration([], tmp_path / "list.yml")
+    for year in range(2023, 2026):
+        load_simulation(dict(configuration, start=f"{year}-01-01", end=f"{year + 1}-01-01"))
+    assert(len(config_reading._validated_simulations) == 2)
@@ -1,8 +1,25 @@
 from planner.income_taxes import IncomeTaxCaculator
+from planner.interest_rate import InterestRate
 
 def test_FederalIncomeTaxCaculator():
     calculator = IncomeTaxCaculator()
     taxes = calculator.calculate_taxes(100.00)
     assert(taxes == 10.00)
     taxes = calculator.calculate_taxes(11700.00)
-    assert(taxes == 1160.0 + 12.0)
\ No newline at end of file
+    assert(taxes == 1160.0 + 12.0)
+
+def test_year_tables():
+    calculator = IncomeTaxCaculator(source="Bank")
+    calculator.get_interest_rate({"Default_Interest": InterestRate(name="Default_Interest", rate=0.0)})
+    calculator.setup({"Bank": "Bank"}, 2024, 2026)
+    assert(sorted(calculator.year_tables.keys()) == [2024, 2025, 2026])
+    taxes, max_rate, balance_at_max_rate = calculator.bracket_taxes(2024, 100.00)
+    assert(abs(taxes - 10.00) < 1e-9)
+    assert(max_rate == 0.10)
+    taxes, max_rate, balance_at_max_rate = calculator.bracket_taxes(2024, 11700.00)
+    assert(abs(taxes - (1160.0 + 12.0)) < 1e-9)
+    assert(max_rate == 0.12)
+    assert(abs(balance_at_max_rate - 100.00) < 1e-9)
+    assert(calculator.marginal_rate(2025, 50000.00) == 0.22)
+    # Years outside the simulation are built when needed
+    assert(calculator.marginal_rate(2030, 0.0) == 0.37)
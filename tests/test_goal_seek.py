@@ -0,0 +1,79 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+import yaml
+
+from planner import Simulation
+from planner.asset import PrematureWithdrawalException
+from planner.goal_seek import GoalSeeker, run_goal_seek
+from planner.sweep import apply_overrides
+
+CONFIGURATION = yaml.safe_load("""start: 2023-01-01
+end: 2030-01-01
+dates:
+    retirement: 2026-01-01
+assets:
+    - name: Bank
+      balance: 10000.00
+transactions:
+    - name: Salary
+      amount: 3000.00
+      destination: Bank
+      end: retirement
+    - name: Spending
+      amount: 2000.00
+      source: Bank
+""")
+
+def succeeds_with(configuration: dict, overrides: dict) -> bool:
+    return Simulation(**apply_overrides(configuration, overrides)).run()[-1] is None
+
+def succeeds(overrides: dict) -> bool:
+    return succeeds_with(CONFIGURATION, overrides)
+
+def test_max_amount():
+    seeker = GoalSeeker(CONFIGURATION, "transactions.Spending.amount")
+    amount = seeker.max_amount()
+    assert(amount == Decimal("1440.47"))
+    assert(succeeds({"transactions.Spending.amount": amount}))
+    assert(not succeeds({"transactions.Spending.amount": amount + Decimal("0.01")}))
+
+def test_max_amount_premature_withdrawal():
+    configuration = yaml.safe_load("""start: 2023-01-01
+end: 2024-01-01
+assets:
+    - name: Roth
+      balance: 30000.00
+      contribution_balance: 10000.00
+      min_earnings_date: 2040-01-01
+transactions:
+    - name: Spending
+      amount: 500.00
+      source: Roth
+""")
+    seeker = GoalSeeker(configuration, "transactions.Spending.amount")
+    amount = seeker.max_amount()
+    # Larger amounts withdraw earnings before they are allowed
+    assert(amount == Decimal("833.33"))
+    assert(succeeds_with(configuration, {"transactions.Spending.amount": amount}))
+    with pytest.raises(PrematureWithdrawalException):
+        succeeds_with(configuration, {"transactions.Spending.amount": amount + Decimal("0.01")})
+
+def test_earliest_date():
+    seeker = GoalSeeker(CONFIGURATION, "dates.retirement")
+    retirement = seeker.earliest_date()
+    assert(retirement == date(2027, 5, 1))
+    assert(succeeds({"dates.retirement": retirement}))
+    assert(not succeeds({"dates.retirement": retirement - timedelta(days=1)}))
+
+def test_configured_dates():
+    seeker = GoalSeeker(dict(CONFIGURATION, start="2023-01-01"), "dates.retirement")
+    # Strings and dates read the same as in a Simulation
+    assert((seeker.start, seeker.end) == (date(2023, 1, 1), date(2030, 1, 1)))
+
+def test_run_goal_seek():
+    grid = {"transactions": {"Spending": {"amount": [1500.00, 2000.00, 5000.00]}}}
+    rows = run_goal_seek(CONFIGURATION, "dates.retirement", grid, workers=2)
+    assert([r["dates.retirement"] for r in rows] == [date(2026, 3, 1), date(2027, 5, 1), None])
+    assert(all(r["error"] is None for r in rows))
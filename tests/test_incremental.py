@@ -0,0 +1,69 @@
+from datetime import date
+from decimal import Decimal
+
+import yaml
+
+from planner import Simulation
+from planner.incremental import IncrementalRunner, first_affected_date
+
+CONFIGURATION = """start: 2023-01-01
+end: 2030-01-01
+dates:
+    retirement: 2027-01-01
+interest_rates:
+    - name: stocks
+      rate: 6.0
+assets:
+    - name: Bank
+      balance: 1000.00
+    - name: Brokerage
+      balance: 200000.00
+transactions:
+    - name: Brokerage growth
+      destination: Brokerage
+      frequency: daily
+      asset_maturity: True
+      interest_rate: stocks
+    - name: Salary
+      amount: 4000.00
+      destination: Bank
+      income_taxable: True
+      end: retirement
+    - name: Rent
+      amount: 1500.00
+      source: Bank
+      frequency: biweekly
+    - name: Retirement draw
+      amount: 3500.00
+      source: Brokerage
+      destination: Bank
+      start: retirement
+federal_income_taxes:
+    source: Bank
+"""
+
+def edit(simulation: Simulation) -> Simulation:
+    simulation.transactions[3].amount = Decimal("3000.00")
+    return simulation
+
+def test_first_affected_date():
+    configuration = yaml.safe_load(CONFIGURATION)
+    assert(first_affected_date(Simulation(**configuration), Simulation(**configuration)) is None)
+    assert(first_affected_date(Simulation(**configuration), edit(Simulation(**configuration))) == date(2027, 1, 1))
+    edited = Simulation(**configuration)
+    edited.transactions[1].end_date = date(2026, 6, 1)
+    assert(first_affected_date(Simulation(**configuration), edited) == date(2026, 6, 2))
+    edited = Simulation(**configuration)
+    edited.assets[0].f_balance = 2000.0
+    assert(first_affected_date(Simulation(**configuration), edited) == date(2023, 1, 1))
+
+def test_incremental_run():
+    configuration = yaml.safe_load(CONFIGURATION)
+    runner = IncrementalRunner(configuration)
+    days, asset_states, action_logger, fed_tax_data, _, error_raised = runner.run(edit(Simulation(**configuration)))
+    full_days, full_asset_states, full_action_logger, full_fed_tax_data, _, full_error_raised = edit(Simulation(**configuration)).run()
+    assert(days == full_days)
+    assert(asset_states == full_asset_states)
+    assert(action_logger.flatten_logs() == full_action_logger.flatten_logs())
+    assert(fed_tax_data == full_fed_tax_data)
+    assert(error_raised is None and full_error_raised is None)
@@ -1,4 +1,6 @@
+from datetime import date, timedelta
 from decimal import Decimal
+import math
 
 from planner.interest_rate import InterestRate
 from planner.common import ZERO
@@ -14,4 +16,45 @@ def test_interest_rate():
 def test_daily_rate():
     new_rate = 7.0
     interest_rate = InterestRate(name="test", rate=new_rate)
-    assert(interest_rate.daily_rate == (new_rate / 100.0) / 365.0)
\ No newline at end of file
+    assert(interest_rate.daily_rate == (new_rate / 100.0) / 365.0)
+
+def test_growth_factor():
+    interest_rate = InterestRate(name="test", rate=7.0)
+    start = date(2023, 1, 1)
+    for days in [1, 1, 31, 365, 365, 10000]:
+        expected = 1000.0 * math.pow(1 + interest_rate.daily_rate, days)
+        # Remembered factors give exactly the calculated value
+        assert(interest_rate.calculate_value(1000.0, start, start + timedelta(days=days)) == expected)
+    assert(set(interest_rate.growth_factors.keys()) == {1, 31, 365, 10000})
+    # Remembered factors are not configuration
+    assert(interest_rate.dict() == InterestRate(name="test", rate=7.0).dict())
+    interest_rate.rate = 3.0
+    assert(interest_rate.growth_factor(365) == math.pow(1 + interest_rate.daily_rate, 365))
+
+def test_schedule():
+    interest_rate = InterestRate(name="test", rate=2.0, schedule={2024: 10.0, 2026: 5.0})
+    interest_rate.compile_schedule(2023, 2030)
+    assert([interest_rate.rate_in_year(y) for y in range(2022, 2028)] == [2.0, 2.0, 10.0, 10.0, 5.0, 5.0])
+    # Growth over rate changes is the product of the growth in each year
+    expected = 100.0
+    for year in range(2023, 2028):
+        expected = InterestRate(name="year", rate=interest_rate.rate_in_year(year)).calculate_value(
+            expected, date(year, 1, 1), date(year + 1, 1, 1)
+        )
+    value = interest_rate.calculate_value(100.0, date(2023, 1, 1), date(2028, 1, 1))
+    assert(math.isclose(value, expected, rel_tol=1e-12))
+    # Outside the table the first and last rates continue
+    before = InterestRate(name="before", rate=2.0).calculate_value(100.0, date(2000, 1, 1), date(2001, 1, 1))
+    assert(math.isclose(interest_rate.calculate_value(100.0, date(2000, 1, 1), date(2001, 1, 1)), before, rel_tol=1e-12))
+    after = InterestRate(name="after", rate=5.0).calculate_value(100.0, date(2040, 3, 1), date(2045, 3, 1))
+    assert(math.isclose(interest_rate.calculate_value(100.0, date(2040, 3, 1), date(2045, 3, 1)), after, rel_tol=1e-12))
+
+def test_schedule_file(tmp_path):
+    schedule_path = tmp_path / "returns.csv"
+    schedule_path.write_text("year,stocks,inflation\n1928,43.8,-1.2\n1929,-8.3,0.6\n1930,-25.1,-6.4\n")
+    interest_rate = InterestRate(name="stocks", rate=7.0, schedule_file=str(schedule_path), schedule_column="stocks", schedule_start=1929)
+    interest_rate.compile_schedule(2025, 2030)
+    # Simulated years replay the history from 1929
+    assert([interest_rate.rate_in_year(y) for y in range(2024, 2028)] == [43.8, -8.3, -25.1, -25.1])
+    expected = InterestRate(name="year", rate=-8.3).calculate_value(100.0, date(2025, 1, 1), date(2026, 1, 1))
+    assert(math.isclose(interest_rate.calculate_value(100.0, date(2025, 1, 1), date(2026, 1, 1)), expected, rel_tol=1e-12))
@@ -0,0 +1,63 @@
+from datetime import date
+import copy
+
+import yaml
+
+from planner import Simulation
+from planner.asset import Asset
+from planner.transaction import Transaction
+
+def test_simulation_ledger():
+    simulation = Simulation(**yaml.safe_load("""start: 2023-01-01
+end: 2024-01-01
+assets:
+    - name: Bank
+      balance: 100.00
+    - name: Savings
+      balance: 50.00
+      contribution_balance: 20.00
+transactions:
+    - name: a
+      amount: 5.00
+      source: Bank
+      destination: Savings
+"""))
+    bank, savings = simulation.assets
+    # Every asset of a simulation keeps its balances in one ledger
+    assert(bank.ledger is simulation.ledger and savings.ledger is simulation.ledger)
+    assert(simulation.ledger.balances.tolist() == [100.0, 50.0])
+    assert(simulation.ledger.contributions.tolist() == [100.0, 20.0])
+    simulation.run()
+    assert(simulation.ledger.balances.tolist() == [bank.f_balance, savings.f_balance] == [40.0, 110.0])
+    assert(simulation.ledger.contributions.tolist() == [40.0, 80.0])
+    # Configured values are not running state
+    assert(savings.contribution_balance == 80.0)
+    assert(savings.initial_contribution_balance == 20.0)
+    assert("ledger" not in savings.dict())
+    # Dumps keep the configured name
+    assert(savings.dict()["contribution_balance"] == 20.0)
+    assert(savings.model_dump()["contribution_balance"] == 20.0)
+    # Transactions keep their run state in one ledger as well
+    transaction = simulation.transactions[0]
+    assert(transaction.ledger is simulation.transaction_ledger)
+    assert(simulation.transaction_ledger.value_dates == [date(2023, 1, 1)])
+    assert(transaction.value_date == transaction.present_value_date)
+    assert("ledger" not in transaction.dict())
+
+def test_ledger_move():
+    asset = Asset(name="a", balance="100.00")
+    transaction = Transaction(name="t")
+    # Ledgers are only made for assets used outside a simulation
+    assert(asset.ledger is None)
+    # Copies keep their balances in a ledger of their own
+    for copied in [asset.copy(), copy.copy(asset), asset.model_copy()]:
+        copied.execute_transaction(25.0, transaction, True, date(2023, 1, 1))
+        assert(copied.ledger is not asset.ledger)
+        assert(copied.f_balance == 125.0 and copied.contribution_balance == 125.0)
+        assert(asset.f_balance == 100.0 and asset.contribution_balance == 100.0)
+    # As does the run state of copied transactions
+    transaction.mark_executed(date(2023, 1, 1))
+    for copied in [transaction.copy(), copy.copy(transaction), transaction.model_copy()]:
+        copied.mark_executed(date(2023, 2, 1))
+        assert(copied.ledger is not transaction.ledger)
+        assert(transaction.last_executed == date(2023, 1, 1))
@@ -0,0 +1,128 @@
+from datetime import date
+
+import yaml
+import pytest
+
+from planner import Simulation
+from planner.monte_carlo import MonteCarlo
+
+CONFIGURATION = """start: 2023-01-01
+end: 2033-01-01
+interest_rates:
+    - name: stocks
+      rate: 7.0
+      volatility: {volatility}
+assets:
+    - name: Brokerage
+      balance: 100000.00
+transactions:
+    - name: Growth
+      destination: Brokerage
+      frequency: daily
+      asset_maturity: True
+      interest_rate: stocks
+    - name: Spending
+      amount: 1000.00
+      source: Brokerage
+"""
+
+def test_fixed_rate_matches_simulation():
+    configuration = yaml.safe_load(CONFIGURATION.format(volatility=0.0))
+    _, asset_states, _, _, _, _ = Simulation(**configuration).run()
+    _, asset_bands, _, failure_probability = MonteCarlo(Simulation(**configuration), 3).run()
+    assert(failure_probability == 0.0)
+    assert(len(asset_bands) == len(asset_states))
+    for state, band in zip(asset_states, asset_bands):
+        assert(state["date"] == band["date"])
+        assert(abs(float(state["balance"]) - band["p5"]) < 0.01)
+        assert(abs(float(state["balance"]) - band["p95"]) < 0.01)
+
+def test_volatile_rate():
+    configuration = yaml.safe_load(CONFIGURATION.format(volatility=20.0))
+    _, asset_bands, yearly_failures, failure_probability = MonteCarlo(Simulation(**configuration), 500, seed=1).run()
+    _, repeated_bands, _, repeated_probability = MonteCarlo(Simulation(**configuration), 500, seed=1).run()
+    assert(asset_bands == repeated_bands)
+    assert(failure_probability == repeated_probability)
+    assert(0.0 < failure_probability < 1.0)
+    assert(yearly_failures[-1]["failure_probability"] == failure_probability)
+    assert(asset_bands[-1]["p5"] < asset_bands[-1]["p50"] < asset_bands[-1]["p95"])
+
+def test_plan_rules_match_simulation():
+    # Taxes, mortgages and balance driven amounts follow the same rules
+    configuration = yaml.safe_load("""start: 2023-03-15
+end: 2030-01-01
+interest_rates:
+    - name: stocks
+      rate: 7.0
+    - name: inflation
+      rate: 3.0
+assets:
+    - name: Checking
+      balance: 20000.00
+    - name: Brokerage
+      balance: 100000.00
+    - name: Roth
+      balance: 30000.00
+      contribution_balance: 20000.00
+    - name: House Debt
+      balance: -200000.00
+      allow_negative_balance: True
+transactions:
+    - name: Growth
+      destination: Brokerage
+      frequency: daily
+      asset_maturity: True
+      interest_rate: stocks
+    - name: Salary
+      amount: 3000.00
+      destination: Checking
+      frequency: biweekly
+      income_taxable: True
+      interest_rate: inflation
+      priority: 10
+    - name: Spending
+      amount: 2000.00
+      source: Checking
+      interest_rate: inflation
+      fed_tax_deductable: True
+    - name: Sweep
+      amount_above: 30000.00
+      source: Checking
+      destination: Brokerage
+      priority: 200
+    - name: Top Up
+      maintain_balance: 10000.00
+      source: Brokerage
+      destination: Checking
+      priority: 150
+    - name: Roth Contributions
+      amount: 15000.00
+      amount_required: False
+      contributions_only: True
+      source: Roth
+      destination: Checking
+      frequency: yearly
+      start_date: 2028-01-10
+mortgages:
+    - name: House
+      source: Checking
+      destination: House Debt
+      loan_amount: 200000.00
+      loan_rate: 4.0
+      term_months: 120
+federal_income_taxes:
+    source: Checking
+    interest_rate: inflation
+    deductions:
+        - name: std
+          amount: 13850.00
+          interest_rate: inflation
+""")
+    _, asset_states, _, _, _, error_raised = Simulation(**configuration).run()
+    _, asset_bands, _, failure_probability = MonteCarlo(Simulation(**configuration), 2).run()
+    assert(error_raised is None and failure_probability == 0.0)
+    assert(len(asset_bands) == len(asset_states))
+    for state, band in zip(asset_states, asset_bands):
+        assert(state["date"] == band["date"] and state["name"] == band["name"])
+        # Simulations round taxes to cents
+        assert(abs(float(state["balance"]) - band["p50"]) < 1.0)
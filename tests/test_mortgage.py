@@ -1,9 +1,13 @@
 from decimal import Decimal
+from datetime import date
 
 import yaml
 
+from planner import Simulation
 from planner.mortgage import Mortgage
 from planner.asset import Asset
+from planner.interest_rate import InterestRate
+from planner.common import DEFAULT_INTEREST
 
 def test_mortgage():
     mortgage = Mortgage(**yaml.safe_load("""name: a
@@ -27,4 +31,69 @@ remaining_balance: 460000.00
     while mortgage.destination.f_balance < 0.0:
         mortgage.destination.execute_transaction(
             mortgage, True, None
-        )
\ No newline at end of file
+        )
+def test_amortization():
+    mortgage = Mortgage(**yaml.safe_load("""name: a
+loan_amount: 100000.00
+loan_rate: 6.0
+term_months: 12
+source: Bank
+destination: Debt
+extra_principal: 500.00
+extra_principal_start: 2023-06-01
+"""))
+    assets = {
+        "Bank": Asset(name="Bank", balance=Decimal("200000.00")),
+        "Debt": Asset(name="Debt", balance=Decimal("-100000.00"), allow_negative_balance=True),
+    }
+    mortgage.setup(date(2023, 1, 1), date(2025, 1, 1), assets, {DEFAULT_INTEREST: InterestRate(name=DEFAULT_INTEREST)}, {})
+    table = mortgage.amortization_table()
+    # Extra principal pays the debt off early
+    assert(len(table) == 12)
+    assert(table[-1]["balance"] == Decimal("0.00"))
+    assert(table[0]["interest"] == Decimal("500.00"))
+    assert(table[5]["payment"] - table[4]["payment"] == Decimal("500.00"))
+    # Rows are the payments made without the table
+    for day, (opening, payment, interest, principal, _) in mortgage.amortization.items():
+        assert(mortgage.payment_split(opening, date.fromordinal(day)) == (payment, interest, principal))
+    # Payments follow the table while the debt is as scheduled
+    for payment_date in mortgage.calendar_dates()[:3]:
+        assert(mortgage.amortization_row(payment_date) is not None)
+        principal = mortgage.get_amount(payment_date, True)
+        assets["Debt"].execute_transaction(principal, mortgage, True, payment_date)
+    # Float differences within a cent still follow the table
+    payment_date = mortgage.calendar_dates()[3]
+    assets["Debt"].f_balance += 1e-9
+    assert(mortgage.amortization_row(payment_date) is not None)
+    # Other payments to the debt fall back to the balance
+    assets["Debt"].f_balance += 1000.0
+    assert(mortgage.amortization_row(payment_date) is None)
+    assert(mortgage.get_amount(payment_date, True) == mortgage.monthly_payment(payment_date) - mortgage.payment_interest)
+
+def test_amortization_step_modes():
+    configuration = yaml.safe_load("""start: 2023-01-01
+end: 2027-01-01
+assets:
+    - name: Bank
+      balance: 200000.00
+    - name: Debt
+      balance: -150000.00
+      allow_negative_balance: True
+mortgages:
+    - name: House
+      source: Bank
+      destination: Debt
+      loan_amount: 150000.00
+      loan_rate: 5.0
+      term_months: 360
+      extra_principal: 250.00
+      extra_principal_start: 2024-06-01
+""")
+    daily_states = Simulation(**configuration).run()[1]
+    # Monthly steps pay on month ends so never use the table
+    monthly_states = Simulation(**dict(configuration, step_mode="monthly")).run()[1]
+    monthly_balances = {s["date"]: s["balance"] for s in monthly_states if s["name"] == "Debt"}
+    daily_balances = {s["date"]: s["balance"] for s in daily_states if s["name"] == "Debt" and s["date"] in monthly_balances}
+    assert(len(daily_balances) == 48)
+    for state_date, balance in daily_balances.items():
+        assert(monthly_balances[state_date] == balance), state_date
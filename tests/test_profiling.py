@@ -0,0 +1,39 @@
+import yaml
+
+from planner import Simulation
+from planner.profiling import RunProfiler
+
+CONFIGURATION = """start: 2023-01-01
+end: 2025-01-01
+assets:
+    - name: Bank
+      balance: 1000.00
+transactions:
+    - name: Salary
+      amount: 4000.00
+      destination: Bank
+      income_taxable: True
+    - name: Groceries
+      amount: 100.00
+      source: Bank
+      frequency: weekly
+federal_income_taxes:
+    source: Bank
+"""
+
+def test_profile():
+    profiler = RunProfiler()
+    days, asset_states, action_logger, _, _, _ = Simulation(**yaml.safe_load(CONFIGURATION)).run(profiler=profiler)
+    # Profiling does not change results
+    _, plain_asset_states, plain_action_logger, _, _, _ = Simulation(**yaml.safe_load(CONFIGURATION)).run()
+    assert(asset_states == plain_asset_states)
+    assert(action_logger.flatten_logs() == plain_action_logger.flatten_logs())
+    report = profiler.report()
+    assert(report["simulated_days"] == days)
+    assert(report["transactions"]["Salary"]["executions"] == 24)
+    assert(report["transactions"]["Groceries"]["executions"] == 105)
+    assert(report["frequencies"]["monthly"]["executions"] == 24)
+    assert(report["phases"]["get_amount"]["count"] == 24 + 105)
+    assert(report["phases"]["taxes"]["count"] == 2)
+    assert(report["phases"]["snapshots"]["count"] == 24)
+    assert(report["total_seconds"] >= sum([p["seconds"] for p in report["phases"].values()]))
@@ -0,0 +1,68 @@
+import os
+
+import yaml
+
+from planner import Simulation
+from planner import result_cache
+from planner.result_cache import ResultCache, configuration_key, cached_run
+from planner.config_reading import load_configuration_file
+
+CONFIGURATION = """start: 2023-01-01
+end: 2025-01-01
+assets:
+    - name: Bank
+      balance: 100.00
+transactions:
+    - name: a
+      amount: 50.00
+      destination: Bank
+"""
+
+def test_configuration_key():
+    configuration = yaml.safe_load(CONFIGURATION)
+    reordered = {k: configuration[k] for k in reversed(list(configuration.keys()))}
+    assert(configuration_key(configuration) == configuration_key(reordered))
+    changed = yaml.safe_load(CONFIGURATION)
+    changed["end"] = "2026-01-01"
+    assert(configuration_key(configuration) != configuration_key(changed))
+    assert(configuration_key(configuration) != configuration_key(configuration, "incremental"))
+
+def test_engine_change_key(monkeypatch):
+    configuration = yaml.safe_load(CONFIGURATION)
+    key = configuration_key(configuration)
+    # Results of an edited engine are not reused
+    monkeypatch.setattr(result_cache, "_engine_version", "edited")
+    assert(configuration_key(configuration) != key)
+
+def test_cached_run(tmp_path, monkeypatch):
+    cache = ResultCache(tmp_path)
+    days, asset_states, action_logger, _, _, _ = cached_run(yaml.safe_load(CONFIGURATION), cache)
+    # A cached configuration is not run again
+    def fail_run(*args, **kwargs):
+        raise(AssertionError("Simulation should not run"))
+    monkeypatch.setattr(Simulation, "run", fail_run)
+    cached_days, cached_asset_states, cached_action_logger, _, _, _ = cached_run(yaml.safe_load(CONFIGURATION), cache)
+    assert(cached_days == days)
+    assert(cached_asset_states == asset_states)
+    assert(cached_action_logger.flatten_logs() == action_logger.flatten_logs())
+    assert(len(cached_action_logger.to_dataframe()) == len(action_logger))
+
+def test_eviction(tmp_path):
+    cache = ResultCache(tmp_path, max_bytes=1500)
+    # Random data does not compress
+    old = os.urandom(1000)
+    new = os.urandom(1000)
+    cache.put("old", old)
+    cache.put("new", new)
+    assert(cache.get("old") is None)
+    assert(cache.get("new") == new)
+
+def test_fragment_eviction(tmp_path):
+    (tmp_path / "plan.yml").write_text(CONFIGURATION)
+    cache = ResultCache(tmp_path / "cache", max_bytes=1500)
+    load_configuration_file(tmp_path / "plan.yml", tmp_path / "cache")
+    assert(len(list(cache.directory.glob("*.fragment"))) == 1)
+    # Parsed configurations count towards the cache size
+    cache.put("new", os.urandom(1000))
+    cache.put("newer", os.urandom(1000))
+    assert(len(list(cache.directory.glob("*.fragment"))) == 0)
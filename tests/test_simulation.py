@@ -1,11 +1,13 @@
 from datetime import date
 from decimal import Decimal
+import math
 
 import yaml
 import pytest
 
 from planner import Simulation
-from planner.common import round
+from planner.common import round, boundary_tables
+from planner.step_comparison import compare_step_modes
 
 BALANCE = "100.00"
 RATE = "7.0"
@@ -59,3 +61,132 @@ def test_run(simulation):
 def test_transactions(transaction_simulation):
     transaction_simulation.run()
     assert(transaction_simulation.assets[0].get_balance() == Decimal(BALANCE) + Decimal("13") * Decimal(INCREMENT))
+
+def test_deferred_maturity():
+    configuration = yaml.safe_load(f"""start: 2023-01-01
+end: 2026-01-01
+interest_rates:
+    - name: example
+      rate: {RATE}
+assets:
+    - name: Bank
+      balance: {BALANCE}
+transactions:
+    - name: Bank Interest
+      destination: Bank
+      frequency: daily
+      asset_maturity: True
+      interest_rate: example
+    - name: a
+      amount: {INCREMENT}
+      destination: Bank
+      frequency: biweekly
+      priority: 50
+""")
+    daily = Simulation(**configuration)
+    daily.run()
+    deferred = Simulation(maturity_mode="deferred", **configuration)
+    deferred.run()
+    assert(abs(daily.assets[0].f_balance - deferred.assets[0].f_balance) < 0.01)
+
+def test_cents_ledger():
+    configuration = yaml.safe_load(f"""start: 2023-01-01
+end: 2025-01-01
+ledger_mode: cents
+interest_rates:
+    - name: example
+      rate: {RATE}
+assets:
+    - name: Bank
+      balance: {BALANCE}
+transactions:
+    - name: Bank Interest
+      destination: Bank
+      frequency: daily
+      asset_maturity: True
+      interest_rate: example
+    - name: a
+      amount: {INCREMENT}
+      destination: Bank
+      interest_rate: example
+""")
+    simulation = Simulation(**configuration)
+    _, asset_states, action_logger, _, _, _ = simulation.run()
+    # Actions add up to the balance exactly
+    total = Decimal(BALANCE) + sum([a["amount"] for a in action_logger.flatten_logs()])
+    assert(simulation.assets[0].get_balance() == total)
+    assert(Decimal(asset_states[-1]["balance"]) == total)
+    assert(simulation.assets[0].f_balance == simulation.assets[0].cents_balance / 100)
+
+def test_boundary_tables():
+    month_ends, year_ends = boundary_tables(date(2023, 11, 15), date(2024, 3, 30))
+    assert([date.fromordinal(d) for d in month_ends] == [
+        date(2023, 11, 30),
+        date(2023, 12, 31),
+        date(2024, 1, 31),
+        date(2024, 2, 29),
+    ])
+    assert(year_ends == {date(2023, 12, 31).toordinal()})
+
+def test_monthly_steps():
+    configuration = yaml.safe_load(f"""start: 2023-01-01
+end: 2024-01-01
+interest_rates:
+    - name: example
+      rate: {RATE}
+assets:
+    - name: Bank
+      balance: {BALANCE}
+    - name: Savings
+      balance: {BALANCE}
+transactions:
+    - name: Savings Interest
+      destination: Savings
+      frequency: daily
+      asset_maturity: True
+      interest_rate: example
+    - name: a
+      amount: {INCREMENT}
+      destination: Bank
+      frequency: biweekly
+""")
+    simulation = Simulation(step_mode="monthly", **configuration)
+    _, asset_states, action_logger, _, _, _ = simulation.run()
+    # Every execution of a month happens on its last day
+    month_ends = [date.fromordinal(d) for d in boundary_tables(date(2023, 1, 1), date(2023, 12, 31))[0]]
+    assert(sorted(set([a["date"] for a in action_logger.flatten_logs()])) == month_ends)
+    assert(simulation.assets[0].get_balance() == Decimal(BALANCE) + Decimal("27") * Decimal(INCREMENT))
+    assert(len(asset_states) == 24)
+    summaries, rows = compare_step_modes(configuration)
+    assert([s["steps"] for s in summaries] == [365, 12])
+    assert(rows[0]["max_difference"] == 0.0)
+    # Monthly compounding of a daily rate matches daily maturity
+    assert(abs(rows[1]["difference"]) < 0.01)
+
+def test_monthly_steps_maturity_first():
+    configuration = yaml.safe_load("""start: 2023-01-01
+end: 2023-03-01
+interest_rates:
+    - name: example
+      rate: 12.0
+assets:
+    - name: Savings
+      balance: 10000.00
+transactions:
+    - name: Deposit
+      amount: 5000.00
+      destination: Savings
+    - name: Savings Interest
+      destination: Savings
+      frequency: daily
+      asset_maturity: True
+      interest_rate: example
+      priority: 500
+""")
+    # Maturity grows from the start date to the first month end
+    growth = math.pow(1 + 0.12 / 365.0, 30)
+    for maturity_mode in ["daily", "deferred"]:
+        simulation = Simulation(step_mode="monthly", maturity_mode=maturity_mode, **configuration)
+        _, asset_states, _, _, _, _ = simulation.run()
+        # Only the balance the month opened with grows, however late maturity is
+        assert(asset_states[0]["balance"] == str(round(Decimal(10000.0 * growth + 5000.0))))
@@ -0,0 +1,91 @@
+import csv
+import json
+
+import yaml
+import pytest
+
+from planner import Simulation
+from planner.sinks import CsvSink, JsonLinesSink, ParquetSink
+
+CONFIGURATION = """start: 2023-01-01
+end: 2025-01-01
+assets:
+    - name: Bank
+      balance: 100.00
+transactions:
+    - name: a
+      amount: 50.00
+      destination: Bank
+    - name: b
+      amount: 30.00
+      source: Bank
+      frequency: biweekly
+"""
+
+def test_streaming_sinks(tmp_path):
+    _, asset_states, action_logger, _, _, _ = Simulation(**yaml.safe_load(CONFIGURATION)).run()
+    actions = action_logger.flatten_logs()
+    with CsvSink(tmp_path / "output.csv", chunk_size=2) as state_sink, JsonLinesSink(tmp_path / "changes.jsonl", chunk_size=2) as action_sink:
+        _, streamed_states, streamed_logger, _, _, _ = Simulation(**yaml.safe_load(CONFIGURATION)).run(
+            state_sink=state_sink,
+            action_sink=action_sink,
+        )
+    # Nothing kept in memory
+    assert(len(streamed_states) == 0)
+    assert(len(streamed_logger) == 0)
+    with open(tmp_path / "output.csv", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert(len(rows) == len(asset_states))
+    assert(rows[-1]["balance"] == asset_states[-1]["balance"])
+    with open(tmp_path / "changes.jsonl") as f:
+        rows = [json.loads(line) for line in f]
+    assert(len(rows) == len(actions))
+    assert([r["amount"] for r in rows] == [float(a["amount"]) for a in actions])
+
+def test_partial_results(tmp_path):
+    configuration = yaml.safe_load(CONFIGURATION)
+    configuration["transactions"][1]["amount"] = 200.00
+    with JsonLinesSink(tmp_path / "changes.jsonl") as action_sink:
+        days, _, _, _, _, error_raised = Simulation(**configuration).run(action_sink=action_sink)
+    assert(error_raised is not None)
+    with open(tmp_path / "changes.jsonl") as f:
+        rows = [json.loads(line) for line in f]
+    # Actions up to the failure are written
+    assert(len(rows) > 0)
+    assert(rows[-1]["date"] < "2023-12-31")
+
+class RecordingSink(JsonLinesSink):
+    """ Sink remembering the size of each chunk written """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.write_sizes = []
+
+    def write_column_chunk(self, columns: dict):
+        self.write_sizes.append(len(columns["amount"]))
+        super().write_column_chunk(columns)
+
+def test_actions_written_in_chunks(tmp_path):
+    with RecordingSink(tmp_path / "changes.jsonl", chunk_size=5) as action_sink:
+        Simulation(**yaml.safe_load(CONFIGURATION)).run(action_sink=action_sink)
+    # Actions are not held for a whole year
+    assert(max(action_sink.write_sizes) < 10)
+    assert(sum(action_sink.write_sizes) == action_sink.rows_written)
+
+def test_csv_columns_match_rows(tmp_path):
+    _, _, action_logger, _, _, _ = Simulation(**yaml.safe_load(CONFIGURATION)).run()
+    with CsvSink(tmp_path / "rows.csv", chunk_size=3) as sink:
+        sink.write(action_logger.flatten_logs())
+    with CsvSink(tmp_path / "columns.csv", chunk_size=3) as sink:
+        sink.write_columns(action_logger.row_columns())
+    assert((tmp_path / "columns.csv").read_text() == (tmp_path / "rows.csv").read_text())
+
+def test_parquet_late_column_type(tmp_path):
+    pyarrow = pytest.importorskip("pyarrow")
+    import pyarrow.parquet
+    with ParquetSink(tmp_path / "rows.parquet", chunk_size=1) as sink:
+        sink.write([{"name": "a", "category": None}])
+        sink.write([{"name": "b", "category": "food"}])
+    table = pyarrow.parquet.read_table(tmp_path / "rows.parquet")
+    assert(table.column("category").to_pylist() == [None, "food"])
+    assert(pyarrow.types.is_string(table.schema.field("category").type))
@@ -0,0 +1,75 @@
+from datetime import date
+
+import yaml
+import pytest
+
+from planner.sweep import expand_grid, apply_overrides, run_sweep
+
+CONFIGURATION = yaml.safe_load("""start: 2023-01-01
+end: 2025-01-01
+dates:
+    retirement: 2024-01-01
+assets:
+    - name: Bank
+      balance: 1000.00
+transactions:
+    - name: Salary
+      amount: 100.00
+      destination: Bank
+      end: retirement
+    - name: Bills
+      source: Bank
+      sub_transactions:
+        - name: Rent
+          amount: 150.00
+""")
+
+GRID = yaml.safe_load("""dates:
+    retirement: [2024-01-01, 2025-01-01]
+transactions:
+    Rent:
+        amount: [50.00, 150.00]
+""")
+
+def test_expand_grid():
+    variations = expand_grid(GRID)
+    assert(len(variations) == 4)
+    assert(variations[0] == {"dates.retirement": date(2024, 1, 1), "transactions.Rent.amount": 50.0})
+
+def test_apply_overrides():
+    configuration = apply_overrides(CONFIGURATION, {"dates.retirement": date(2030, 1, 1), "transactions.Rent.amount": 1.0})
+    assert(configuration["dates"]["retirement"] == date(2030, 1, 1))
+    assert(configuration["transactions"][1]["sub_transactions"][0]["amount"] == 1.0)
+    assert(CONFIGURATION["transactions"][1]["sub_transactions"][0]["amount"] == 150.0)
+    with pytest.raises(ValueError):
+        apply_overrides(CONFIGURATION, {"transactions.Missing.amount": 1.0})
+
+def test_run_sweep():
+    rows = run_sweep(CONFIGURATION, GRID, workers=2)
+    assert(len(rows) == 4)
+    # Spending more than earning runs out of money
+    assert(rows[1]["first_failure_date"] is not None)
+    assert(rows[2]["first_failure_date"] is None)
+    assert(rows[2]["final_net_worth"] == 1000.0 + 24 * 100.0 - 24 * 50.0)
+
+def test_apply_overrides_without_dates():
+    configuration = apply_overrides({"start": date(2023, 1, 1)}, {"dates.retirement": date(2030, 1, 1)})
+    assert(configuration["dates"] == {"retirement": date(2030, 1, 1)})
+
+def test_run_sweep_premature_withdrawal():
+    configuration = yaml.safe_load("""start: 2023-01-01
+end: 2024-01-01
+assets:
+    - name: Roth
+      balance: 30000.00
+      contribution_balance: 10000.00
+      min_earnings_date: 2040-01-01
+transactions:
+    - name: Spending
+      amount: 500.00
+      source: Roth
+""")
+    rows = run_sweep(configuration, {"transactions": {"Spending": {"amount": [500.00, 1000.00]}}}, workers=2)
+    assert(rows[0]["failure"] is None)
+    # Withdrawing earnings early fails only its own variation
+    assert(rows[1]["failure"].startswith("Withdrawals of earnings not allowed for Roth"))
@@ -1,7 +1,36 @@
-from datetime import date
+from datetime import date, timedelta
 
 from planner.transaction import Transaction, TransactionGroup
 
+def scan_dates(definition: dict, first_date: date, last_date: date) -> list:
+    """ Dates found by checking every day against the frequency """
+    start = definition["start_date"]
+    periods = definition.get("frequency_periods", 1)
+    frequency = definition.get("frequency", "monthly")
+    counter = periods
+    last_executed = None
+    dates = []
+    current_date = first_date
+    while current_date <= last_date:
+        execute = False
+        if start <= current_date <= definition["end_date"]:
+            if frequency == "daily":
+                execute = True
+            elif frequency == "yearly":
+                execute = (current_date.month, current_date.day) == (start.month, start.day)
+            elif frequency == "monthly" or last_executed is None:
+                execute = current_date.day == start.day
+            else:
+                execute = (current_date - last_executed).days == (14 if frequency == "biweekly" else 7)
+        if execute:
+            counter += 1
+            if counter >= periods:
+                counter = 0
+                last_executed = current_date
+                dates.append(current_date)
+        current_date += timedelta(days=1)
+    return dates
+
 def test_executable():
     transaction = Transaction(
         name='a',
@@ -51,4 +80,14 @@ def test_nesting():
         ]
     })
     tg.to_transaction_list()
-    print("complete")
\ No newline at end of file
+    print("complete")
+
+def test_compile_calendar():
+    for start in [date(2023,1,31), date(2024,2,29)]:
+        for frequency in ["daily", "weekly", "biweekly", "monthly", "yearly"]:
+            for periods in [1, 2, 3]:
+                definition = dict(name='a', start_date=start, end_date=date(2028,3,1), frequency=frequency, frequency_periods=periods)
+                scanned_dates = scan_dates(definition, date(2023,1,1), date(2028,6,1))
+                compiled = Transaction(**definition)
+                compiled.fire_calendar = compiled.compile_calendar(date(2023,1,1), date(2028,6,1))
+                assert(compiled.calendar_dates() == scanned_dates), f"{frequency} every {periods}"
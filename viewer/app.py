@@ -1,11 +1,14 @@
 from pathlib import Path
+import argparse
+import os
 
 import streamlit as st
 import plotly.express as px
 import pandas as pd
 
-from planner.config_reading import read_configuration
-from planner import Simulation
+from planner.config_reading import read_configuration, load_simulation
+from planner.incremental import IncrementalRunner
+from planner.result_cache import ResultCache
 
 from simulation_editor import edit_simulation
 
@@ -18,17 +21,57 @@ run_type = st.radio(
 )
 live_operation = run_type == run_options[1]
 
+def viewer_arguments() -> argparse.Namespace:
+    """ Plan and cache locations given after -- to streamlit run
+
+    PLANNER_YAML_PATH_LIST and PLANNER_CACHE_DIR are used when an
+    argument is not given.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-l",
+        "--yaml_path_list",
+        help="YAML file with list of YAML file paths",
+        type=Path,
+        default=os.environ.get("PLANNER_YAML_PATH_LIST"),
+    )
+    parser.add_argument(
+        "--cache_dir",
+        help="Directory of cached configuration files and results, default none",
+        type=Path,
+        default=os.environ.get("PLANNER_CACHE_DIR"),
+    )
+    arguments, _ = parser.parse_known_args()
+    return arguments
+
+arguments = viewer_arguments()
+CONFIGURATION_PATH = arguments.yaml_path_list
+CACHE_DIRECTORY = arguments.cache_dir
+
+@st.cache_resource
+def base_runner(configuration_path: Path, modified_time: float) -> IncrementalRunner:
+    """ Unedited run with checkpoints, redone when the file changes """
+    return IncrementalRunner(
+        read_configuration([], configuration_path, cache_directory=CACHE_DIRECTORY),
+        cache=None if CACHE_DIRECTORY is None else ResultCache(CACHE_DIRECTORY),
+    )
+
 if live_operation:
     if st.checkbox("Auto-run"):
         run = True
     else:
         run = st.button("Run Simulation")
+    if run and CONFIGURATION_PATH is None:
+        st.error("No plan given, run with -- -l list.yml or set PLANNER_YAML_PATH_LIST")
+        st.stop()
     if run:
-        configuration = read_configuration([], Path("../payne_private/all_payne.yml"))
+        configuration = read_configuration([], CONFIGURATION_PATH, cache_directory=CACHE_DIRECTORY)
         with st.spinner('Running simulation...'):
-            simulation = edit_simulation(Simulation(**configuration))
+            runner = base_runner(CONFIGURATION_PATH, CONFIGURATION_PATH.stat().st_mtime)
+            simulation = edit_simulation(load_simulation(configuration))
             #if st.button("Run Simulation"):
-            days, asset_states, action_logs, tax_data, state_tax_data, error_raised = simulation.run()
+            # Only dates from the first edit onward are simulated again
+            days, asset_states, action_logs, tax_data, state_tax_data, error_raised = runner.run(simulation)
             # else:
             #     st.stop()
             if error_raised is not None:
@@ -80,9 +123,7 @@ st.plotly_chart(px.line(
 
 def display_income_or_expenses(data, expenses: bool = True, live_operation: bool = False):
     if live_operation:
-        data = pd.DataFrame(action_logs)
-        data["date"] = pd.to_datetime(data["date"])
-        data["amount"] = data["amount"].astype(float)
+        data = action_logs.to_dataframe()
     else:
         data = pd.read_csv("../changes.csv", parse_dates=["date"])
     data = data.loc[~data["asset_maturity"], :]